@@ -0,0 +1,91 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+_nan = float('nan')
+
+class EdgeFingerprints(object):
+
+    """A table of numeric fingerprints of OCCEdges, used to rule out `isSame` candidates in bulk.
+
+    The fingerprint of an Edge is a row of numbers: its curve type, its two end points
+    (sorted, so that the direction of the Edge does not matter), its Length and its
+    bounding box. Two Edges that are isSame have the same fingerprint, so only the rows
+    that agree with an Edge's fingerprint within tolerance can be isSame to it. A measure
+    that an Edge lacks, e.g. on the fakes used by the tests, is NaN and agrees with anything.
+
+    With NumPy the table is an array and `match` compares all of its rows in one vectorized
+    step. NumPy is optional: without it the rows are tuples and `match` is a plain loop.
+
+    A table is immutable, `extend` returns a new one."""
+
+    # curve type name -> the number that stands for it in a fingerprint
+    _curveTypes = {}
+
+    WIDTH = 14
+
+    def __init__(self, ids, fingerprints):
+        '''fingerprints holds the fingerprint of each id, see `fingerprint`, or None'''
+        self._ids = tuple(ids)
+        rows = [(_nan,) * self.WIDTH if i is None else i for i in fingerprints]
+        if not numpy is None:
+            self._rows = numpy.array(rows, dtype=float).reshape(len(rows), self.WIDTH)
+        else:
+            self._rows = rows
+
+    @classmethod
+    def fingerprint(cls, OCCEdge):
+        '''Returns the fingerprint of OCCEdge as a tuple, or None if it has no measures'''
+        curve = getattr(OCCEdge, 'Curve', None)
+        vertexes = getattr(OCCEdge, 'Vertexes', None)
+        length = getattr(OCCEdge, 'Length', None)
+        box = getattr(OCCEdge, 'BoundBox', None)
+        if curve is None and vertexes is None and length is None and box is None:
+            return None
+
+        row = [_nan] * cls.WIDTH
+        if not curve is None:
+            row[0] = cls._curveTypes.setdefault(type(curve).__name__, len(cls._curveTypes))
+        if vertexes:
+            points = sorted([(i.Point.x, i.Point.y, i.Point.z) for i in vertexes])
+            row[1:4] = points[0]
+            row[4:7] = points[-1]
+        if not length is None:
+            row[7] = length
+        if not box is None:
+            row[8:14] = [box.XMin, box.YMin, box.ZMin, box.XMax, box.YMax, box.ZMax]
+        return tuple(row)
+
+    def getIds(self):
+        return self._ids
+
+    def extend(self, ids, fingerprints):
+        '''Returns a new table with ids and their fingerprints appended'''
+        other = self.__class__(ids, fingerprints)
+        other._ids = self._ids + other._ids
+        if not numpy is None:
+            other._rows = numpy.concatenate([self._rows, other._rows])
+        else:
+            other._rows = self._rows + other._rows
+        return other
+
+    def match(self, fingerprint, tolerance=1e-7):
+        '''Returns the ids whose fingerprint agrees with fingerprint within tolerance'''
+        if not numpy is None:
+            difference = numpy.abs(self._rows - numpy.array(fingerprint, dtype=float))
+            agrees = (difference <= tolerance) | numpy.isnan(difference)
+            return [self._ids[i] for i in numpy.flatnonzero(agrees.all(axis=1))]
+
+        matches = []
+        for edgeId, row in zip(self._ids, self._rows):
+            for mine, theirs in zip(row, fingerprint):
+                # NaN fails every comparison, so an unknown measure never rules a row out
+                if abs(mine - theirs) > tolerance:
+                    break
+            else:
+                matches.append(edgeId)
+        return matches
+
+    def __len__(self):
+        return len(self._ids)
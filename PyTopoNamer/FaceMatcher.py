@@ -0,0 +1,119 @@
+import math
+from PyTopoNamer.ShapeSignature import ShapeSignature
+from PyTopoNamer.SpatialIndex import SpatialIndex
+
+class FaceMatcher(object):
+
+    """Works out how the Faces of a shape changed when there is no history to tell.
+
+    `match` pairs each old Face with the new Face it most likely became, in three steps:
+        1. a new Face that isEqual to an old one is that Face, unchanged. The Faces are
+           bucketed by shape key, so this is a single pass.
+        2. the centroids of the remaining new Faces are put in a `SpatialIndex`. Each old
+           Face only looks at the new Faces whose centroid lies within searchRadius times
+           its own size (the diagonal of its bounding box). Of those with the same type
+           of Surface it keeps the best few, at most candidates.
+        3. all the kept pairs are assigned at once, best first, each Face at most once.
+    No Face is compared with every other one, so this scales to thousands of Faces.
+
+    A pair is scored by how far the centroid moved relative to the size of the old Face,
+    the relative change in Area and the angle between the normals. Pairs that score above
+    maxScore are never matched: the old Face is deleted and the new one is new.
+
+    Faces without an Area, a CenterOfMass or a BoundBox can only be matched in step 1."""
+
+    def __init__(self, shapeKey, searchRadius=2.0, candidates=4, maxScore=2.0):
+        self._shapeKey = shapeKey
+        self._searchRadius = searchRadius
+        self._candidates = candidates
+        self._maxScore = maxScore
+
+    def _size(self, OCCFace):
+        box = SpatialIndex.boxOf(OCCFace)
+        if box is None:
+            return None
+        return math.sqrt(sum([(box[i + 3] - box[i]) ** 2 for i in range(3)]))
+
+    def _score(self, old, new, size):
+        '''Returns how badly the signature new matches old, a Face of the given size'''
+        if old.getSurface() != new.getSurface():
+            return None
+        moved = [i - j for i, j in zip(old.getCenter(), new.getCenter())]
+        score = math.sqrt(sum([i ** 2 for i in moved])) / size
+        score += abs(old.getArea() - new.getArea()) / max(old.getArea(), new.getArea())
+        if not (old.getNormal() is None or new.getNormal() is None):
+            cosine = sum([i * j for i, j in zip(old.getNormal(), new.getNormal())])
+            score += (1.0 - cosine) / 2.0
+        return score
+
+    def _isMeasured(self, signature):
+        return not (signature.getCenter() is None or not signature.getArea())
+
+    def match(self, oldFaces, newFaces):
+        '''Returns (newFaces, modifiedFaces, deletedFaces), ready for `TopoNamer.modifyShape`.
+
+        The new Faces that are unchanged old Faces are left out altogether.'''
+        oldFaces = list(oldFaces)
+        newFaces = list(newFaces)
+
+        # 1. Unchanged Faces
+        newByKey = {}
+        for index, OCCFace in enumerate(newFaces):
+            newByKey.setdefault(self._shapeKey(OCCFace), []).append(index)
+        claimed = set()
+        unchanged = set()
+        for oldIndex, OCCFace in enumerate(oldFaces):
+            for index in newByKey.get(self._shapeKey(OCCFace), ()):
+                if not index in claimed and newFaces[index].isEqual(OCCFace):
+                    claimed.add(index)
+                    unchanged.add(oldIndex)
+                    break
+
+        # 2. Candidate pairs, found through the centroids of the new Faces
+        oldLeft = [i for i in range(len(oldFaces)) if not i in unchanged]
+        newLeft = [i for i in range(len(newFaces)) if not i in claimed]
+        newSignatures = {}
+        for index in newLeft:
+            signature = ShapeSignature.fromShape(newFaces[index], self._shapeKey)
+            if self._isMeasured(signature):
+                newSignatures[index] = signature
+        oldSizes = {}
+        oldSignatures = {}
+        for index in oldLeft:
+            signature = ShapeSignature.fromShape(oldFaces[index], self._shapeKey)
+            size = self._size(oldFaces[index])
+            if self._isMeasured(signature) and size:
+                oldSignatures[index] = signature
+                oldSizes[index] = size
+
+        pairs = []
+        if len(oldSignatures) > 0 and len(newSignatures) > 0:
+            cellSize = self._searchRadius * sum(oldSizes.values()) / len(oldSizes)
+            centers = SpatialIndex(cellSize)
+            for index, signature in newSignatures.items():
+                centers.insert(index, signature.getCenter() * 2)
+            for oldIndex, signature in oldSignatures.items():
+                radius = self._searchRadius * oldSizes[oldIndex]
+                scored = []
+                for index in centers.find(signature.getCenter() * 2, radius):
+                    score = self._score(signature, newSignatures[index], oldSizes[oldIndex])
+                    if not score is None and score <= self._maxScore:
+                        scored.append((score, oldIndex, index))
+                scored.sort()
+                pairs.extend(scored[:self._candidates])
+
+        # 3. Assign the best pairs first
+        pairs.sort()
+        modifiedFaces = []
+        matchedOld = set()
+        for score, oldIndex, index in pairs:
+            if oldIndex in matchedOld or index in claimed:
+                continue
+            matchedOld.add(oldIndex)
+            claimed.add(index)
+            modifiedFaces.append((oldIndex, index))
+        modifiedFaces.sort()
+
+        return ([newFaces[i] for i in range(len(newFaces)) if not i in claimed],
+                [(oldFaces[i], newFaces[j]) for i, j in modifiedFaces],
+                [oldFaces[i] for i in oldLeft if not i in matchedOld])
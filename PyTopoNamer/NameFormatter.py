@@ -0,0 +1,97 @@
+import re
+import sys
+
+class NameFormatter(object):
+
+    """Converts between topological name strings and the ids used internally.
+
+    Internally a name is an id: a tuple of small integers. The first one is the index of
+    the Face or Edge, the rest are the letters of its sub-name suffix (a=0 ... z=25). For
+    example, 'Edge002' is (2,) and 'Edge002bc' is (2, 1, 2). Ids are cheap to hash and
+    compare, and unlike the strings they also sort correctly past index 999.
+
+    Strings are only built when a name leaves the tracker. Both directions are cached, and
+    the strings are interned, so a name is normally only formatted or parsed once. The caches
+    are shared by every tracker, so they are bounded by maxSize: once either one is full both
+    are emptied, and the names still in use are simply cached again."""
+
+    _pattern = re.compile(r'^([A-Za-z]+?)(\d+)([a-z]*)$')
+
+    def __init__(self, maxSize=100000):
+        self._maxSize = maxSize
+        self._names = {}
+        self._ids = {}
+
+    def _cache(self, name, key):
+        if len(self._names) >= self._maxSize or len(self._ids) >= self._maxSize:
+            self._names.clear()
+            self._ids.clear()
+        self._names[key] = name
+        self._ids[name] = key
+
+    def format(self, base, nameId):
+        '''Returns the name string for nameId, e.g. format('Face', (3,)) -> 'Face003' '''
+        key = (base, nameId)
+        name = self._names.get(key)
+        if name is None:
+            suffix = ''.join([chr(ord('a') + i) for i in nameId[1:]])
+            name = sys.intern('{}{:03d}{}'.format(base, nameId[0], suffix))
+            self._cache(name, key)
+        return name
+
+    def parse(self, name):
+        '''Returns the (base, nameId) for a name string, e.g. 'Face003' -> ('Face', (3,))
+
+        Only the form returned by format is accepted, so 'Face3' and 'Face0003' are not
+        aliases of 'Face003'.
+
+        raises ValueError if name is not a valid topological name'''
+        key = self._ids.get(name)
+        if key is None:
+            match = self._pattern.match(name)
+            if match is None or '{:03d}'.format(int(match.group(2))) != match.group(2):
+                msg = '{} is not a valid topological name'.format(name)
+                raise ValueError(msg)
+            base, index, suffix = match.groups()
+            nameId = (int(index),) + tuple([ord(i) - ord('a') for i in suffix])
+            key = (base, nameId)
+            self._cache(sys.intern(name), key)
+        return key
+
+    def sortKey(self, name):
+        '''A key for sorting name strings in numerical rather than alphabetical order'''
+        return self.parse(name)
+
+    @staticmethod
+    def nextSubId(nameId):
+        '''Returns the id of the sub-name that follows nameId.
+
+        A plain name gets the first sub-name ('a'). Otherwise the last letter is
+        incremented, and 'z' rolls over to 'aa'.'''
+        if len(nameId) == 1:
+            return nameId + (0,)
+        last = nameId[-1]
+        if last == 25:
+            return nameId[:-1] + (0, 0)
+        return nameId[:-1] + (last + 1,)
+
+    @staticmethod
+    def followingSubId(nameId):
+        '''Returns the id of the sub-name after nameId in the sequence a, ..., z, aa, ab, ...,
+        zz, aaa, ...
+
+        Unlike `nextSubId` the sub-names count up in bijective base 26, so the n-th one has
+        only about log26(n) letters.'''
+        letters = list(nameId[1:])
+        position = len(letters) - 1
+        while position >= 0 and letters[position] == 25:
+            letters[position] = 0
+            position -= 1
+        if position < 0:
+            letters.insert(0, 0)
+        else:
+            letters[position] += 1
+        return nameId[:1] + tuple(letters)
+
+# Shared by every tracker, so that each name string in use exists only once
+names = NameFormatter()
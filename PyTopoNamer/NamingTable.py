@@ -0,0 +1,230 @@
+import mmap
+import struct
+
+class NamingTable(object):
+
+    """A read-only, memory-mapped naming table on disk.
+
+    The file is written from a `TopoTracker` snapshot by `NamingTable.write`. All records
+    have a fixed width and are sorted, so a lookup is a binary search straight on the
+    mapped file: opening a table costs the same no matter how big it is, and only the
+    pages that are actually searched are ever read.
+
+    Layout (little endian):
+        header:     magic, version, numbFaces, numbEdges, and the number of records in
+                    each of the following sections
+        faces:      one FACE record per Face, sorted by id
+        edges:      one EDGE record per Edge, sorted by id
+        keys:       one KEY record per keyed Edge, sorted by shape key
+        edgeLinks:  one LINK record (parent, order, child) per child Edge, see
+                    `TopoTracker.getEdgeDescendants`, sorted by parent and then oldest first
+        faceLinks:  the same for the Faces split off another Face
+        faceMerges: one LINK record (Face, 0, Face it was merged into) per merged Face,
+                    sorted by the merged Face
+
+    A name id is stored as two int32: its index and its sub-name suffix. The suffix is
+    packed as a bijective base-27 number, so 0 means no suffix and up to six letters fit.
+    A missing Face is stored as index -1. Shape keys must be integers."""
+
+    MAGIC = b'PTNT'
+    VERSION = 2
+
+    HEADER = struct.Struct('<4sIIIIIIIII')
+    FACE = struct.Struct('<iiq?')
+    EDGE = struct.Struct('<iiq?iiiiiiii')
+    KEY = struct.Struct('<qI')
+    LINK = struct.Struct('<iiIii')
+
+    _maxSubLength = 6
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = struct.unpack_from('<4sI', self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.close()
+            msg = '{} is not a version {} naming table'.format(path, self.VERSION)
+            raise ValueError(msg)
+        header = self.HEADER.unpack_from(self._map, 0)
+        self.numbFaces, self.numbEdges = header[2:4]
+        nFaces, nEdges, nKeys, nEdgeLinks, nFaceLinks, nFaceMerges = header[4:]
+        self._nFaces = nFaces
+        self._nEdges = nEdges
+        self._nKeys = nKeys
+        self._faceOffset = self.HEADER.size
+        self._edgeOffset = self._faceOffset + nFaces * self.FACE.size
+        self._keyOffset = self._edgeOffset + nEdges * self.EDGE.size
+        # section -> (offset, number of records) of the LINK sections
+        offset = self._keyOffset + nKeys * self.KEY.size
+        self._links = {}
+        for section, count in [('edgeLinks', nEdgeLinks), ('faceLinks', nFaceLinks),
+                               ('faceMerges', nFaceMerges)]:
+            self._links[section] = (offset, count)
+            offset += count * self.LINK.size
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    @classmethod
+    def _packId(cls, nameId):
+        if nameId is None:
+            return (-1, 0)
+        if len(nameId) - 1 > cls._maxSubLength:
+            msg = 'Sub-names longer than {} letters can not be stored'
+            raise ValueError(msg.format(cls._maxSubLength))
+        sub = 0
+        for letter in nameId[1:]:
+            sub = sub * 27 + letter + 1
+        return (nameId[0], sub)
+
+    @staticmethod
+    def _unpackId(index, sub):
+        if index == -1:
+            return None
+        letters = []
+        while sub > 0:
+            sub, letter = divmod(sub - 1, 27)
+            letters.append(letter)
+        return (index,) + tuple(reversed(letters))
+
+    @classmethod
+    def write(cls, path, snapshot):
+        '''Write the snapshot returned by `TopoTracker.getSnapshot` to path'''
+        def packKey(key):
+            if key is None:
+                return (0, False)
+            if type(key) != type(0):
+                msg = 'A naming table can only store integer shape keys'
+                raise ValueError(msg)
+            return (key, True)
+
+        def packFaces(faceIds):
+            faceIds = [tuple(i) for i in faceIds] + [None] * (2 - len(faceIds))
+            return cls._packId(faceIds[0]) + cls._packId(faceIds[1])
+
+        def packLinks(pairs):
+            '''(child, parent) pairs -> LINK records, keeping the order of each parent's'''
+            orders = {}
+            links = []
+            for childId, parent in pairs:
+                parent = cls._packId(tuple(parent))
+                orders[parent] = orders.get(parent, -1) + 1
+                links.append(parent + (orders[parent],) + cls._packId(tuple(childId)))
+            return sorted(links)
+
+        faces = sorted(snapshot['faces'], key=lambda face: cls._packId(tuple(face[0])))
+        edges = sorted(snapshot['edges'], key=lambda edge: cls._packId(tuple(edge[0])))
+        keys = sorted([(edge[1], recordNumber) for recordNumber, edge in enumerate(edges)
+                       if not edge[1] is None])
+        # Snapshots taken before Faces and Edges had a lineage have none
+        lineage = snapshot.get('lineage', {})
+        edgeLinks = packLinks(lineage.get('parents', ()))
+        faceLinks = packLinks(lineage.get('faceParents', ()))
+        faceMerges = packLinks([(j, i) for i, j in lineage.get('faceMerges', ())])
+
+        with open(path, 'wb') as outFile:
+            outFile.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, snapshot['numbFaces'],
+                                          snapshot['numbEdges'], len(faces), len(edges),
+                                          len(keys), len(edgeLinks), len(faceLinks),
+                                          len(faceMerges)))
+            for faceId, key in faces:
+                record = cls._packId(tuple(faceId)) + packKey(key)
+                outFile.write(cls.FACE.pack(*record))
+            for edgeId, key, faceIds, lastValidFaceIds in edges:
+                record = (cls._packId(tuple(edgeId)) + packKey(key) + packFaces(faceIds) +
+                          packFaces(lastValidFaceIds))
+                outFile.write(cls.EDGE.pack(*record))
+            for key, recordNumber in keys:
+                outFile.write(cls.KEY.pack(key, recordNumber))
+            for link in edgeLinks + faceLinks + faceMerges:
+                outFile.write(cls.LINK.pack(*link))
+
+    def _bisect(self, offset, count, record, target):
+        '''Returns the first record number whose leading fields are >= target'''
+        low, high = 0, count
+        width = len(target)
+        while low < high:
+            middle = (low + high) // 2
+            if record.unpack_from(self._map, offset + middle * record.size)[:width] < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _edgeRecord(self, recordNumber):
+        fields = self.EDGE.unpack_from(self._map, self._edgeOffset + recordNumber * self.EDGE.size)
+        edgeId = self._unpackId(fields[0], fields[1])
+        key = fields[2] if fields[3] else None
+        faceIds = [self._unpackId(fields[i], fields[i + 1]) for i in (4, 6)]
+        lastValidFaceIds = [self._unpackId(fields[i], fields[i + 1]) for i in (8, 10)]
+        faceIds = [i for i in faceIds if not i is None]
+        lastValidFaceIds = [i for i in lastValidFaceIds if not i is None]
+        return edgeId, key, faceIds, lastValidFaceIds
+
+    def findEdge(self, edgeId):
+        '''Returns (edgeId, key, faceIds, lastValidFaceIds) for edgeId, or None'''
+        target = self._packId(edgeId)
+        recordNumber = self._bisect(self._edgeOffset, self._nEdges, self.EDGE, target)
+        if recordNumber < self._nEdges:
+            record = self._edgeRecord(recordNumber)
+            if record[0] == edgeId:
+                return record
+        return None
+
+    def findEdgesByKey(self, key):
+        '''Returns the edge records (see `findEdge`) of every Edge with the given key'''
+        records = []
+        recordNumber = self._bisect(self._keyOffset, len(self), self.KEY, (key,))
+        while recordNumber < len(self):
+            offset = self._keyOffset + recordNumber * self.KEY.size
+            recordKey, edgeNumber = self.KEY.unpack_from(self._map, offset)
+            if recordKey != key:
+                break
+            records.append(self._edgeRecord(edgeNumber))
+            recordNumber += 1
+        return records
+
+    def findFace(self, faceId):
+        '''Returns (faceId, key) for faceId, or None. key is None for deleted Faces'''
+        target = self._packId(faceId)
+        recordNumber = self._bisect(self._faceOffset, self._nFaces, self.FACE, target)
+        if recordNumber < self._nFaces:
+            offset = self._faceOffset + recordNumber * self.FACE.size
+            index, sub, key, hasKey = self.FACE.unpack_from(self._map, offset)
+            if (index, sub) == target:
+                return (faceId, key if hasKey else None)
+        return None
+
+    def _findLinks(self, section, nameId):
+        '''Returns the ids linked to nameId in section, see the class docstring, in order'''
+        offset, count = self._links[section]
+        target = self._packId(nameId)
+        recordNumber = self._bisect(offset, count, self.LINK, target)
+        linked = []
+        while recordNumber < count:
+            record = self.LINK.unpack_from(self._map, offset + recordNumber * self.LINK.size)
+            if record[:2] != target:
+                break
+            linked.append(self._unpackId(record[3], record[4]))
+            recordNumber += 1
+        return linked
+
+    def findEdgeChildren(self, edgeId):
+        '''Returns the ids of the children of the Edge edgeId, oldest first'''
+        return self._findLinks('edgeLinks', edgeId)
+
+    def findFaceChildren(self, faceId):
+        '''Returns the ids of the Faces split off the Face faceId, oldest first'''
+        return self._findLinks('faceLinks', faceId)
+
+    def findFaceMerge(self, faceId):
+        '''Returns the id of the Face that the Face faceId was merged into, or None'''
+        merged = self._findLinks('faceMerges', faceId)
+        if len(merged) == 0:
+            return None
+        return merged[0]
+
+    def __len__(self):
+        '''The number of keyed Edges'''
+        return self._nKeys
@@ -0,0 +1,238 @@
+class _Node(object):
+    '''A node of the trie. entries holds, in bit order, either (hash, key, value) leaves
+    or child nodes. owner is the map that may change the node in place.'''
+
+    __slots__ = ('bitmap', 'entries', 'owner')
+
+    def __init__(self, bitmap, entries, owner):
+        self.bitmap = bitmap
+        self.entries = entries
+        self.owner = owner
+
+class _Collision(object):
+    '''Holds the (hash, key, value) leaves of keys whose hashes are fully equal'''
+
+    __slots__ = ('entries', 'owner')
+
+    def __init__(self, entries, owner):
+        self.entries = entries
+        self.owner = owner
+
+_bits = 5
+_mask = (1 << _bits) - 1
+_maxShift = 64
+
+def _popCount(value):
+    return bin(value).count('1')
+
+def _hash(key):
+    return hash(key) & 0xFFFFFFFFFFFFFFFF
+
+class PersistentMap(object):
+
+    """A dict-like map whose copies share their structure.
+
+    The map is a hash array mapped trie: 32-way nodes indexed by 5 bits of the key's hash
+    at a time. `copy` is O(1), it just hands out the same root. Afterwards a write only
+    copies the nodes on the path to the changed key (a handful for any realistic size),
+    so a copy costs memory in proportion to how much it is changed rather than to its size.
+
+    Every node remembers the map that created it. A map changes its own nodes in place
+    and copies everybody else's, so a batch of writes to the same map is cheap too.
+
+    Only the dict methods that `TopoTracker` needs are provided. Iteration order is the
+    hash order of the keys, not the insertion order."""
+
+    __slots__ = ('_root', '_size', '_owner')
+
+    def __init__(self, items=None):
+        self._owner = object()
+        self._root = _Node(0, [], self._owner)
+        self._size = 0
+        if not items is None:
+            for key, value in items:
+                self[key] = value
+
+    def copy(self):
+        '''Returns a copy that shares every node with this map. This is O(1).'''
+        other = PersistentMap()
+        other._root = self._root
+        other._size = self._size
+        # Neither map may change the shared nodes in place any more
+        self._owner = object()
+        return other
+
+    def __len__(self):
+        return self._size
+
+    def _find(self, key):
+        '''Returns the (hash, key, value) leaf of key, or None'''
+        keyHash = _hash(key)
+        node = self._root
+        shift = 0
+        while True:
+            if type(node) is _Collision:
+                for leaf in node.entries:
+                    if leaf[1] == key:
+                        return leaf
+                return None
+            bit = 1 << ((keyHash >> shift) & _mask)
+            if not node.bitmap & bit:
+                return None
+            entry = node.entries[_popCount(node.bitmap & (bit - 1))]
+            if type(entry) is tuple:
+                if entry[0] == keyHash and entry[1] == key:
+                    return entry
+                return None
+            node = entry
+            shift += _bits
+
+    def get(self, key, default=None):
+        leaf = self._find(key)
+        if leaf is None:
+            return default
+        return leaf[2]
+
+    def __getitem__(self, key):
+        leaf = self._find(key)
+        if leaf is None:
+            raise KeyError(key)
+        return leaf[2]
+
+    def __contains__(self, key):
+        return not self._find(key) is None
+
+    def _editable(self, node):
+        '''Returns node itself if this map owns it, otherwise a copy that it owns'''
+        if node.owner is self._owner:
+            return node
+        if type(node) is _Collision:
+            return _Collision(node.entries[:], self._owner)
+        return _Node(node.bitmap, node.entries[:], self._owner)
+
+    def _merge(self, leaf0, leaf1, shift):
+        '''Returns a node holding two leaves with different keys'''
+        if shift >= _maxShift:
+            return _Collision([leaf0, leaf1], self._owner)
+        index0 = (leaf0[0] >> shift) & _mask
+        index1 = (leaf1[0] >> shift) & _mask
+        if index0 == index1:
+            child = self._merge(leaf0, leaf1, shift + _bits)
+            return _Node(1 << index0, [child], self._owner)
+        entries = [leaf0, leaf1] if index0 < index1 else [leaf1, leaf0]
+        return _Node((1 << index0) | (1 << index1), entries, self._owner)
+
+    def _set(self, node, leaf, shift):
+        '''Returns node, or an owned copy of it, with leaf stored in it. Counts new keys.'''
+        node = self._editable(node)
+        if type(node) is _Collision:
+            for i, entry in enumerate(node.entries):
+                if entry[1] == leaf[1]:
+                    node.entries[i] = leaf
+                    return node
+            node.entries.append(leaf)
+            self._size += 1
+            return node
+
+        bit = 1 << ((leaf[0] >> shift) & _mask)
+        index = _popCount(node.bitmap & (bit - 1))
+        if not node.bitmap & bit:
+            node.entries.insert(index, leaf)
+            node.bitmap |= bit
+            self._size += 1
+            return node
+        entry = node.entries[index]
+        if type(entry) is tuple:
+            if entry[0] == leaf[0] and entry[1] == leaf[1]:
+                node.entries[index] = leaf
+            else:
+                node.entries[index] = self._merge(entry, leaf, shift + _bits)
+                self._size += 1
+        else:
+            node.entries[index] = self._set(entry, leaf, shift + _bits)
+        return node
+
+    def __setitem__(self, key, value):
+        self._root = self._set(self._root, (_hash(key), key, value), 0)
+
+    def _delete(self, node, keyHash, key, shift):
+        '''Returns node, or an owned copy of it, without key. None if it ends up empty.'''
+        if type(node) is _Collision:
+            for i, entry in enumerate(node.entries):
+                if entry[1] == key:
+                    node = self._editable(node)
+                    node.entries.pop(i)
+                    self._size -= 1
+                    return node if node.entries else None
+            raise KeyError(key)
+
+        bit = 1 << ((keyHash >> shift) & _mask)
+        if not node.bitmap & bit:
+            raise KeyError(key)
+        index = _popCount(node.bitmap & (bit - 1))
+        entry = node.entries[index]
+        if type(entry) is tuple:
+            if entry[1] != key:
+                raise KeyError(key)
+            child = None
+            self._size -= 1
+        else:
+            child = self._delete(entry, keyHash, key, shift + _bits)
+        node = self._editable(node)
+        if child is None:
+            node.entries.pop(index)
+            node.bitmap &= ~bit
+            if not node.entries:
+                return None
+        else:
+            node.entries[index] = child
+        return node
+
+    def __delitem__(self, key):
+        root = self._delete(self._root, _hash(key), key, 0)
+        if root is None:
+            root = _Node(0, [], self._owner)
+        self._root = root
+
+    def pop(self, key, *default):
+        leaf = self._find(key)
+        if leaf is None:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        del self[key]
+        return leaf[2]
+
+    def _leaves(self):
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for entry in reversed(node.entries):
+                if type(entry) is tuple:
+                    yield entry
+                else:
+                    stack.append(entry)
+
+    def __iter__(self):
+        for leaf in self._leaves():
+            yield leaf[1]
+
+    def keys(self):
+        return [leaf[1] for leaf in self._leaves()]
+
+    def values(self):
+        return [leaf[2] for leaf in self._leaves()]
+
+    def items(self):
+        return [(leaf[1], leaf[2]) for leaf in self._leaves()]
+
+    def __eq__(self, other):
+        if isinstance(other, PersistentMap):
+            other = dict(other.items())
+        return dict(self.items()) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'PersistentMap({!r})'.format(dict(self.items()))
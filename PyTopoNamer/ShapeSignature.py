@@ -0,0 +1,91 @@
+class ShapeSignature(object):
+
+    """A few numbers that describe an OCC shape without holding on to it.
+
+    A tracker keeps one of these once it releases a superseded OCC object, so that the
+    Face or Edge can still be described (and roughly re-matched) after its B-rep data has
+    been freed. `FaceMatcher` compares them to match Faces without a history.
+
+    It holds the shape key and, if the shape provides them, its Length, Area,
+    CenterOfMass, the type of its Surface and, for a Face, its normal in the middle of its
+    parameter range. Shapes that lack a measure, e.g. Edges or the fakes used by the tests,
+    simply store None for it. Building a signature never raises."""
+
+    __slots__ = ('_key', '_length', '_area', '_center', '_surface', '_normal')
+
+    def __init__(self, key, length=None, area=None, center=None, surface=None, normal=None):
+        self._key = key
+        self._length = length
+        self._area = area
+        self._center = center
+        self._surface = surface
+        self._normal = normal
+
+    @classmethod
+    def fromShape(cls, occShape, shapeKey):
+        '''Returns the signature of occShape. shapeKey is the tracker's shape key function.'''
+        center = getattr(occShape, 'CenterOfMass', None)
+        if not center is None:
+            center = (center.x, center.y, center.z)
+        surface = getattr(occShape, 'Surface', None)
+        if not surface is None:
+            surface = type(surface).__name__
+        normal = cls._normalOf(occShape)
+        return cls(shapeKey(occShape), getattr(occShape, 'Length', None),
+                   getattr(occShape, 'Area', None), center, surface, normal)
+
+    @staticmethod
+    def _normalOf(occShape):
+        '''The normal of a Face in the middle of its parameter range, or None.
+
+        Only a Face has a (u, v) parameter range. An Edge's has two values, and normalAt
+        raises where there is no normal, e.g. on a straight line, so neither has one.'''
+        parameterRange = getattr(occShape, 'ParameterRange', None)
+        if not hasattr(occShape, 'normalAt') or parameterRange is None:
+            return None
+        if len(parameterRange) != 4:
+            return None
+        uMin, uMax, vMin, vMax = parameterRange
+        try:
+            vector = occShape.normalAt((uMin + uMax) / 2.0, (vMin + vMax) / 2.0)
+        except Exception:
+            return None
+        return (vector.x, vector.y, vector.z)
+
+    def getKey(self):
+        return self._key
+
+    def getLength(self):
+        return self._length
+
+    def getArea(self):
+        return self._area
+
+    def getCenter(self):
+        return self._center
+
+    def getSurface(self):
+        '''Returns the type name of the Surface, e.g. 'Plane', or None'''
+        return self._surface
+
+    def getNormal(self):
+        return self._normal
+
+    def isClose(self, other, tolerance=1e-7):
+        '''True if every measure known to both signatures agrees within tolerance'''
+        if not (self._surface is None or other._surface is None or
+                self._surface == other._surface):
+            return False
+        pairs = [(self._length, other._length), (self._area, other._area)]
+        for mine, theirs in [(self._center, other._center), (self._normal, other._normal)]:
+            if not (mine is None or theirs is None):
+                pairs.extend(zip(mine, theirs))
+        for mine, theirs in pairs:
+            if not (mine is None or theirs is None) and abs(mine - theirs) > tolerance:
+                return False
+        return True
+
+    def __repr__(self):
+        return ('ShapeSignature(key={!r}, length={!r}, area={!r}, center={!r}, surface={!r}, '
+                'normal={!r})').format(self._key, self._length, self._area, self._center,
+                                       self._surface, self._normal)
@@ -0,0 +1,136 @@
+import math
+
+class SpatialIndex(object):
+
+    """A grid hash over axis-aligned bounding boxes, to find what lies near some geometry.
+
+    A box is (XMin, YMin, ZMin, XMax, YMax, ZMax). Space is cut into cubic cells and every
+    box is stored in each cell it overlaps, so a query only looks at the boxes in the
+    cells it overlaps itself: the cost grows with the number of boxes nearby rather than
+    with the number of boxes in the index.
+
+    Unless a cellSize is given it adapts to the boxes: the cell size is the mean extent of
+    the boxes, and the grid is rebuilt each time the number of boxes doubles. Boxes that
+    would cover more than MAX_CELLS cells, and every box while the index is still small,
+    are kept in a short list that each query scans."""
+
+    # A box that would cover more cells than this is not stored in the grid
+    MAX_CELLS = 64
+
+    # The grid is only built once the index holds this many boxes
+    MIN_GRID_SIZE = 16
+
+    def __init__(self, cellSize=None):
+        self._cellSize = cellSize
+        self._adaptive = cellSize is None
+        self._rebuildAt = self.MIN_GRID_SIZE
+        # key -> box
+        self._boxes = {}
+        # cell -> set of the keys whose box overlaps it
+        self._cells = {}
+        # the keys that are not stored in the grid
+        self._large = set()
+
+    @staticmethod
+    def boxOf(occShape):
+        '''Returns the bounding box of occShape as a tuple, or None if it has none'''
+        box = getattr(occShape, 'BoundBox', None)
+        if box is None:
+            return None
+        return (box.XMin, box.YMin, box.ZMin, box.XMax, box.YMax, box.ZMax)
+
+    def getCellSize(self):
+        return self._cellSize
+
+    def _cellRanges(self, box):
+        '''Returns the range of cells that box overlaps along each axis, or None if too many'''
+        size = self._cellSize
+        ranges = [range(int(math.floor(box[i] / size)), int(math.floor(box[i + 3] / size)) + 1)
+                  for i in range(3)]
+        if len(ranges[0]) * len(ranges[1]) * len(ranges[2]) > self.MAX_CELLS:
+            return None
+        return ranges
+
+    def _cellsOf(self, box):
+        ranges = self._cellRanges(box)
+        if ranges is None:
+            return None
+        return [(x, y, z) for x in ranges[0] for y in ranges[1] for z in ranges[2]]
+
+    def _place(self, key, box):
+        cells = None
+        if not self._cellSize is None:
+            cells = self._cellsOf(box)
+        if cells is None:
+            self._large.add(key)
+            return
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(key)
+
+    def _rebuild(self):
+        '''Picks the cell size from the current boxes and places all of them again'''
+        extents = [max([box[i + 3] - box[i] for i in range(3)]) for box in self._boxes.values()]
+        self._cellSize = sum(extents) / len(extents)
+        if self._cellSize <= 0:
+            self._cellSize = 1.0
+        self._cells = {}
+        self._large = set()
+        for key, box in self._boxes.items():
+            self._place(key, box)
+        self._rebuildAt = 2 * len(self._boxes)
+
+    def insert(self, key, box):
+        '''Stores box under key, replacing the box key had before'''
+        if key in self._boxes:
+            self.remove(key)
+        self._boxes[key] = tuple(box)
+        if self._adaptive and len(self._boxes) >= self._rebuildAt:
+            self._rebuild()
+        else:
+            self._place(key, box)
+
+    def remove(self, key):
+        '''Forgets the box of key, if there is one'''
+        box = self._boxes.pop(key, None)
+        if box is None:
+            return
+        if key in self._large:
+            self._large.discard(key)
+            return
+        for cell in self._cellsOf(box):
+            bucket = self._cells[cell]
+            bucket.discard(key)
+            if len(bucket) == 0:
+                del self._cells[cell]
+
+    def getBox(self, key):
+        return self._boxes.get(key)
+
+    def find(self, box, tolerance=0.0):
+        '''Returns the sorted keys whose box overlaps box grown by tolerance on every side'''
+        query = tuple([box[i] - tolerance for i in range(3)] +
+                      [box[i] + tolerance for i in range(3, 6)])
+        ranges = None
+        if not self._cellSize is None:
+            ranges = self._cellRanges(query)
+        if ranges is None:
+            candidates = self._boxes.keys()
+        else:
+            candidates = set(self._large)
+            for x in ranges[0]:
+                for y in ranges[1]:
+                    for z in ranges[2]:
+                        candidates.update(self._cells.get((x, y, z), ()))
+
+        found = []
+        for key in candidates:
+            other = self._boxes[key]
+            if all([other[i] <= query[i + 3] and query[i] <= other[i + 3] for i in range(3)]):
+                found.append(key)
+        return sorted(found)
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def __contains__(self, key):
+        return key in self._boxes
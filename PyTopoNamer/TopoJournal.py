@@ -0,0 +1,175 @@
+import json
+import os
+from PyTopoNamer.TopoTracker import TopoTracker, hashCodeKey
+
+class TopoJournal(object):
+
+    """An append-only journal of every change made to a `TopoTracker`.
+
+    Attach it with `TopoTracker.setJournal`. From then on every batch of changes (a single
+    addFace, modifyFace or deleteFace is a batch of one, a `TopoNamer.modifyShape` is one
+    batch) is appended to the file as one line. Only shape keys and Face ids are written,
+    never geometry:
+        ["b", new, modified, deleted] or ["b", new, modified, deleted, lineage]
+            new:      [[faceKey, [edgeKey, ...]], ...]
+            modified: [[faceId, faceKey, [edgeKey, ...]], ...]
+            deleted:  [faceId, ...]
+            lineage:  [[[faceId, parentId], ...], [[faceId, mergedIntoId], ...]], only
+                      written if a Face was split off or merged into another one
+        ["s", snapshot]
+            a `TopoTracker.getSnapshot` that replaces everything before it
+
+    Once more than `threshold` batches have been written, the journal is compacted: the
+    file is replaced by a single snapshot of the tracker. Saving therefore only costs the
+    recent changes, and `replay` only has to apply the batches since the last snapshot.
+
+    A torn last line, e.g. after a crash in the middle of a write, is ignored.
+
+    A journal that is opened with readOnly, e.g. only to `replay` it, never opens the file
+    for writing and leaves a torn last line in place. A journal is also a context manager
+    that closes itself."""
+
+    def __init__(self, path, threshold=1000, readOnly=False):
+        self._path = path
+        self._threshold = threshold
+        self._readOnly = readOnly
+        self._records = self._read()
+        self._batches = len([i for i in self._records if i[0] == 'b'])
+        self._file = None
+        if not readOnly:
+            self._file = open(path, 'a')
+
+    def close(self):
+        if not self._file is None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def _checkWritable(self):
+        if self._readOnly:
+            msg = 'The journal {} was opened read-only'.format(self._path)
+            raise ValueError(msg)
+        if self._file is None:
+            msg = 'The journal {} is closed'.format(self._path)
+            raise ValueError(msg)
+
+    def __len__(self):
+        '''The number of batches written since the last snapshot'''
+        return self._batches
+
+    def _read(self):
+        records = []
+        if not os.path.exists(self._path):
+            return records
+        with open(self._path) as inFile:
+            text = inFile.read()
+        lines = text.split('\n')
+        for i, line in enumerate(lines):
+            if line == '':
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                if i < len(lines) - 1:
+                    msg = 'The journal {} is corrupt at line {}'.format(self._path, i + 1)
+                    raise ValueError(msg)
+                if self._readOnly:
+                    return records
+                # A torn write: drop it so that the next record starts on a clean line
+                with open(self._path, 'r+') as outFile:
+                    outFile.truncate(len(text) - len(line))
+                return records
+        if text != '' and not text.endswith('\n') and not self._readOnly:
+            with open(self._path, 'a') as outFile:
+                outFile.write('\n')
+        return records
+
+    def _write(self, record):
+        self._checkWritable()
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+    def recordBatch(self, tracker, newFaces, modifiedFaces, deletedFaces, faceParents=(),
+                    faceMerges=()):
+        '''Append one applied batch. Called by the tracker, see `TopoTracker._applyChanges`
+
+        The shape keys are read from the `TrackedFace`s, which already cache their Edges.
+
+        :newFaces: the FaceIds of the new Faces
+        :modifiedFaces: the FaceIds of the modified Faces
+        :deletedFaces: a list of FaceIds
+        :faceParents: (FaceId, ParentId) pairs, see `TopoTracker._linkFaces`
+        :faceMerges: (FaceId, FaceId) pairs, see `TopoTracker._linkFaces`'''
+        shapeKey = tracker.getShapeKey()
+        def faceRecord(faceId):
+            faceTracker = tracker._faceTrackersById[faceId]
+            return [shapeKey(faceTracker.getOCCFace()), list(faceTracker.getEdgeKeys(shapeKey))]
+
+        record = ['b',
+                  [faceRecord(i) for i in newFaces],
+                  [[list(faceId)] + faceRecord(faceId) for faceId in modifiedFaces],
+                  [list(faceId) for faceId in deletedFaces]]
+        if len(faceParents) > 0 or len(faceMerges) > 0:
+            record.append([[[list(i), list(j)] for i, j in faceParents],
+                           [[list(i), list(j)] for i, j in faceMerges]])
+        self._write(record)
+        self._records.append(record)
+        self._batches += 1
+        if self._batches > self._threshold:
+            self.compact(tracker)
+
+    def compact(self, tracker):
+        '''Replace the whole journal with a single snapshot of tracker'''
+        self._checkWritable()
+        record = ['s', tracker.getSnapshot()]
+        self._file.close()
+        tmpPath = self._path + '.tmp'
+        with open(tmpPath, 'w') as outFile:
+            outFile.write(json.dumps(record, separators=(',', ':')) + '\n')
+        os.replace(tmpPath, self._path)
+        self._file = open(self._path, 'a')
+        self._records = [record]
+        self._batches = 0
+
+    def replay(self, makeFace, shapeKey=hashCodeKey):
+        '''Rebuild the tracker described by the journal, without any real geometry.
+
+        :makeFace: a callable (faceKey, edgeKeys) -> OCCFace that builds a stand-in Face
+                   whose shape keys are faceKey and edgeKeys.
+        :shapeKey: passed on to the new `TopoTracker`
+
+        returns the new tracker'''
+        tracker = TopoTracker(shapeKey)
+        for record in self._records:
+            if record[0] == 's':
+                tracker = self._restore(record[1], makeFace, shapeKey)
+                continue
+            new, modified, deleted = record[1:4]
+            liveFace = lambda faceId: tracker._faceTrackersById[tuple(faceId)].getOCCFace()
+            tracker._applyChanges(
+                newFaces=[makeFace(key, edgeKeys) for key, edgeKeys in new],
+                modifiedFaces=[(liveFace(faceId), makeFace(key, edgeKeys))
+                               for faceId, key, edgeKeys in modified],
+                deletedFaces=[liveFace(faceId) for faceId in deleted])
+            if len(record) > 4:
+                faceParents, faceMerges = record[4]
+                tracker._linkFaces([(tuple(i), tuple(j)) for i, j in faceParents],
+                                   [(tuple(i), tuple(j)) for i, j in faceMerges])
+        return tracker
+
+    def _restore(self, snapshot, makeFace, shapeKey):
+        '''Build the live Faces of a snapshot with makeFace and restore it'''
+        edgeKeys = {}
+        for edgeId, key, faceIds, lastValidFaceIds in snapshot['edges']:
+            for faceId in faceIds:
+                edgeKeys.setdefault(tuple(faceId), []).append(key)
+        OCCFaces = []
+        for faceId, key in snapshot['faces']:
+            if not key is None:
+                OCCFaces.append(makeFace(key, edgeKeys.get(tuple(faceId), [])))
+        return TopoTracker.fromSnapshot(snapshot, OCCFaces, shapeKey)
@@ -1,10 +1,43 @@
 from PyTopoNamer.TopoTracker import TopoTracker
+from PyTopoNamer.FaceMatcher import FaceMatcher
 class TopoNamer(object):
 
-    """This class manages the topological naming of an OCC Shape object"""
+    """This class manages the topological naming of an OCC Shape object
 
-    def __init__(self):
-        self._tracker = TopoTracker()
+    A versioned TopoNamer keeps every naming state it has been in, e.g. for undo and redo:
+    each `addShape` and `modifyShape` makes a new version, see `getVersion` and `checkout`.
+    The versions share everything that did not change, see `TopoTracker`.
+
+    deadRatio enables the automatic compaction of deleted Faces and Edges, see
+    `TopoTracker.compact`.
+
+    A lazy TopoNamer only creates the Edges that are asked for, see `TopoTracker`. Taking a
+    snapshot still creates all of them, and so does a journal each time it is compacted.
+
+    `setStats` enables counters and timings, see `TopoStats`."""
+
+    # The operations that are timed by `setStats`
+    _timedOperations = ('addShape', 'modifyShape', 'applyHistory', 'rematchShape',
+                        'getEdgeName', 'getEdgeByName', 'restoreSnapshot')
+
+    def __init__(self, versioned=False, deadRatio=None, lazy=False):
+        self._tracker = TopoTracker(versioned=versioned, deadRatio=deadRatio, lazy=lazy)
+        self._stats = None
+
+    def setStats(self, stats):
+        '''Record counters and timings in stats, a `TopoStats`, for this TopoNamer and its
+        tracker. None stops it. See `TopoTracker.setStats`.'''
+        for name in self._timedOperations:
+            self.__dict__.pop(name, None)
+        self._stats = stats
+        self._tracker.setStats(stats)
+        if stats is None:
+            return
+        for name in self._timedOperations:
+            setattr(self, name, stats.timed(name, getattr(self, name)))
+
+    def getStats(self):
+        return self._stats
 
     def getEdgeName(self, occEdge):
         '''Returns the EdgeName of the given OpenCascade Edge'''
@@ -14,33 +47,163 @@ class TopoNamer(object):
         '''Returns the OpenCascade Edge that is being tracked by the edgeName'''
         return self._tracker.getEdgeByName(edgeName)
 
+    def getRepresentatives(self, name):
+        '''Returns the current Face or EdgeNames that name stands for, however old it is'''
+        return self._tracker.getRepresentatives(name)
+
+    def getEdgeDescendants(self, edgeName):
+        '''Returns the EdgeNames that edgeName was split into or replaced by'''
+        return self._tracker.getEdgeDescendants(edgeName)
+
+    def getSnapshot(self):
+        '''Returns the naming state, see `TopoTracker.getSnapshot`'''
+        return self._tracker.getSnapshot()
+
+    def restoreSnapshot(self, snapshot, feature):
+        '''Replace the naming state with one saved by `getSnapshot`
+
+        :snapshot: the saved naming state
+        :feature: the FreeCAD PartFeature whose Shape is being tracked'''
+        self._tracker = TopoTracker.fromSnapshot(snapshot, feature.Shape.Faces,
+                                                 self._tracker.getShapeKey(),
+                                                 self._tracker.isVersioned(),
+                                                 self._tracker.getDeadRatio(),
+                                                 self._tracker.isLazy())
+        self._tracker.setStats(self._stats)
+
+    def getVersion(self):
+        '''Returns the current version of the naming state. Only for a versioned TopoNamer.'''
+        return self._tracker.getVersion()
+
+    def checkout(self, version):
+        '''Go back (or forward) to a version returned by `getVersion`.
+
+        This is O(1), unless a journal is attached: it is then compacted into a snapshot of
+        the new state, which is O(n) in the number of Faces and Edges. See
+        `TopoTracker.checkout`.'''
+        self._tracker.checkout(version)
+
+    def compact(self):
+        '''Drop the deleted Faces and Edges that can no longer be referenced'''
+        self._tracker.compact()
+
     def addShape(self, feature):
         """Track a created Shape's topology
 
         :feature: A FreeCAD PartFeature
         """
         shape = feature.Shape
-        for face in shape.Faces:
-            self._tracker.addFace(face)
+        self._tracker.addFaces(shape.Faces)
+
+    def applyHistory(self, history, oldFaces):
+        '''Modify a shape that is already being tracked, using the history of the operation
+
+        Every Face in oldFaces is classified in a single pass:
+            - if it was deleted, it is deleted
+            - the first Face it was modified into is its modification, any further ones
+              are new Faces
+            - every Face generated from it is a new Face
+        A resulting Face is only used once, the first time it is seen. If an old Face was
+        modified into a Face that has already been claimed, it was merged into that Face:
+        it is deleted, and its name resolves to that Face from then on. The new Faces it
+        was modified into were split off it. The result is passed on to `modifyShape`, see
+        `TopoTracker.getRepresentatives`.
+
+        :history: any object with `modified`, `generated` and `isDeleted` methods that take
+                  an OCCFace, e.g. an OpenCascade/FreeCAD shape history
+        :oldFaces: the tracked OCCFaces of the shape before the operation'''
+        newFaces = []
+        modifiedFaces = []
+        deletedFaces = []
+        splitFaces = []
+        mergedFaces = []
+
+        shapeKey = self._tracker.getShapeKey()
+        seenFaces = {}
+        def claim(face):
+            '''Returns True the first time a given face is seen'''
+            bucket = seenFaces.setdefault(shapeKey(face), [])
+            for seen in bucket:
+                if seen.isEqual(face):
+                    return False
+            bucket.append(face)
+            return True
+
+        for oldFace in oldFaces:
+            if history.isDeleted(oldFace):
+                deletedFaces.append(oldFace)
+                continue
+            modFaces = history.modified(oldFace)
+            for i, modFace in enumerate(modFaces):
+                if not claim(modFace):
+                    if i == 0:
+                        deletedFaces.append(oldFace)
+                        mergedFaces.append((oldFace, modFace))
+                elif i == 0:
+                    modifiedFaces.append((oldFace, modFace))
+                else:
+                    newFaces.append(modFace)
+                    splitFaces.append((oldFace, modFace))
+            for genFace in history.generated(oldFace):
+                if claim(genFace):
+                    newFaces.append(genFace)
+
+        self.modifyShape(newFaces, modifiedFaces, deletedFaces, splitFaces, mergedFaces)
 
-    def modifyShape(self, newFaces=None, modifiedFaces=None, deletedFaces=None):
+    def rematchShape(self, oldShape, newShape, matcher=None):
+        '''Modify a shape that is already being tracked, without the history of the operation
+
+        The Faces of newShape are matched to those of oldShape by their geometry, see
+        `FaceMatcher`, and the result is passed on to `modifyShape`. This is meant for a
+        recompute that provides no history, e.g. after changing the Height of a Cylinder
+        that is fused with a Box.
+
+        :oldShape: the tracked Shape before the operation, e.g. feature.Shape
+        :newShape: the Shape after the operation
+        :matcher: a `FaceMatcher`, to tune the matching
+
+        returns the (newFaces, modifiedFaces, deletedFaces) that were passed on'''
+        if matcher is None:
+            matcher = FaceMatcher(self._tracker.getShapeKey())
+        newFaces, modifiedFaces, deletedFaces = matcher.match(oldShape.Faces, newShape.Faces)
+        self.modifyShape(newFaces, modifiedFaces, deletedFaces)
+        return newFaces, modifiedFaces, deletedFaces
+
+    def modifyShape(self, newFaces=None, modifiedFaces=None, deletedFaces=None,
+                    splitFaces=None, mergedFaces=None):
         '''Modify a shape that is already being tracked
         
+        The changes are applied as a single transaction: either all of them are applied,
+        or a ValueError is raised and the tracked names are left untouched.
+
         :newFaces: a List of new OccFaces
         :modifiedFaces: A list of (oldOCCFac, newOCCFace) tuples
-        :deletedFaces: a list of deleted OCCFaces'''
+        :deletedFaces: a list of deleted OCCFaces
+        :splitFaces: a list of (oldOCCFace, newOCCFace) tuples: newOCCFace is one of
+                     newFaces, split off oldOCCFace
+        :mergedFaces: a list of (oldOCCFace, OCCFace) tuples: oldOCCFace is one of
+                      deletedFaces, merged into OCCFace'''
         if all([i is None for i in [newFaces, modifiedFaces, deletedFaces]]):
             msg = 'At least one of newFaces, modifiedFaces, or deletedFaces must be provided'
             raise ValueError(msg)
 
-        if not newFaces is None:
-            for face in newFaces:
-                self._tracker.addFace(face)
+        # The annotated Faces are looked up by identity, they are the same objects
+        parents = dict([(id(newFace), oldFace) for oldFace, newFace in splitFaces or ()])
+        mergedInto = dict([(id(oldFace), face) for oldFace, face in mergedFaces or ()])
+        if (len(parents) > len([i for i in newFaces or () if id(i) in parents]) or
+                len(mergedInto) > len([i for i in deletedFaces or () if id(i) in mergedInto])):
+            msg = 'Split Faces must be new Faces and merged Faces must be deleted Faces'
+            raise ValueError(msg)
+
+        with self._tracker.transaction() as transaction:
+            if not newFaces is None:
+                for face in newFaces:
+                    transaction.addFace(face, parents.get(id(face)))
 
-        if not modifiedFaces is None:
-            for oldFaceName, newFace in modifiedFaces:
-                self._tracker.modifyFace(oldFaceName, newFace)
+            if not modifiedFaces is None:
+                for oldFace, newFace in modifiedFaces:
+                    transaction.modifyFace(oldFace, newFace)
 
-        if not deletedFaces is None:
-            for face in deletedFaces:
-                self._tracker.deleteFace(face)
+            if not deletedFaces is None:
+                for face in deletedFaces:
+                    transaction.deleteFace(face, mergedInto.get(id(face)))
@@ -0,0 +1,101 @@
+import time
+
+class TopoStats(object):
+
+    """Counters and timings for a `TopoTracker` or `TopoNamer`, see their `setStats`.
+
+    Three things are recorded:
+        counts   the calls that cross into OpenCascade: 'isSame', 'isEqual' and 'Edges'
+                 (a traversal of a Face's Edges)
+        timings  the number of calls and the total wall time of every public operation.
+                 Nested operations are each timed, e.g. addFace includes addFaces.
+        lookups  the hits and misses of the 'edgeIndex' and 'faceIndex'
+
+    After every public operation each trace sink is called with a dict holding the
+    'operation', its wall time in 'seconds' and the 'counts' it caused. A sink can be any
+    callable, e.g. one that logs the operations that compare too many shapes. A batch
+    that is rejected while it is staged only counts the kernel calls of its index lookups.
+
+    Nothing is installed until the stats are enabled, so a tracker without stats only
+    pays for a few checks that its stats are None."""
+
+    def __init__(self):
+        self._sinks = []
+        self.reset()
+
+    def reset(self):
+        '''Forget everything recorded so far. The sinks are kept.'''
+        self._counts = {}
+        self._timings = {}
+        self._lookups = {}
+
+    def addSink(self, sink):
+        self._sinks.append(sink)
+
+    def removeSink(self, sink):
+        self._sinks.remove(sink)
+
+    def count(self, name, number=1):
+        self._counts[name] = self._counts.get(name, 0) + number
+
+    def lookup(self, index, hit):
+        '''Record one lookup in index, e.g. 'edgeIndex', that found a match or not'''
+        hits, misses = self._lookups.get(index, (0, 0))
+        if hit:
+            self._lookups[index] = (hits + 1, misses)
+        else:
+            self._lookups[index] = (hits, misses + 1)
+
+    def getCounts(self):
+        return dict(self._counts)
+
+    def getTimings(self):
+        '''Returns {operation: (calls, seconds)}'''
+        return dict(self._timings)
+
+    def getLookups(self):
+        '''Returns {index: (hits, misses)}'''
+        return dict(self._lookups)
+
+    def getHitRate(self, index):
+        '''Returns the share of lookups in index that found a match, or None if there were none'''
+        hits, misses = self._lookups.get(index, (0, 0))
+        if hits + misses == 0:
+            return None
+        return float(hits) / (hits + misses)
+
+    def timed(self, operation, function):
+        '''Returns function wrapped so that its calls are timed and traced as operation'''
+        def timedFunction(*args, **kwargs):
+            counts = dict(self._counts)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                calls, total = self._timings.get(operation, (0, 0.0))
+                self._timings[operation] = (calls + 1, total + seconds)
+                if len(self._sinks) > 0:
+                    delta = dict([(name, number - counts.get(name, 0))
+                                  for name, number in self._counts.items()
+                                  if number != counts.get(name, 0)])
+                    event = {'operation': operation, 'seconds': seconds, 'counts': delta}
+                    for sink in self._sinks:
+                        sink(event)
+        return timedFunction
+
+    def report(self):
+        '''Returns the recorded stats as text'''
+        lines = ['counts:']
+        for name in sorted(self._counts):
+            lines.append('    {:<22} {}'.format(name, self._counts[name]))
+        lines.append('timings:')
+        for operation in sorted(self._timings):
+            calls, seconds = self._timings[operation]
+            lines.append('    {:<22} {} calls, {:.6f}s'.format(operation, calls, seconds))
+        lines.append('lookups:')
+        for index in sorted(self._lookups):
+            hits, misses = self._lookups[index]
+            lines.append('    {:<22} {} hits, {} misses ({:.0%})'.format(
+                index, hits, misses, self.getHitRate(index)))
+        return '\n'.join(lines)
@@ -1,198 +1,1658 @@
+import functools
+from collections import Counter
 from PyTopoNamer.TrackedFace import TrackedFace
 from PyTopoNamer.TrackedEdge import TrackedEdge
+from PyTopoNamer.TopoTransaction import TopoTransaction
+from PyTopoNamer.NameFormatter import names, NameFormatter
+from PyTopoNamer.NamingTable import NamingTable
+from PyTopoNamer.PersistentMap import PersistentMap
+from PyTopoNamer.ShapeSignature import ShapeSignature
+from PyTopoNamer.EdgeFingerprints import EdgeFingerprints
+from PyTopoNamer.SpatialIndex import SpatialIndex
+
+def hashCodeKey(occShape):
+    '''The default shape key: OpenCascade's `hashCode`.
+
+    Two shapes that are `isSame` share the same TShape and Location, and therefore the same
+    `hashCode`. Shapes with different keys can never be `isSame`.'''
+    return occShape.hashCode()
 
 class TopoTracker(object):
     ''' Tracks the topological Faces and Edges of one solid.
-    
+
     This tracking is accomplished by utilizing the helper classes `TrackedFace` and
     `TrackedEdge`. This class keeps a list of `TrackedFace`s and `TrackedEdge`s. These are
     added primarily through the `addFace` method.
-    
+
     Any time a face is added, a new `TrackedFace` instance is created. Next, each edge in
     the recently added face is checked - if there are not currently ane `TrackedEdge`s
     that are topologically equivalent (using OCC's `isSame` method) to one of the new
     edges, a new `TrackedEdge` is created. Otherwise, the existing `TrackedEdge` is
-    updated with the current face, i.e. as a second face that shares the Edge.'''
-    def __init__(self):
-        self._edgeTrackers = []
-        self._faceTrackers = [] 
+    updated with the current face, i.e. as a second face that shares the Edge.
+
+    To avoid comparing every new edge against every tracked one, the `TrackedEdge`s are
+    bucketed by a shape key. `shapeKey` must be a callable that returns a hashable value
+    which is equal for any two shapes that are `isSame`. It defaults to OCC's `hashCode`.
+    `isSame` is then only used to break ties between edges that share a bucket. A bucket
+    with many Edges, e.g. because shapeKey is coarse or collides a lot, is first narrowed
+    down by `EdgeFingerprints` so that only a handful of them are compared with `isSame`.
+
+    `getFacesNear` and `getEdgesNear` find the tracked Faces and Edges by location rather
+    than by shape key, using a `SpatialIndex` of their bounding boxes.
+
+    Internally every Face and Edge is identified by an integer id rather than by its name
+    (see `NameFormatter`). Names are only parsed and formatted by the public methods.
+
+    The naming state can be saved with `getSnapshot` and restored with `fromSnapshot`.
+
+    Deleted Faces and Edges that no Face includes any more are tombstoned rather than
+    removed, since their names may still be referenced. `compact` drops them, either on
+    demand or automatically once the share of dead trackers passes deadRatio. The OCC
+    object of a deleted Face is released straight away though, see
+    `TrackedOCCObj.release`: only a weak reference and a `ShapeSignature` are kept. An Edge
+    without Faces keeps its OCCEdge until it is compacted, since an isSame Edge may still
+    come back, and whether it is matched must not depend on when the garbage collector
+    runs. A compacted Edge only keeps its signature. (Older versions of a versioned tracker
+    hold on to their OCC objects.)
+
+    A versioned tracker keeps every state it has been in, see `checkout`. Its maps are
+    `PersistentMap`s, and the indexes only hold ids, so that the trackers themselves are
+    only referenced by `_faceTrackersById` and `_edgeTrackersById`. Every applied batch of
+    changes becomes a new version that shares all the unchanged trackers and map nodes
+    with the previous one: a tracker is copied the first time a version changes it.
+
+    A lazy tracker does not create the `TrackedEdge`s of the Faces it adds. It only
+    records which Faces include each shape key, and reserves the name the Edge would have
+    been given. An Edge is materialized when it is first asked for, see `materializeEdges`,
+    so adding Faces is cheap and only the Edges that are actually referenced take memory.
+    `getEdgesNear` and `compact` only materialize the Edges they need, but `getSnapshot`,
+    and so `writeNamingTable` and an attached journal's compaction, materialize them all.
+    A lazy tracker can not be versioned.
+
+    `setStats` enables counters and timings, see `TopoStats`.'''
+
+    # Bump this whenever the layout returned by getSnapshot changes
+    SNAPSHOT_VERSION = 1
+
+    # The maps that make up the naming state. A version holds a copy of each of them.
+    _stateMaps = ('_edgeIndex', '_faceIndex', '_faceTrackersById', '_edgeTrackersById',
+                  '_edgesByFace', '_edgesByFacePair', '_deadFaces', '_deadEdges',
+                  '_edgeTombstones', '_edgeChildren', '_lastSubIds',
+                  '_faceChildren', '_faceForward')
+
+    # Buckets of the edge index with at least this many Edges are filtered by fingerprint
+    _fingerprintThreshold = 8
+
+    # The operations that are timed by `setStats`
+    _timedOperations = ('addFace', 'addFaces', 'modifyFace', 'deleteFace', 'getEdgeName',
+                        'getEdgeNameFromFaces', 'getEdgeByName', 'getEdgeDescendants',
+                        'getRepresentatives', 'getSnapshot', 'compact', 'materializeEdges',
+                        'checkout', '_applyChanges')
+
+    def __init__(self, shapeKey=hashCodeKey, versioned=False, deadRatio=None, lazy=False):
+        if versioned and lazy:
+            msg = 'A TopoTracker can not be both versioned and lazy'
+            raise ValueError(msg)
+        self._shapeKey = shapeKey
+        self._versioned = versioned
+        self._deadRatio = deadRatio
+        self._lazy = lazy
+        newMap = PersistentMap if versioned else dict
+        # shapeKey -> tuple of the ids of the Edges whose OCCEdge has that key
+        self._edgeIndex = newMap()
+        # shapeKey -> tuple of the ids of the Faces whose current OCCFace has that key
+        self._faceIndex = newMap()
+        # id -> tracker
+        self._faceTrackersById = newMap()
+        self._edgeTrackersById = newMap()
+        # FaceId -> tuple of the ids of the Edges that currently include that Face
+        self._edgesByFace = newMap()
+        # (FaceId, FaceId) -> tuple of the ids of the valid Edges shared by exactly those
+        # Faces, sorted, so that a restored tracker has them in the same order
+        self._edgesByFacePair = newMap()
+        # id -> True, for the deleted Faces and the Edges without Faces, see `compact`
+        self._deadFaces = newMap()
+        self._deadEdges = newMap()
+        # FaceId -> tuple of the ids of the compacted Edges whose last valid Faces include it
+        self._edgeTombstones = newMap()
+        # The lineage of split Edges, see `getEdgeDescendants`. The parent of an Edge is
+        # stored in its `TrackedEdge`.
+        # EdgeId -> tuple of the ids of its children, oldest first
+        self._edgeChildren = newMap()
+        # index -> the last sub-id handed out for that index, see `_makeSubId`
+        self._lastSubIds = newMap()
+        # The lineage of Faces, see `getRepresentatives`. The parent of a Face is stored in
+        # its `TrackedFace`. Both maps outlive the Faces, so that old names still resolve.
+        # FaceId -> tuple of the ids of the Faces split off it
+        self._faceChildren = newMap()
+        # FaceId of a Face merged into another one -> the id of that Face, see `_findFace`
+        self._faceForward = newMap()
+
+        # Caches for `_edgeCandidates`, which are not part of the naming state:
+        # EdgeId -> fingerprint, and shapeKey -> the `EdgeFingerprints` of its bucket
+        self._edgeFingerprints = {}
+        self._bucketFingerprints = {}
+        # A cache for `_edgeFrontier`, which is not part of the naming state either:
+        # EdgeId of an Edge without Faces -> the ids of its nearest descendants with Faces
+        self._edgeForward = {}
+        # The Edges of a lazy tracker that are not materialized yet, see `materializeEdges`:
+        # shapeKey -> (the EdgeId reserved for it or None, the FaceIds that include it)
+        self._lazyEdges = {}
+        # reserved EdgeId -> its shapeKey
+        self._lazyKeys = {}
+        # The `SpatialIndex`es of the Faces and Edges. They are built by the first query and
+        # kept up to date from then on, see `_spaces`.
+        self._faceSpace = None
+        self._edgeSpace = None
+
+        # Every applied batch of changes is recorded here, see `setJournal`
+        self._journal = None
+
+        # The `TopoStats` that record what this tracker does, see `setStats`
+        self._stats = None
+
+        # version -> {(base, id): the ids of its representatives}, see `getRepresentatives`
+        self._representatives = {}
 
         # This will be the basis for face and edge numbering. Sub-faces and sub-edges will
         # not add to this value.
         self._numbFaces = 0
         self._numbEdges = 0
 
-    def _isTrackedEdge(self, OCCEdge):
+        # version -> the saved state, see `checkout`
+        self._versions = {}
+        self._version = None
+        self._nextVersion = 0
+        # The ids of the trackers that the current version may change in place
+        self._ownedFaces = set()
+        self._ownedEdges = set()
+        if versioned:
+            self._saveVersion()
+
+    @property
+    def _faceTrackers(self):
+        '''Every `TrackedFace`, in the order they were created'''
+        return sorted(self._faceTrackersById.values(), key=TrackedFace.getId)
+
+    @property
+    def _edgeTrackers(self):
+        '''Every `TrackedEdge`, in the order they were created'''
+        return sorted(self._edgeTrackersById.values(), key=TrackedEdge.getId)
+
+    def getShapeKey(self):
+        '''Returns the shape key function used to index the OCC objects'''
+        return self._shapeKey
+
+    def setJournal(self, journal):
+        '''Record every change from now on in journal, e.g. a `TopoJournal`. None stops it.'''
+        self._journal = journal
+
+    def setStats(self, stats):
+        '''Record counters and timings in stats, a `TopoStats`. None stops it.
+
+        The public operations are timed by wrappers that are set on this instance. The
+        kernel calls and index lookups are counted by passing stats to the index lookups,
+        see `_isTrackedEdge`. Without stats nothing is installed.'''
+        for name in self._timedOperations + ('_isTrackedEdge', '_findFaceTracker'):
+            self.__dict__.pop(name, None)
+        self._stats = stats
+        if stats is None:
+            return
+        self._isTrackedEdge = functools.partial(self._isTrackedEdge, stats=stats)
+        self._findFaceTracker = functools.partial(self._findFaceTracker, stats=stats)
+        for name in self._timedOperations:
+            setattr(self, name, stats.timed(name.lstrip('_'), getattr(self, name)))
+
+    def getStats(self):
+        return self._stats
+
+    def isVersioned(self):
+        return self._versioned
+
+    def getDeadRatio(self):
+        '''Returns the share of dead trackers past which `compact` runs by itself, or None'''
+        return self._deadRatio
+
+    def isLazy(self):
+        return self._lazy
+
+    def _checkVersioned(self):
+        if not self._versioned:
+            msg = 'This TopoTracker is not versioned'
+            raise ValueError(msg)
+
+    def _saveVersion(self):
+        '''Saves the current state as a new version and makes it the current one.
+
+        This only copies the maps, which is O(1) for a `PersistentMap`. From now on the
+        trackers are shared with the saved version, so none of them may be changed in
+        place, see `_ownEdge`.'''
+        state = ([getattr(self, name).copy() for name in self._stateMaps],
+                 self._numbFaces, self._numbEdges)
+        self._version = self._nextVersion
+        self._nextVersion += 1
+        self._versions[self._version] = state
+        self._ownedFaces = set()
+        self._ownedEdges = set()
+
+    def getVersion(self):
+        '''Returns the current version. Each applied batch of changes makes a new one.'''
+        self._checkVersioned()
+        return self._version
+
+    def getVersions(self):
+        '''Returns every version that can be checked out, oldest first'''
+        self._checkVersioned()
+        return sorted(self._versions)
+
+    def checkout(self, version):
+        '''Go back (or forward) to version, e.g. to undo or redo a `modifyShape`.
+
+        This is O(1): the saved maps are shared, not copied. Any later changes start a new
+        version, the versions after this one are kept and can still be checked out.
+        If a journal is attached it is compacted, so that it matches the new state. That
+        writes a snapshot, which makes the checkout O(n) in the number of Faces and Edges.'''
+        self._checkVersioned()
+        if not version in self._versions:
+            msg = '{} is not a saved version'.format(version)
+            raise ValueError(msg)
+        maps, self._numbFaces, self._numbEdges = self._versions[version]
+        for name, savedMap in zip(self._stateMaps, maps):
+            setattr(self, name, savedMap.copy())
+        self._version = version
+        self._ownedFaces = set()
+        self._ownedEdges = set()
+        self._faceSpace = None
+        self._edgeSpace = None
+        # Ids are handed out again after a checkout, to other Edges than the cached ones
+        self._edgeFingerprints = {}
+        self._bucketFingerprints = {}
+        self._edgeForward = {}
+        if not self._journal is None:
+            self._journal.compact(self)
+
+    def dropVersion(self, version):
+        '''Forget version, e.g. when it falls off the bottom of an undo stack.
+
+        Only what no other version shares is actually freed.'''
+        self._checkVersioned()
+        if not version in self._versions:
+            msg = '{} is not a saved version'.format(version)
+            raise ValueError(msg)
+        del self._versions[version]
+        self._representatives.pop(version, None)
+
+    def _ownFace(self, faceId):
+        '''Returns the `TrackedFace` faceId, ready to be changed.
+
+        In a versioned tracker it is first copied, unless the current version already did.'''
+        faceTracker = self._faceTrackersById[faceId]
+        if self._versioned and not faceId in self._ownedFaces:
+            faceTracker = faceTracker.clone()
+            self._faceTrackersById[faceId] = faceTracker
+            self._ownedFaces.add(faceId)
+        return faceTracker
+
+    def _ownEdge(self, edgeId):
+        '''Returns the `TrackedEdge` edgeId, ready to be changed. See `_ownFace`.'''
+        edgeTracker = self._edgeTrackersById[edgeId]
+        if self._versioned and not edgeId in self._ownedEdges:
+            edgeTracker = edgeTracker.clone()
+            self._edgeTrackersById[edgeId] = edgeTracker
+            self._ownedEdges.add(edgeId)
+        return edgeTracker
+
+    def _addToBucket(self, index, key, value):
+        '''Appends value to the tuple stored under key in index'''
+        index[key] = index.get(key, ()) + (value,)
+
+    def _removeFromBucket(self, index, key, value):
+        '''Removes value from the tuple stored under key in index, if it is there'''
+        bucket = index.get(key, ())
+        if value in bucket:
+            bucket = tuple([i for i in bucket if i != value])
+            if len(bucket) == 0:
+                del index[key]
+            else:
+                index[key] = bucket
+
+    def _isTrackedEdge(self, OCCEdge, key=None, stats=None):
         '''Checks if OCCEdge is already being tracked.
-        
-        If it is, returns the index of the appropriate tracker in self._edgeTrackers.
-        Otherwise, returns None.'''
-        for i, edgeTracker in enumerate(self._edgeTrackers):
-            trackedOCCEdge = edgeTracker.getOCCEdge()
-            if trackedOCCEdge.isSame(OCCEdge):
-                return i
+
+        If it is, returns the appropriate `TrackedEdge`. Otherwise, returns None. key is the
+        shape key of OCCEdge, if the caller already has it. stats, if given, counts the
+        isSame calls and whether the edge index had a match, see `setStats`.
+
+        An Edge that `fromSnapshot` restored without an OCCEdge can only be matched by its
+        key. It is returned if no Edge with an OCCEdge isSame to OCCEdge.'''
+        if key is None:
+            key = self._shapeKey(OCCEdge)
+        keyOnly = None
+        for edgeId in self._edgeCandidates(OCCEdge, key):
+            edgeTracker = self._edgeTrackersById[edgeId]
+            trackedEdge = edgeTracker.getOCCEdge()
+            if trackedEdge is None:
+                if keyOnly is None:
+                    keyOnly = edgeTracker
+                continue
+            if not stats is None:
+                stats.count('isSame')
+            if trackedEdge.isSame(OCCEdge):
+                if not stats is None:
+                    stats.lookup('edgeIndex', True)
+                return edgeTracker
+        if not stats is None:
+            stats.lookup('edgeIndex', not keyOnly is None)
+        return keyOnly
+
+    def _edgeCandidates(self, OCCEdge, key):
+        '''Returns the ids of the Edges that may be isSame to OCCEdge, whose shape key is key
+
+        That is the bucket of key in the edge index. A big one is narrowed down to the
+        Edges whose fingerprint matches. Its table of fingerprints is cached for as long as
+        the bucket does not change, and extended when Edges are only appended to it.'''
+        bucket = self._edgeIndex.get(key, ())
+        if len(bucket) < self._fingerprintThreshold:
+            return bucket
+        fingerprint = EdgeFingerprints.fingerprint(OCCEdge)
+        if fingerprint is None:
+            return bucket
+
+        table = self._bucketFingerprints.get(key)
+        if table is None or not bucket[:len(table)] == table.getIds():
+            table = EdgeFingerprints(bucket, [self._edgeFingerprint(i) for i in bucket])
+            self._bucketFingerprints[key] = table
+        elif len(table) < len(bucket):
+            added = bucket[len(table):]
+            table = table.extend(added, [self._edgeFingerprint(i) for i in added])
+            self._bucketFingerprints[key] = table
+        return table.match(fingerprint)
+
+    def _edgeFingerprint(self, edgeId):
+        '''Returns the (cached) fingerprint of the Edge edgeId, or None if it has none'''
+        fingerprint = self._edgeFingerprints.get(edgeId)
+        if fingerprint is None:
+            OCCEdge = self._edgeTrackersById[edgeId].getOCCEdge()
+            if not OCCEdge is None:
+                fingerprint = EdgeFingerprints.fingerprint(OCCEdge)
+                self._edgeFingerprints[edgeId] = fingerprint
+        return fingerprint
+
+    def _signature(self, tracker):
+        '''Returns the `ShapeSignature` of the OCC object of tracker, or None if it has none'''
+        OCCObject = tracker.getOCCObj()
+        if OCCObject is None:
+            return None
+        return ShapeSignature.fromShape(OCCObject, self._shapeKey)
+
+    def _edgeKey(self, edgeTracker):
+        '''Returns the shape key that edgeTracker is matched by, or None once it can't be.
+
+        That is the key of its OCCEdge, or for an Edge without Faces that `fromSnapshot`
+        restored without one, the key it was saved with, until it is compacted.'''
+        OCCEdge = edgeTracker.getOCCEdge()
+        if not OCCEdge is None:
+            return self._shapeKey(OCCEdge)
+        if edgeTracker.getId() in self._deadEdges and not edgeTracker.getSignature() is None:
+            return edgeTracker.getSignature().getKey()
         return None
 
-    def _clearFaceFromEdgeTrackers(self, faceName):
-        '''Checks for faceName in self._edgeTrackers. If present, deletes it.'''
+    def _indexEdgeTracker(self, edgeTracker):
+        '''Adds a new edgeTracker to self._edgeTrackersById and to the keyed edge index
 
-        for edgeTracker in self._edgeTrackers:
-            if edgeTracker.hasFace(faceName):
-                edgeTracker.delFace(faceName)
+        An edgeTracker that can not be matched, see `_edgeKey`, is not keyed'''
+        edgeId = edgeTracker.getId()
+        self._edgeTrackersById[edgeId] = edgeTracker
+        self._ownedEdges.add(edgeId)
+        key = self._edgeKey(edgeTracker)
+        if not key is None:
+            self._addToBucket(self._edgeIndex, key, edgeId)
+            if not self._edgeSpace is None and not edgeTracker.getOCCEdge() is None:
+                self._placeInSpace(self._edgeSpace, edgeId, edgeTracker.getOCCEdge())
+
+    def _restoreEdge(self, edgeId, OCCEdge):
+        '''Gives the Edge edgeId, which was matched by key alone, its OCCEdge back'''
+        self._ownEdge(edgeId).restore(OCCEdge)
+        if not self._edgeSpace is None:
+            self._placeInSpace(self._edgeSpace, edgeId, OCCEdge)
+
+    def _findFaceTracker(self, OCCFace, stats=None):
+        '''Returns the `TrackedFace` whose current OCCFace isEqual to OCCFace, or None
+
+        stats, if given, counts the isEqual calls and whether the face index had a match'''
+        for faceId in self._faceIndex.get(self._shapeKey(OCCFace), ()):
+            faceTracker = self._faceTrackersById[faceId]
+            if not stats is None:
+                stats.count('isEqual')
+            if faceTracker.getOCCFace().isEqual(OCCFace):
+                if not stats is None:
+                    stats.lookup('faceIndex', True)
+                return faceTracker
+        if not stats is None:
+            stats.lookup('faceIndex', False)
+        return None
+
+    def _indexFace(self, faceTracker):
+        '''Adds faceTracker to the keyed face index under its current OCCFace'''
+        key = self._shapeKey(faceTracker.getOCCFace())
+        self._addToBucket(self._faceIndex, key, faceTracker.getId())
+        if not self._faceSpace is None:
+            self._placeInSpace(self._faceSpace, faceTracker.getId(), faceTracker.getOCCFace())
+
+    def _unindexFace(self, faceTracker):
+        '''Removes faceTracker from the keyed face index'''
+        key = self._shapeKey(faceTracker.getOCCFace())
+        self._removeFromBucket(self._faceIndex, key, faceTracker.getId())
+        if not self._faceSpace is None:
+            self._faceSpace.remove(faceTracker.getId())
+
+    def _placeInSpace(self, space, trackerId, OCCShape):
+        '''Adds the bounding box of OCCShape to space, if it has one'''
+        box = SpatialIndex.boxOf(OCCShape)
+        if not box is None:
+            space.insert(trackerId, box)
+
+    def _spaces(self):
+        '''Returns the `SpatialIndex`es of the live Faces and of the Edges, building them
+        the first time.
+
+        Edges stay in theirs until they are compacted, like in the edge index, so that
+        one that is attached to a Face again does not have to be placed again. The queries
+        leave out the ones without Faces.'''
+        if self._faceSpace is None:
+            self._faceSpace = SpatialIndex()
+            self._edgeSpace = SpatialIndex()
+            for bucket in self._faceIndex.values():
+                for faceId in bucket:
+                    OCCFace = self._faceTrackersById[faceId].getOCCFace()
+                    self._placeInSpace(self._faceSpace, faceId, OCCFace)
+            for bucket in self._edgeIndex.values():
+                for edgeId in bucket:
+                    OCCEdge = self._edgeTrackersById[edgeId].getOCCEdge()
+                    if not OCCEdge is None:
+                        self._placeInSpace(self._edgeSpace, edgeId, OCCEdge)
+        return self._faceSpace, self._edgeSpace
+
+    def _near(self, space, OCCShape, tolerance):
+        box = SpatialIndex.boxOf(OCCShape)
+        if box is None:
+            msg = 'That shape has no BoundBox to search near'
+            raise ValueError(msg)
+        return space.find(box, tolerance)
+
+    def getFacesNear(self, OCCShape, tolerance=1e-7):
+        '''Returns the names of the tracked Faces whose bounding box overlaps the one of
+        OCCShape, grown by tolerance. Shapes without a BoundBox are never found.'''
+        faceSpace, edgeSpace = self._spaces()
+        return [names.format('Face', i) for i in self._near(faceSpace, OCCShape, tolerance)]
+
+    def getEdgesNear(self, OCCShape, tolerance=1e-7):
+        '''Returns the names of the tracked Edges whose bounding box overlaps the one of
+        OCCShape, grown by tolerance. Edges that are no longer part of any Face are left
+        out. See `getFacesNear`.
+
+        A lazy tracker only materializes the pending Edges of the Faces near OCCShape: an
+        Edge lies within the bounding box of its Faces.'''
+        faceSpace, edgeSpace = self._spaces()
+        if len(self._lazyEdges) > 0:
+            for faceId in self._near(faceSpace, OCCShape, tolerance):
+                for key in self._faceTrackersById[faceId].getEdgeKeys(self._shapeKey):
+                    if key in self._lazyEdges:
+                        self._materialize(key)
+        return [names.format('Edge', i) for i in self._near(edgeSpace, OCCShape, tolerance)
+                if not i in self._deadEdges]
+
+    def _facePairKey(self, faceId0, faceId1):
+        '''Returns the key used in self._edgesByFacePair. The pair is unordered.'''
+        if faceId1 < faceId0:
+            return (faceId1, faceId0)
+        return (faceId0, faceId1)
+
+    def _attachFace(self, edgeId, faceTracker):
+        '''Adds faceTracker to the Edge edgeId, keeping the Face pair index current.
+
+        The Edge must already have been matched against the Edges of faceTracker, it is not
+        checked again.
+        Note: this does not touch self._edgesByFace, the caller sets the Face's Edges'''
+        edgeTracker = self._ownEdge(edgeId)
+        edgeTracker.addFace(faceTracker, trusted=True)
+        if not self._deadEdges.pop(edgeId, None) is None:
+            # The Edge has Faces again, so `_edgeFrontier` may no longer skip it
+            self._edgeForward = {}
+        if edgeTracker.isValid():
+            key = self._facePairKey(*edgeTracker.getFaceIds())
+            pairEdges = self._edgesByFacePair.get(key, ()) + (edgeId,)
+            self._edgesByFacePair[key] = tuple(sorted(pairEdges))
+
+    def _lineageParent(self, pairKey, pairsBefore, leaving):
+        '''Returns the parent of the Edges that a batch makes shared by the Faces pairKey
+
+        A new shared Edge replaced the Edges the two Faces shared before the batch, if any
+        of those left them, and becomes a child of the first of those by id. Otherwise it
+        was split off the Edges that stay, and becomes a child of the first of them. Faces that
+        did not share an Edge before, e.g. Faces added in the same batch, give no parent.
+
+        :pairsBefore: (FaceId, FaceId) -> the Edges that pair shared before the batch
+        :leaving: the ids of the Edges that were detached from a Face in the batch'''
+        before = pairsBefore.get(pairKey, ())
+        replaced = [i for i in before if i in leaving]
+        if len(replaced) > 0:
+            return replaced[0]
+        if len(before) > 0:
+            return before[0]
+        return None
+
+    def _unlinkLineage(self, edgeTracker):
+        '''Takes an Edge that is being dropped out of the lineage. Its children move up.'''
+        edgeId = edgeTracker.getId()
+        parent = edgeTracker.getParent()
+        if not parent is None:
+            self._removeFromBucket(self._edgeChildren, parent, edgeId)
+        children = self._edgeChildren.pop(edgeId, ())
+        for childId in children:
+            self._ownEdge(childId).setParent(parent)
+            if not parent is None:
+                self._addToBucket(self._edgeChildren, parent, childId)
+
+    def _linkChild(self, parent, edgeId):
+        '''Records the Edge edgeId as the latest child of the Edge parent'''
+        self._addToBucket(self._edgeChildren, parent, edgeId)
+        self._edgeForward.pop(parent, None)
+
+    def _hasFaces(self, edgeId):
+        return len(self._edgeTrackersById[edgeId].getFaceIds()) > 0
+
+    def _edgeFrontier(self, edgeId):
+        '''Returns the ids of the nearest descendants of the Edge edgeId that have Faces.
+
+        They are in depth first order: the Edges without Faces in between are skipped, and
+        their descendants take their place. Every Edge without Faces that is passed on the
+        way remembers its answer, path compression style, so an Edge that is replaced on
+        every recompute does not make the lookup walk its whole history. A remembered Edge
+        that has lost its Faces since is skipped in turn, and an Edge that gets a Face back
+        clears them all, see `_attachFace`.'''
+        following = lambda i: self._edgeForward.get(i, self._edgeChildren.get(i, ()))
+        frontiers = {}
+        stack = [(edgeId, False)]
+        while len(stack) > 0:
+            currentId, expanded = stack.pop()
+            if not expanded:
+                stack.append((currentId, True))
+                stack.extend([(i, False) for i in following(currentId)
+                              if not self._hasFaces(i) and not i in frontiers])
+                continue
+            frontier = []
+            for i in following(currentId):
+                if self._hasFaces(i):
+                    frontier.append(i)
+                else:
+                    frontier.extend(frontiers[i])
+            frontier = tuple(frontier)
+            frontiers[currentId] = frontier
+            if not self._hasFaces(currentId):
+                self._edgeForward[currentId] = frontier
+        return frontiers[edgeId]
+
+    def _descendants(self, edgeId):
+        '''Returns the ids of the descendants of the Edge edgeId that have Faces, depth
+        first. See `_edgeFrontier`.'''
+        found = []
+        stack = list(reversed(self._edgeFrontier(edgeId)))
+        while len(stack) > 0:
+            childId = stack.pop()
+            found.append(childId)
+            stack.extend(reversed(self._edgeFrontier(childId)))
+        return found
+
+    def _detachFace(self, edgeId, faceId):
+        '''Removes faceId from the Edge edgeId, keeping the Face pair index current.
+
+        Note: this does not touch self._edgesByFace, see `_clearFaceFromEdgeTrackers`'''
+        edgeTracker = self._ownEdge(edgeId)
+        if edgeTracker.isValid():
+            key = self._facePairKey(*edgeTracker.getFaceIds())
+            self._removeFromBucket(self._edgesByFacePair, key, edgeId)
+        edgeTracker.delFace(faceId)
+        if len(edgeTracker.getFaceIds()) == 0:
+            self._deadEdges[edgeId] = True
+
+    def _clearFaceFromEdgeTrackers(self, faceId):
+        '''Removes faceId from every `TrackedEdge` that currently includes it.'''
+
+        for edgeId in self._edgesByFace.pop(faceId, ()):
+            self._detachFace(edgeId, faceId)
 
     def _getFaceTracker(self, OCCFace):
         '''return the `FaceTracker` that is tracking OCCFace
-        
+
         raises exception if OCCFace is not being tracked'''
-        for faceTracker in self._faceTrackers:
-            if faceTracker.getOCCFace().isEqual(OCCFace):
-                return faceTracker
-        msg = "That OCCFace is not being tracked"
-        raise ValueError(msg)
+        faceTracker = self._findFaceTracker(OCCFace)
+        if faceTracker is None:
+            msg = "That OCCFace is not being tracked"
+            raise ValueError(msg)
+        return faceTracker
+
+    def _parseName(self, name, base):
+        '''Returns the id of name, raising ValueError if it is not a base name'''
+        nameBase, nameId = names.parse(name)
+        if nameBase != base:
+            msg = '{} is not a valid {}Name'.format(name, base)
+            raise ValueError(msg)
+        return nameId
 
     def _getFaceTrackerByFaceName(self, FaceName):
         '''return the `FaceTracker` that is tracknig the Face defined by FaceName'''
-        for faceTracker in self._faceTrackers:
-            if FaceName == faceTracker.getName():
-                return faceTracker
-        msg = '{} is not a valid FaceName. There is no tracker with that name'
-        raise ValueError(msg)
+        try:
+            return self._faceTrackersById[self._parseName(FaceName, 'Face')]
+        except KeyError:
+            msg = '{} is not a valid FaceName. There is no tracker with that name'
+            raise ValueError(msg.format(FaceName))
 
     def _getEdgeTracker(self, EdgeName):
         '''Return the `EdgeTracker` that is tracking the edge defined by EdgeName
 
         raises ValueError if the EdgeName has no tracker'''
-        #TODO: speed this up - maybe create a dictionary with key-value pairs of
-        # EdgeNames-IndexNumber
-        for edgeTracker in self._edgeTrackers:
-            if EdgeName == edgeTracker.getName():
-                return edgeTracker
-        msg = '{} is not a valid EdgeName. There is no tracker with that name'
-        raise ValueError(msg)
+        edgeId = self._parseName(EdgeName, 'Edge')
+        if edgeId in self._lazyKeys:
+            self._materialize(self._lazyKeys[edgeId])
+        try:
+            return self._edgeTrackersById[edgeId]
+        except KeyError:
+            msg = '{} is not a valid EdgeName. There is no tracker with that name'
+            raise ValueError(msg.format(EdgeName))
 
     def getEdgeName(self, OCCEdge):
         '''Returns the topological name of OCCEdge'''
-        index = self._isTrackedEdge(OCCEdge)
-        if index is None or not self._edgeTrackers[index].isValid():
+        if len(self._lazyEdges) > 0:
+            key = self._shapeKey(OCCEdge)
+            if key in self._lazyEdges:
+                self._materialize(key)
+        edgeTracker = self._isTrackedEdge(OCCEdge)
+        if edgeTracker is None or not edgeTracker.isValid():
             msg = 'This edgeName is invalid - no two Faces share it'
             raise ValueError(msg)
-        return self._edgeTrackers[index].getName()
+        return edgeTracker.getName()
+
+    def _toFaceId(self, face):
+        '''Returns the id of face, which may be either a FaceName or a tracked OCCFace'''
+        if type(face) == type(''):
+            return self._parseName(face, 'Face')
+        return self._getFaceTracker(face).getId()
 
     def getEdgeNameFromFaces(self, OCCFace0, OCCFace1):
-        '''Returns the topological name of an Edge shared by Face0 and Face1'''
-        for edgeTracker in self._edgeTrackers:
-            if edgeTracker.hasFace(OCCFace0) and edgeTracker.hasFace(OCCFace1):
-                return edgeTracker.getName()
-        msg = 'There is no Edge that is shared by those two faces'
-        raise ValueError(msg)
+        '''Returns the topological name of an Edge shared by Face0 and Face1
+
+        Each Face may be given either as an OCCFace or as its topological name'''
+        key = self._facePairKey(self._toFaceId(OCCFace0), self._toFaceId(OCCFace1))
+        self._materializeBetween(key)
+        pairEdges = self._edgesByFacePair.get(key)
+        if not pairEdges:
+            msg = 'There is no Edge that is shared by those two faces'
+            raise ValueError(msg)
+        return names.format('Edge', pairEdges[0])
+
+
+    def getEdgeDescendants(self, edgeName):
+        '''Returns the names of the current Edges that edgeName was split into or replaced by
+
+        When a batch makes two Faces that already shared an Edge share a new one, e.g.
+        because the Edge was split, the new Edge becomes a child of the Edge it replaced,
+        see `_lineageParent`. Faces that start out sharing several Edges, like the two
+        halves of a cylinder, give no lineage. A child that is created together with the
+        Faces' new shared Edges, as by `TopoNamer.modifyShape`, is named after its parent:
+        Edge004 is split into Edge004a + Edge004b. The result
+        holds every valid descendant, children before grandchildren of later children,
+        but not edgeName itself. The Edges that no Face includes any more are skipped with
+        path compression, see `_edgeFrontier`, so the lookup is proportional to the number
+        of current descendants rather than to the length of the Edge's history.'''
+        edgeId = self._getEdgeTracker(edgeName).getId()
+        return [names.format('Edge', i) for i in self._descendants(edgeId)
+                if self._edgeTrackersById[i].isValid()]
+
+    def _isLiveFace(self, faceId):
+        '''True if the Face faceId is part of the shape'''
+        return faceId in self._faceTrackersById and not faceId in self._deadFaces
+
+    def _findFace(self, faceId):
+        '''Returns the Face that the merged Face faceId was merged into, union-find style.
+
+        The chain of merges is followed up to a Face that is either part of the shape, or
+        was itself merged but has Faces split off it. Every Face passed on the way is then
+        pointed straight at it, so the next lookup is a single step.'''
+        path = []
+        while faceId in self._faceForward and (len(path) == 0 or
+                                               not faceId in self._faceChildren):
+            path.append(faceId)
+            faceId = self._faceForward[faceId]
+        for mergedId in path[:-1]:
+            if self._faceForward[mergedId] != faceId:
+                self._faceForward[mergedId] = faceId
+        return faceId
+
+    def _memo(self):
+        '''Returns the memo of `getRepresentatives` for the current version'''
+        return self._representatives.setdefault(self._version, {})
+
+    def _faceRepresentatives(self, faceId):
+        '''Returns the ids of the current Faces that the Face faceId stands for'''
+        memo = self._memo()
+        found = memo.get(('Face', faceId))
+        if not found is None:
+            return found
+
+        # Depth first, without recursion since feature trees may be deep. A Face that was
+        # split off and later merged back into its parent would otherwise loop.
+        found = []
+        seen = set([faceId])
+        stack = [faceId]
+        while len(stack) > 0:
+            current = stack.pop()
+            following = list(self._faceChildren.get(current, ()))
+            if self._isLiveFace(current):
+                found.append(current)
+            elif current in self._faceForward:
+                following.insert(0, self._findFace(current))
+            for nextId in reversed(following):
+                if not nextId in seen:
+                    seen.add(nextId)
+                    stack.append(nextId)
+        found = tuple(found)
+        memo[('Face', faceId)] = found
+        return found
+
+    def _edgeRepresentatives(self, edgeTracker):
+        '''Returns the ids of the current Edges that edgeTracker stands for'''
+        memo = self._memo()
+        edgeId = edgeTracker.getId()
+        found = memo.get(('Edge', edgeId))
+        if not found is None:
+            return found
+
+        lineage = [edgeId] + self._descendants(edgeId)
+        found = [i for i in lineage if self._edgeTrackersById[i].isValid()]
+        faces = edgeTracker.getLastValidFaceIds()
+        if len(found) == 0 and len(faces) == 2:
+            for faceId0 in self._faceRepresentatives(faces[0]):
+                for faceId1 in self._faceRepresentatives(faces[1]):
+                    pairKey = self._facePairKey(faceId0, faceId1)
+                    self._materializeBetween(pairKey)
+                    for pairEdge in self._edgesByFacePair.get(pairKey, ()):
+                        if not pairEdge in found:
+                            found.append(pairEdge)
+        found = tuple(found)
+        memo[('Edge', edgeId)] = found
+        return found
 
+    def getRepresentatives(self, name):
+        '''Returns the names of the current Faces or Edges that name stands for.
+
+        This resolves a name that a feature stored long ago, however the shape changed
+        since. A Face stands for itself as long as it is part of the shape, and for the
+        Faces split off it. A Face that was merged into another one stands for that Face,
+        see `TopoNamer.applyHistory`. An Edge stands for itself and its descendants as
+        long as they are valid, see `getEdgeDescendants`, and otherwise for the Edges
+        shared by the representatives of its last valid Faces.
+
+        Merges are resolved union-find style, with path compression, and every answer is
+        memoized for the current version. Resolving a stale name again costs a lookup.'''
+        base, nameId = names.parse(name)
+        if base == 'Face':
+            if not (nameId in self._faceTrackersById or nameId in self._faceForward or
+                    nameId in self._faceChildren):
+                msg = '{} is not a valid FaceName. There is no tracker with that name'
+                raise ValueError(msg.format(name))
+            return [names.format('Face', i) for i in self._faceRepresentatives(nameId)]
+        edgeTracker = self._getEdgeTracker(name)
+        return [names.format('Edge', i) for i in self._edgeRepresentatives(edgeTracker)]
 
     def getEdgeByName(self, edgeName):
         '''Given edgeName, returns the appropriate OCCEdge(s).
-        
+
         This could be multiple Edges if the Edge was split at some point. For that reason,
-        this method always returns a list of OCCEdges. Note: due to the implementation,
-        even if edgeName itself was never split this may still return multiple Edges. For
-        example, if Edge000 gets split into Edge000 + Edge004, even if this method is
-        called with Edge004 it will return both Edges.'''
+        this method always returns a list of OCCEdges: the Edge itself, if it is still
+        valid, followed by its descendants, see `getEdgeDescendants`. If Edge000 gets split
+        into Edge000 + Edge000a, Edge000 returns both Edges but Edge000a only itself.
 
-        edges = []
+        If neither the Edge nor any of its descendants is valid, the Edges currently shared
+        by the representatives of its last valid Faces are returned instead, see
+        `getRepresentatives`.'''
 
         edgeTracker = self._getEdgeTracker(edgeName)
-        faces = edgeTracker.getLastValidFaceNames()
+        faces = edgeTracker.getLastValidFaceIds()
         if len(faces) != 2:
             msg = 'This Edge in invalid: it was never shared by two Faces'
             raise ValueError(msg)
 
-        faceTrackerA = self._getFaceTrackerByFaceName(faces[0])
-        faceTrackerB = self._getFaceTrackerByFaceName(faces[1])
-
-        faceA = faceTrackerA.getOCCFace()
-        faceB = faceTrackerB.getOCCFace()
-
-        for edgeA in faceA.Edges:
-            for edgeB in faceB.Edges:
-                if edgeA.isSame(edgeB):
-                    edges.append(edgeA)
-
-        # for tracker in self._edgeTrackers:
-            # if tracker.hasFace(faces[0]) and tracker.hasFace(faces[1]):
-                # edges.append(tracker.getOCCEdge())
+        edges = [self._edgeTrackersById[i].getOCCEdge()
+                 for i in self._edgeRepresentatives(edgeTracker)]
 
         if len(edges) == 0:
+            faces = edgeTracker.getLastValidFaceNames()
             msg = 'There are no Edges that share these two faces: {}, {}'.format(faces[0], faces[1])
             raise ValueError(msg)
         return edges
 
+    def _makeId(self, base):
+        '''Returns the next unused id for base, which must be either 'Face' or 'Edge' '''
+        if base == 'Face':
+            index = self._numbFaces
+            self._numbFaces += 1
+        elif base == 'Edge':
+            index = self._numbEdges
+            self._numbEdges += 1
+        else:
+            msg = 'Must be either \'Face\' or \'Edge\''
+            raise ValueError(msg)
+        return (index,)
+
+    def _makeSubId(self, edgeId):
+        '''Returns the next unused sub-id of the Edge edgeId.
+
+        All the sub-names of an index come from one sequence, so the pieces of Edge004a are
+        named Edge004b, Edge004c and so on. After Edge004z comes Edge004aa, see
+        `NameFormatter.followingSubId`, so an Edge that is replaced on every recompute keeps
+        a short name.'''
+        index = edgeId[0]
+        subId = NameFormatter.followingSubId(self._lastSubIds.get(index, (index,)))
+        self._lastSubIds[index] = subId
+        return subId
+
     def _makeName(self, base, sub=False):
+        '''Returns a new name for base.
+
+        If sub is True, base is an existing name and the following sub-name is returned'''
         if sub == False:
-            if base == 'Face':
-                index = self._numbFaces
-                self._numbFaces += 1
-            elif base == 'Edge':
-                index = self._numbEdges
-                self._numbEdges += 1
-            else:
-                msg = 'Must be either \'Face\' or \'Edge\''
-                raise ValueError(msg)
-            name = '{}{:03d}'.format(base, index)
-        else:
-            cur_letter = base[-1]
-            if cur_letter.isdigit():
-                index = 'a'
-            elif cur_letter == 'z':
-                base = base[:-1]
-                index = 'aa'
-            else:
-                base = base[:-1]
-                index = chr(ord(cur_letter) + 1)
-            name = '{}{}'.format(base, index)
-        return name
+            return names.format(base, self._makeId(base))
+        base, nameId = names.parse(base)
+        return names.format(base, NameFormatter.nextSubId(nameId))
 
     def addFace(self, OCCFace):
         '''Adds OCCFace to the list of tracked Faces
 
         returns the topological name of the added Face'''
-        for face in self._faceTrackers:
-            occFace = face.getOCCFace()
-            if occFace.isEqual(OCCFace):
-                msg = 'A given OpenCascade Face may only be tracked once.'
-                raise ValueError(msg)
-        name = self._makeName('Face')
-        trackedFace = TrackedFace(OCCFace, name)
-        self._faceTrackers.append(trackedFace)
-
-        self._checkEdges(trackedFace)
-        return name
-
-    def _checkEdges(self, trackedFace):
-        '''Updates the list of `TrackedEdge`s appropriately.
-        
-        For each Edge in trackedFace, check if there is already a `TrackedEdge` for it. If
-        not, create one. If so, add this `trackedFace` to it.'''
-        OCCEdges = trackedFace.getOCCFace().Edges
-        for OCCEdge in OCCEdges:
-            check = self._isTrackedEdge(OCCEdge)
-            if not check is None:
-                self._edgeTrackers[check].addFace(trackedFace)
-            else:
-                edgeName = self._makeName('Edge')
-                trackedEdge = TrackedEdge(OCCEdge, edgeName)
-                trackedEdge.addFace(trackedFace)
-                self._edgeTrackers.append(trackedEdge)
+        return self.addFaces([OCCFace])[0]
+
+    def addFaces(self, OCCFaces):
+        '''Adds every Face in OCCFaces, e.g. all the Faces of a freshly created Shape.
+
+        This produces exactly the same names as calling `addFace` for each Face in order,
+        but the whole list is handled as one batch, see `_applyChanges`.
+
+        returns the list of topological names of the added Faces'''
+        return self._applyChanges(newFaces=OCCFaces)
 
     def modifyFace(self, oldOCCFace, newOCCFace):
-        '''Modify the existing `TrackedFace` with the newOCCFace'''
-        faceTracker = self._getFaceTracker(oldOCCFace)
+        '''Modify the existing `TrackedFace` with the newOCCFace
 
-        name = faceTracker.getName()
-        faceTracker.updateOCCFace(newOCCFace)
-        self._clearFaceFromEdgeTrackers(name)
-        self._checkEdges(faceTracker)
+        Only the Edges that actually changed are touched: the Edges of newOCCFace are
+        diffed against the `TrackedEdge`s the Face already belongs to. Those that are still
+        present are kept as they are, the ones that disappeared are detached from the Face
+        and the new ones are attached (or created).'''
+        self._applyChanges(modifiedFaces=[(oldOCCFace, newOCCFace)])
 
     def deleteFace(self, OCCFace):
         '''Delete the given face. This means it no longer contributes to any Edges'''
+        self._applyChanges(deletedFaces=[OCCFace])
+
+    def getSnapshot(self):
+        '''Returns the naming state as a dict that only holds lists, ints and the shape keys
+
+        With the default (integer) shape keys the result can be stored with e.g. `json`.
+        An Edge that is no longer part of any Face keeps its key until it is compacted, so
+        that the restored tracker still matches it by key if it comes back. The lineage of split Edges is stored under 'lineage'.
+        A lazy tracker materializes all of its Edges first. See `fromSnapshot`.'''
+        self._materializeAll()
+        liveFaces = set()
+        for bucket in self._faceIndex.values():
+            liveFaces.update(bucket)
+
+        faces = []
+        for faceTracker in self._faceTrackers:
+            key = None
+            if faceTracker.getId() in liveFaces:
+                key = self._shapeKey(faceTracker.getOCCFace())
+            faces.append([list(faceTracker.getId()), key])
+
+        edges = []
+        for edgeTracker in self._edgeTrackers:
+            edges.append([list(edgeTracker.getId()), self._edgeKey(edgeTracker),
+                          [list(i) for i in edgeTracker.getFaceIds()],
+                          [list(i) for i in edgeTracker.getLastValidFaceIds()]])
+
+        lineage = {'parents': [], 'subIds': []}
+        for parent, children in sorted(self._edgeChildren.items()):
+            lineage['parents'].extend([[list(i), list(parent)] for i in children])
+        lineage['subIds'] = [list(i) for index, i in sorted(self._lastSubIds.items())]
+        lineage['faceParents'] = []
+        for parent, children in sorted(self._faceChildren.items()):
+            lineage['faceParents'].extend([[list(i), list(parent)] for i in children])
+        lineage['faceMerges'] = [[list(i), list(j)]
+                                 for i, j in sorted(self._faceForward.items())]
+
+        return {'version': self.SNAPSHOT_VERSION,
+                'numbFaces': self._numbFaces,
+                'numbEdges': self._numbEdges,
+                'faces': faces,
+                'edges': edges,
+                'lineage': lineage}
+
+    def writeNamingTable(self, path):
+        '''Write the naming state to path as a `NamingTable`.
+
+        The file can be opened read-only with a `TopoTrackerView`.'''
+        NamingTable.write(path, self.getSnapshot())
+
+    @classmethod
+    def fromSnapshot(cls, snapshot, OCCFaces, shapeKey=hashCodeKey, versioned=False,
+                     deadRatio=None, lazy=False):
+        '''Returns a new TopoTracker with the state saved by `getSnapshot`.
+
+        The tracked Faces and Edges are re-attached to the live OCC objects in OCCFaces, so
+        shapeKey must give the same keys as when the snapshot was taken. Keys may collide: a
+        Face is only re-attached to an OCCFace whose Edge keys are the ones the snapshot
+        holds for it, and which shares an isSame Edge with each Face it shared an Edge with.
+        Every Edge is then resolved through the Edges of its restored Faces with
+        isSame. This is a single pass over the snapshot and the Faces, nothing is replayed.
+        A versioned tracker starts out with the restored state as its only version. Deleted
+        Faces and Edges without Faces are restored as tombstones, see `compact`. An Edge
+        without Faces that was saved with its key is matched by that key until it is
+        compacted, see `_isTrackedEdge`, so it keeps its name when it comes back. The
+        restored Edges are all materialized, even in a lazy tracker.
+
+        :snapshot: the dict returned by `getSnapshot`
+        :OCCFaces: the current OCCFaces of the tracked shape'''
+        if snapshot.get('version') != cls.SNAPSHOT_VERSION:
+            msg = 'Unsupported snapshot version: {}'.format(snapshot.get('version'))
+            raise ValueError(msg)
+
+        # shapeKey -> list of (OCCFace, its Edges, their keys)
+        faceByKey = {}
+        for OCCFace in OCCFaces:
+            edges = tuple(OCCFace.Edges)
+            edgeKeys = tuple([shapeKey(i) for i in edges])
+            faceByKey.setdefault(shapeKey(OCCFace), []).append((OCCFace, edges, edgeKeys))
+
+        # FaceId -> the keys of its Edges, and the (FaceId, key) of each Edge it shares
+        keysByFace = {}
+        sharedByFace = {}
+        for edgeId, key, faceIds, lastValidFaceIds in snapshot['edges']:
+            faceIds = [tuple(i) for i in faceIds]
+            for faceId in faceIds:
+                keysByFace.setdefault(faceId, Counter())[key] += 1
+            if len(faceIds) == 2 and faceIds[0] != faceIds[1]:
+                sharedByFace.setdefault(faceIds[0], []).append((faceIds[1], key))
+                sharedByFace.setdefault(faceIds[1], []).append((faceIds[0], key))
+
+        tracker = cls(shapeKey, versioned, deadRatio, lazy)
+        tracker._numbFaces = snapshot['numbFaces']
+        tracker._numbEdges = snapshot['numbEdges']
+
+        def sharedEdges(edges, edgeKeys, otherEdges, otherEdgeKeys, key):
+            '''The Edges with key that are isSame to one of otherEdges'''
+            others = [i for i, otherKey in zip(otherEdges, otherEdgeKeys) if otherKey == key]
+            return [edge for edge, edgeKey in zip(edges, edgeKeys)
+                    if edgeKey == key and any(edge.isSame(i) for i in others)]
+
+        # FaceId -> (OCCFace, its Edges, their keys)
+        assigned = {}
+
+        def matches(faceId, candidate):
+            OCCFace, edges, edgeKeys = candidate
+            if Counter(edgeKeys) != keysByFace.get(faceId, Counter()):
+                return False
+            for otherId, key in sharedByFace.get(faceId, ()):
+                other = assigned.get(otherId)
+                if not other is None and len(sharedEdges(edges, edgeKeys, other[1], other[2],
+                                                         key)) == 0:
+                    return False
+            return True
+
+        # Every keyed Face is assigned an OCCFace that matches it, backtracking when a Face
+        # has none left. Unless keys collide every Face has a single candidate.
+        keyed = [(tuple(faceId), key) for faceId, key in snapshot['faces'] if not key is None]
+        nextChoice = [0] * len(keyed)
+        used = set()
+        position = 0
+        deepest = 0
+        while position < len(keyed):
+            faceId, key = keyed[position]
+            candidates = faceByKey.get(key, [])
+            previous = assigned.pop(faceId, None)
+            if not previous is None:
+                used.discard(id(previous[0]))
+            for index in range(nextChoice[position], len(candidates)):
+                candidate = candidates[index]
+                if not id(candidate[0]) in used and matches(faceId, candidate):
+                    nextChoice[position] = index + 1
+                    assigned[faceId] = candidate
+                    used.add(id(candidate[0]))
+                    position += 1
+                    deepest = max(deepest, position)
+                    break
+            else:
+                nextChoice[position] = 0
+                position -= 1
+                if position < 0:
+                    msg = 'None of the OCCFaces matches the tracked Face {}'
+                    raise ValueError(msg.format(names.format('Face', keyed[deepest][0])))
+
+        for faceId, key in snapshot['faces']:
+            faceId = tuple(faceId)
+            OCCFace, edges, edgeKeys = assigned.get(faceId, (None, None, None))
+            faceTracker = TrackedFace(OCCFace, faceId, edges=edges, edgeKeys=edgeKeys)
+            tracker._faceTrackersById[faceTracker.getId()] = faceTracker
+            if OCCFace is None:
+                tracker._deadFaces[faceTracker.getId()] = True
+            else:
+                tracker._indexFace(faceTracker)
+
+        # shapeKey -> the OCCEdges already re-attached to an Edge
+        claimed = {}
+        for edgeId, key, faceIds, lastValidFaceIds in snapshot['edges']:
+            faceIds = [tuple(i) for i in faceIds]
+            OCCEdge = None
+            if not key is None and len(faceIds) > 0:
+                edges, edgeKeys = assigned[faceIds[0]][1:]
+                if len(faceIds) == 2:
+                    edges = sharedEdges(edges, edgeKeys, assigned[faceIds[1]][1],
+                                        assigned[faceIds[1]][2], key)
+                    edgeKeys = [key] * len(edges)
+                taken = claimed.setdefault(key, [])
+                for edge, edgeKey in zip(edges, edgeKeys):
+                    if edgeKey == key and not any(edge.isSame(i) for i in taken):
+                        OCCEdge = edge
+                        taken.append(edge)
+                        break
+                else:
+                    msg = 'None of the OCCEdges matches the tracked Edge {}'
+                    raise ValueError(msg.format(names.format('Edge', tuple(edgeId))))
+            edgeTracker = TrackedEdge(OCCEdge, tuple(edgeId))
+            edgeTracker.restoreFaces(faceIds, [tuple(i) for i in lastValidFaceIds])
+            if len(faceIds) == 0:
+                tracker._deadEdges[edgeTracker.getId()] = True
+                if not key is None:
+                    edgeTracker.release(ShapeSignature(key))
+            tracker._indexEdgeTracker(edgeTracker)
+            for faceId in faceIds:
+                tracker._addToBucket(tracker._edgesByFace, faceId, edgeTracker.getId())
+            if edgeTracker.isValid():
+                pairKey = tracker._facePairKey(*faceIds)
+                tracker._addToBucket(tracker._edgesByFacePair, pairKey, edgeTracker.getId())
+
+        # Snapshots taken before Faces and Edges had a lineage start out without one
+        lineage = snapshot.get('lineage', {})
+        for childId, parent in lineage.get('parents', ()):
+            childId, parent = tuple(childId), tuple(parent)
+            tracker._edgeTrackersById[childId].setParent(parent)
+            tracker._addToBucket(tracker._edgeChildren, parent, childId)
+        for subId in lineage.get('subIds', ()):
+            tracker._lastSubIds[subId[0]] = tuple(subId)
+        tracker._linkFaces([(tuple(i), tuple(j)) for i, j in lineage.get('faceParents', ())],
+                           [(tuple(i), tuple(j)) for i, j in lineage.get('faceMerges', ())])
+
+        if versioned:
+            tracker._versions = {}
+            tracker._nextVersion = 0
+            tracker._saveVersion()
+        return tracker
+
+    def transaction(self):
+        '''Returns a `TopoTransaction` which stages Face changes until it is committed'''
+        return TopoTransaction(self)
+
+    def _trackFace(self, OCCFace, edges, edgeKeys):
+        '''Creates, names and indexes a new `TrackedFace` for OCCFace with the given Edges'''
+        faceId = self._makeId('Face')
+        trackedFace = TrackedFace(OCCFace, faceId, edges=edges, edgeKeys=edgeKeys)
+        self._faceTrackersById[faceId] = trackedFace
+        self._ownedFaces.add(faceId)
+        self._indexFace(trackedFace)
+        return trackedFace
+
+    def _linkFaces(self, faceParents, faceMerges):
+        '''Records the lineage of Faces.
+
+        :faceParents: (FaceId, ParentId) pairs: the Face was split off the parent
+        :faceMerges: (FaceId, FaceId) pairs: the first Face was merged into the second'''
+        for faceId, parent in faceParents:
+            if faceId in self._faceTrackersById:
+                self._ownFace(faceId).setParent(parent)
+            self._addToBucket(self._faceChildren, parent, faceId)
+        for faceId, targetId in faceMerges:
+            self._faceForward[faceId] = targetId
+
+    def _applyChanges(self, newFaces=(), modifiedFaces=(), deletedFaces=(), newParents=None,
+                      mergedInto=None):
+        '''Applies a batch of Face changes as a single step.
+
+        The batch is first staged without touching any state: every Face is resolved, the
+        final set of Faces is checked for duplicates, and every Edge is resolved to either
+        an existing `TrackedEdge` or a group of isSame Edges that will become a new one.
+        Edge sharing is checked against the final state of the whole batch, so an Edge may
+        move from a deleted Face to a new one. If any check fails a ValueError is raised and
+        nothing has changed. A lazy tracker adds the Faces of a batch that only adds Faces
+        lazily, see `_addLazily`. Before any other batch it only materializes the Edges the
+        batch can touch, see `_materializeFor`.
+
+        Only then is the batch applied: deleted and modified Faces are detached from the
+        Edges they no longer contain, the new `TrackedEdge`s are created, and finally new
+        and modified Faces are attached to their Edges. Names are handed out in the same
+        order as adding the new Faces and then modifying the modified Faces one at a time,
+        except that a new Edge shared by two modified Faces gets a sub-name when it splits
+        or replaces one of theirs, see `getEdgeDescendants`. A versioned tracker saves the
+        result as a new version.
+
+        :newParents: for each new Face, the tracked OCCFace it was split off, or None
+        :mergedInto: for each deleted Face, the OCCFace it was merged into, or None. That
+                     Face must be part of the shape after the batch.
+
+        returns the list of topological names of the new Faces'''
+        newFaces = list(newFaces)
+
+        # FaceId -> TrackedFace, for every Face that is modified or deleted
+        changed = {}
+        modified = []
+        deleted = []
+        for oldOCCFace, newOCCFace in modifiedFaces:
+            faceTracker = self._stageChangedFace(oldOCCFace, changed)
+            modified.append((faceTracker, newOCCFace))
+        for OCCFace in deletedFaces:
+            deleted.append(self._stageChangedFace(OCCFace, changed))
 
-        tracker = self._getFaceTracker(OCCFace)
-        faceName = tracker.getName()
-        self._clearFaceFromEdgeTrackers(faceName)
+        # The kernel calls made while staging, other than the index lookups
+        calls = {'isSame': 0, 'isEqual': 0, 'Edges': len(newFaces) + len(modified)}
+
+        # Every Face's Edges are read, and their keys computed, only once. The result is
+        # cached in the `TrackedFace`.
+        def readEdges(OCCFace):
+            edges = tuple(OCCFace.Edges)
+            return edges, tuple([self._shapeKey(i) for i in edges])
+
+        # The final set of Faces must not contain the same OCCFace twice
+        seenFaces = {}
+        for OCCFace in newFaces + [newOCCFace for tracker, newOCCFace in modified]:
+            bucket = seenFaces.setdefault(self._shapeKey(OCCFace), [])
+            calls['isEqual'] += len(bucket)
+            duplicate = any(OCCFace.isEqual(seen) for seen in bucket)
+            tracked = self._findFaceTracker(OCCFace)
+            if duplicate or not (tracked is None or tracked.getId() in changed):
+                msg = 'A given OpenCascade Face may only be tracked once.'
+                raise ValueError(msg)
+            bucket.append(OCCFace)
+
+        # The lineage of the Faces, see `getRepresentatives`
+        parentIds = [None] * len(newFaces)
+        if not newParents is None:
+            parentIds = [None if i is None else self._getFaceTracker(i).getId()
+                         for i in newParents]
+        if mergedInto is None:
+            mergedInto = [None] * len(deleted)
+        for OCCFace in mergedInto:
+            if OCCFace is None:
+                continue
+            tracked = self._findFaceTracker(OCCFace)
+            finalFaces = seenFaces.get(self._shapeKey(OCCFace), ())
+            inBatch = any(OCCFace.isEqual(i) for i in finalFaces)
+            if not inBatch and (tracked is None or tracked.getId() in changed):
+                msg = 'A Face can only be merged into a Face of the resulting shape.'
+                raise ValueError(msg)
+
+        newEdgeLists = [readEdges(OCCFace) for OCCFace in newFaces]
+        if self._lazy and len(modified) == 0 and len(deleted) == 0:
+            return self._addLazily(newFaces, newEdgeLists, parentIds, calls)
+        modifiedEdgeLists = [readEdges(newOCCFace) for faceTracker, newOCCFace in modified]
+        if self._lazy:
+            self._materializeFor(changed, newEdgeLists + modifiedEdgeLists)
+
+        # EdgeId or new group index -> number of Faces after the batch
+        shareCount = {}
+        for faceId in changed:
+            for edgeId in self._edgesByFace.get(faceId, ()):
+                faceCount = len(self._edgeTrackersById[edgeId].getFaceIds())
+                shareCount[edgeId] = shareCount.get(edgeId, faceCount) - 1
+
+        newEdges = []       # first OCCEdge of each new group, in naming order
+        newBuckets = {}     # shapeKey -> list of indices into newEdges
+        restored = {}       # EdgeId of an Edge matched by key alone -> its new OCCEdge
+
+        def resolve(OCCEdge, key):
+            edgeTracker = self._isTrackedEdge(OCCEdge, key)
+            if not edgeTracker is None and edgeTracker.getOCCEdge() is None:
+                claimed = restored.setdefault(edgeTracker.getId(), OCCEdge)
+                if not (claimed is OCCEdge or claimed.isSame(OCCEdge)):
+                    edgeTracker = None
+            if edgeTracker is None:
+                bucket = newBuckets.setdefault(key, [])
+                for index in bucket:
+                    calls['isSame'] += 1
+                    if newEdges[index].isSame(OCCEdge):
+                        target = index
+                        break
+                else:
+                    target = len(newEdges)
+                    newEdges.append(OCCEdge)
+                    bucket.append(target)
+                count = shareCount.get(target, 0) + 1
+            else:
+                target = edgeTracker.getId()
+                count = shareCount.get(target, len(edgeTracker.getFaceIds())) + 1
+            if count > 2:
+                msg = 'Only two Faces may share a given Edge.'
+                raise ValueError(msg)
+            shareCount[target] = count
+            return target
+
+        newTargets = [[resolve(*i) for i in zip(edges, edgeKeys)]
+                      for edges, edgeKeys in newEdgeLists]
+
+        # For modified Faces, split the Edges into the ones the Face already belongs to and
+        # the ones that must be attached
+        modifiedPlans = []
+        for (faceTracker, newOCCFace), edgeList in zip(modified, modifiedEdgeLists):
+            oldEdges = self._edgesByFace.get(faceTracker.getId(), ())
+            unmatched = {}
+            for edgeId in oldEdges:
+                unmatched[edgeId] = unmatched.get(edgeId, 0) + 1
+            keptEdges = []
+            addedTargets = []
+            for OCCEdge, key in zip(*edgeList):
+                target = resolve(OCCEdge, key)
+                if type(target) != int and unmatched.get(target, 0) > 0:
+                    unmatched[target] -= 1
+                    keptEdges.append(target)
+                else:
+                    addedTargets.append(target)
+            detached = []
+            for edgeId in oldEdges:
+                if unmatched[edgeId] > 0:
+                    unmatched[edgeId] -= 1
+                    detached.append(edgeId)
+            modifiedPlans.append((faceTracker.getId(), newOCCFace, edgeList, keptEdges,
+                                  addedTargets, detached))
+
+        # The lineage of the Edges that become shared by a pair of changed Faces, see
+        # `_lineageParent`: the Edges each pair shared before, the ones that leave a pair,
+        # and the existing Edges of the batch that were already valid once
+        pairsBefore = {}
+        for faceId in changed:
+            for edgeId in self._edgesByFace.get(faceId, ()):
+                edgeTracker = self._edgeTrackersById[edgeId]
+                if edgeTracker.isValid():
+                    pairKey = self._facePairKey(*edgeTracker.getFaceIds())
+                    pairsBefore[pairKey] = self._edgesByFacePair.get(pairKey, ())
+        leaving = set()
+        for faceTracker in deleted:
+            leaving.update(self._edgesByFace.get(faceTracker.getId(), ()))
+        for faceId, newOCCFace, edgeList, keptEdges, addedTargets, detached in modifiedPlans:
+            leaving.update(detached)
+        wereValid = set()
+        for targets in newTargets + [i[4] for i in modifiedPlans]:
+            for target in targets:
+                if type(target) == int:
+                    continue
+                if len(self._edgeTrackersById[target].getLastValidFaceIds()) == 2:
+                    wereValid.add(target)
+
+        # The deleted Faces are released, keeping their signature. It is built here, since
+        # nothing may fail once the batch is being applied.
+        signatures = [self._signature(i) for i in deleted]
+
+        if not self._stats is None:
+            for name, number in calls.items():
+                self._stats.count(name, number)
+
+        # Everything checks out - apply the batch.
+        for faceTracker, signature in zip(deleted, signatures):
+            # The name stays resolvable, since Edges may still refer to it in their last
+            # valid Faces, but the OCCFace itself is no longer part of the shape.
+            faceId = faceTracker.getId()
+            self._unindexFace(faceTracker)
+            self._clearFaceFromEdgeTrackers(faceId)
+            self._deadFaces[faceId] = True
+            if not signature is None:
+                self._ownFace(faceId).release(signature)
+
+        for faceId, newOCCFace, edgeList, keptEdges, addedTargets, detached in modifiedPlans:
+            faceTracker = self._ownFace(faceId)
+            self._unindexFace(faceTracker)
+            faceTracker.updateOCCFace(newOCCFace, *edgeList)
+            self._indexFace(faceTracker)
+            for edgeId in detached:
+                self._detachFace(edgeId, faceId)
+
+        for edgeId, OCCEdge in restored.items():
+            self._restoreEdge(edgeId, OCCEdge)
+
+        # A new Edge that ends up shared by two modified Faces which already shared an Edge
+        # is a piece of that Edge, and is named after it
+        newPairs = {}
+        for faceId, newOCCFace, edgeList, keptEdges, addedTargets, detached in modifiedPlans:
+            for target in addedTargets:
+                if type(target) == int:
+                    newPairs.setdefault(target, []).append(faceId)
+        for targets in newTargets:
+            for target in targets:
+                if type(target) == int:
+                    newPairs.setdefault(target, []).append(None)
+
+        newIds = []
+        for index, OCCEdge in enumerate(newEdges):
+            faceIds = newPairs.get(index, ())
+            parent = None
+            if len(faceIds) == 2 and not None in faceIds:
+                parent = self._lineageParent(self._facePairKey(*faceIds), pairsBefore,
+                                             leaving)
+            if parent is None:
+                edgeTracker = TrackedEdge(OCCEdge, self._makeId('Edge'))
+            else:
+                edgeTracker = TrackedEdge(OCCEdge, self._makeSubId(parent), parent)
+                self._linkChild(parent, edgeTracker.getId())
+            self._indexEdgeTracker(edgeTracker)
+            newIds.append(edgeTracker.getId())
+
+        def attach(faceTracker, edgeIds, targets):
+            edgeIds = list(edgeIds)
+            for target in targets:
+                if type(target) == int:
+                    target = newIds[target]
+                self._attachFace(target, faceTracker)
+                edgeIds.append(target)
+            if len(edgeIds) > 0:
+                self._edgesByFace[faceTracker.getId()] = tuple(edgeIds)
+            else:
+                self._edgesByFace.pop(faceTracker.getId(), None)
+
+        faceNames = []
+        newFaceIds = []
+        for OCCFace, (edges, edgeKeys), targets in zip(newFaces, newEdgeLists, newTargets):
+            faceTracker = self._trackFace(OCCFace, edges, edgeKeys)
+            faceNames.append(faceTracker.getName())
+            newFaceIds.append(faceTracker.getId())
+            attach(faceTracker, [], targets)
+
+        for faceId, newOCCFace, edgeList, keptEdges, addedTargets, detached in modifiedPlans:
+            attach(self._faceTrackersById[faceId], keptEdges, addedTargets)
+
+        # An existing Edge that is shared for the first time, by Faces that shared an Edge
+        # before, is a piece of that Edge too
+        for pairKey, before in pairsBefore.items():
+            parent = self._lineageParent(pairKey, pairsBefore, leaving)
+            if parent is None:
+                continue
+            for edgeId in self._edgesByFacePair.get(pairKey, ()):
+                edgeTracker = self._edgeTrackersById[edgeId]
+                if not (edgeId in before or edgeId in wereValid or
+                        not edgeTracker.getParent() is None):
+                    self._ownEdge(edgeId).setParent(parent)
+                    self._linkChild(parent, edgeId)
+
+        faceParents = [(faceId, parent) for faceId, parent in zip(newFaceIds, parentIds)
+                       if not parent is None]
+        faceMerges = [(faceTracker.getId(), self._findFaceTracker(OCCFace).getId())
+                      for faceTracker, OCCFace in zip(deleted, mergedInto)
+                      if not OCCFace is None]
+        self._linkFaces(faceParents, faceMerges)
+
+        if not self._journal is None:
+            self._journal.recordBatch(self, newFaceIds, [i[0].getId() for i in modified],
+                                      [i.getId() for i in deleted], faceParents, faceMerges)
+        if not self._versioned:
+            self._representatives = {}
+        if self._isMostlyDead():
+            self._compact()
+        if self._versioned:
+            self._saveVersion()
+        return faceNames
+
+    def _addLazily(self, newFaces, newEdgeLists, parentIds, calls):
+        '''Adds newFaces without creating their `TrackedEdge`s, see `_applyChanges`.
+
+        Every shape key that is new to the tracker gets the next EdgeId straight away, so
+        the names are the same as when adding the Faces eagerly, whatever order the Edges
+        are materialized in. Only if shape keys collide, i.e. Edges that are not isSame
+        share a key, are the further ones named after the first, e.g. Edge004a.'''
+        # shapeKey -> the OCCEdges of the new Faces with that key
+        occurrences = {}
+        for edges, edgeKeys in newEdgeLists:
+            for OCCEdge, key in zip(edges, edgeKeys):
+                occurrences.setdefault(key, []).append(OCCEdge)
+        for key, OCCEdges in occurrences.items():
+            # Only a key that more than two Faces include needs a closer look
+            pendingFaces = self._lazyEdges.get(key, (None, ()))[1]
+            counts = [[self._edgeTrackersById[i].getOCCEdge(),
+                       len(self._edgeTrackersById[i].getFaceIds())]
+                      for i in self._edgeIndex.get(key, ())]
+            if len(OCCEdges) + len(pendingFaces) + sum([i[1] for i in counts]) <= 2:
+                continue
+            for faceId in pendingFaces:
+                faceTracker = self._faceTrackersById[faceId]
+                for OCCEdge, edgeKey in zip(faceTracker.getEdges(),
+                                            faceTracker.getEdgeKeys(self._shapeKey)):
+                    if edgeKey == key:
+                        OCCEdges = [OCCEdge] + OCCEdges
+            for OCCEdge in OCCEdges:
+                for count in counts:
+                    if count[0] is None:
+                        continue
+                    calls['isSame'] += 1
+                    if count[0].isSame(OCCEdge):
+                        count[1] += 1
+                        break
+                else:
+                    count = [OCCEdge, 1]
+                    counts.append(count)
+                if count[1] > 2:
+                    msg = 'Only two Faces may share a given Edge.'
+                    raise ValueError(msg)
+
+        if not self._stats is None:
+            for name, number in calls.items():
+                self._stats.count(name, number)
+
+        faceNames = []
+        newFaceIds = []
+        for OCCFace, (edges, edgeKeys) in zip(newFaces, newEdgeLists):
+            faceTracker = self._trackFace(OCCFace, edges, edgeKeys)
+            faceNames.append(faceTracker.getName())
+            faceId = faceTracker.getId()
+            newFaceIds.append(faceId)
+            for key in edgeKeys:
+                reserved, faceIds = self._lazyEdges.get(key, (None, ()))
+                if len(faceIds) == 0 and not key in self._edgeIndex:
+                    reserved = self._makeId('Edge')
+                    self._lazyKeys[reserved] = key
+                self._lazyEdges[key] = (reserved, faceIds + (faceId,))
+
+        faceParents = [(faceId, parent) for faceId, parent in zip(newFaceIds, parentIds)
+                       if not parent is None]
+        self._linkFaces(faceParents, [])
+        if not self._journal is None:
+            self._journal.recordBatch(self, newFaceIds, [], [], faceParents, [])
+        self._representatives = {}
+        return faceNames
+
+    def materializeEdges(self):
+        '''Creates the `TrackedEdge`s that a lazy tracker has not created yet.
+
+        There is no need to call this, every method that needs an Edge materializes it.
+        It is only useful to pay for all of them up front.'''
+        self._materializeAll()
+
+    def _materializeAll(self):
+        for key in list(self._lazyEdges):
+            if key in self._lazyEdges:
+                self._materialize(key)
+
+    def _materializeFor(self, faceIds, edgeLists):
+        '''Materializes the pending Edges that a batch needs to see.
+
+        Those are the Edges of the Faces faceIds that it modifies or deletes, and the ones
+        with the keys of the Edges it attaches, given as (edges, keys) in edgeLists, since
+        those may be isSame to them. Any other pending Edge stays pending.'''
+        keys = []
+        for faceId in faceIds:
+            keys.extend(self._faceTrackersById[faceId].getEdgeKeys(self._shapeKey))
+        for edges, edgeKeys in edgeLists:
+            keys.extend(edgeKeys)
+        for key in keys:
+            if key in self._lazyEdges:
+                self._materialize(key)
+
+    def _finalFaces(self, key):
+        '''Returns the sorted ids of the Faces that will include the Edges with key'''
+        faceIds = list(self._lazyEdges[key][1])
+        for edgeId in self._edgeIndex.get(key, ()):
+            faceIds.extend(self._edgeTrackersById[edgeId].getFaceIds())
+        return tuple(sorted(faceIds))
+
+    def _materialize(self, key):
+        '''Materializes the Edges with key, together with the other pending Edges between
+        the same two Faces, so that those always become valid in the same order'''
+        faceIds = self._finalFaces(key)
+        if len(faceIds) == 2 and faceIds[0] != faceIds[1]:
+            self._materializeBetween(faceIds)
+        if key in self._lazyEdges:
+            self._materializeKey(key)
+
+    def _materializeBetween(self, pairKey):
+        '''Materializes the pending Edges shared by the two Faces of pairKey.
+
+        They are materialized in the order of the Edges of the newer Face, which is the
+        order in which they became valid when that Face was added.'''
+        if len(self._lazyEdges) == 0 or not pairKey[1] in self._faceTrackersById:
+            return
+        faceTracker = self._faceTrackersById[pairKey[1]]
+        for key in faceTracker.getEdgeKeys(self._shapeKey):
+            if key in self._lazyEdges and self._finalFaces(key) == pairKey:
+                self._materializeKey(key)
+
+    def _materializeKey(self, key):
+        '''Creates or finds the `TrackedEdge`s of key, and attaches their pending Faces'''
+        reserved, faceIds = self._lazyEdges.pop(key)
+        if reserved is None:
+            anchor = self._edgeIndex[key][0]
+        else:
+            anchor = reserved
+            del self._lazyKeys[reserved]
+        for faceId in sorted(set(faceIds)):
+            faceTracker = self._faceTrackersById[faceId]
+            for OCCEdge, edgeKey in zip(faceTracker.getEdges(),
+                                        faceTracker.getEdgeKeys(self._shapeKey)):
+                if edgeKey != key:
+                    continue
+                edgeTracker = self._isTrackedEdge(OCCEdge, key)
+                if not edgeTracker is None and edgeTracker.getOCCEdge() is None:
+                    self._restoreEdge(edgeTracker.getId(), OCCEdge)
+                if edgeTracker is None:
+                    if reserved is None:
+                        edgeTracker = TrackedEdge(OCCEdge, self._makeSubId(anchor))
+                    else:
+                        edgeTracker = TrackedEdge(OCCEdge, reserved)
+                        reserved = None
+                    self._indexEdgeTracker(edgeTracker)
+                self._attachFace(edgeTracker.getId(), faceTracker)
+                self._addToBucket(self._edgesByFace, faceId, edgeTracker.getId())
+        self._representatives = {}
+
+    def _isMostlyDead(self):
+        '''True if the share of dead trackers is past deadRatio'''
+        if self._deadRatio is None:
+            return False
+        dead = len(self._deadFaces) + len(self._deadEdges)
+        total = len(self._faceTrackersById) + len(self._edgeTrackersById)
+        return dead > 0 and dead > self._deadRatio * total
+
+    def compact(self):
+        '''Drop the tombstoned Faces and Edges.
+
+        Deleted Faces are forgotten. An Edge without Faces is kept as a tombstone without
+        an OCCEdge as long as both of its last valid Faces are still tracked, since they may
+        share an Edge again and `getEdgeByName` would then find it. Otherwise it can never
+        be resolved again and is dropped as well. A tombstone goes when one of its Faces is
+        deleted and compacted. Names are never reused.
+
+        Only one tombstone is kept for each pair of Faces: the first one. A later Edge
+        between the same two Faces, e.g. the one a recompute replaced, is dropped instead,
+        and its name no longer resolves. So however often a shape is recomputed there are
+        never more tombstones than pairs of Faces that shared an Edge.
+
+        A compacted Edge can no longer be matched by its OCCEdge, so if the same OCCEdge
+        shows up again it gets a new name. An attached journal is compacted too, so that
+        replaying it gives the same result. A versioned tracker saves a new version.'''
+        self._compact()
+        if self._versioned:
+            self._saveVersion()
+
+    def _compact(self):
+        # The Edges of deleted Faces were materialized by the batch that deleted them. Only
+        # a pending Edge that is named after a dead one with its key needs to be, before
+        # that one is dropped, see `_materializeKey`.
+        for edgeId in list(self._deadEdges):
+            key = self._edgeKey(self._edgeTrackersById[edgeId])
+            if key in self._lazyEdges:
+                self._materialize(key)
+        deadFaces = list(self._deadFaces)
+        for faceId in deadFaces:
+            del self._faceTrackersById[faceId]
+            del self._deadFaces[faceId]
+            self._ownedFaces.discard(faceId)
+
+        for edgeId in list(self._deadEdges):
+            del self._deadEdges[edgeId]
+            self._edgeFingerprints.pop(edgeId, None)
+            edgeTracker = self._edgeTrackersById[edgeId]
+            signature = edgeTracker.getSignature()
+            OCCEdge = edgeTracker.getOCCEdge()
+            if not OCCEdge is None:
+                signature = ShapeSignature.fromShape(OCCEdge, self._shapeKey)
+                if not self._edgeSpace is None and edgeId in self._edgeSpace:
+                    self._edgeSpace.remove(edgeId)
+            if not signature is None:
+                self._removeFromBucket(self._edgeIndex, signature.getKey(), edgeId)
+            lastValidFaceIds = edgeTracker.getLastValidFaceIds()
+            if (len(lastValidFaceIds) == 2 and
+                    all(i in self._faceTrackersById for i in lastValidFaceIds) and
+                    self._pairTombstone(lastValidFaceIds) is None):
+                tombstone = TrackedEdge(None, edgeId, edgeTracker.getParent())
+                tombstone.restoreFaces([], lastValidFaceIds)
+                tombstone.release(signature)
+                self._edgeTrackersById[edgeId] = tombstone
+                self._ownedEdges.add(edgeId)
+                for faceId in lastValidFaceIds:
+                    self._addToBucket(self._edgeTombstones, faceId, edgeId)
+            else:
+                self._unlinkLineage(edgeTracker)
+                del self._edgeTrackersById[edgeId]
+                self._ownedEdges.discard(edgeId)
+
+        for faceId in deadFaces:
+            for edgeId in self._edgeTombstones.pop(faceId, ()):
+                self._unlinkLineage(self._edgeTrackersById[edgeId])
+                edgeTracker = self._edgeTrackersById.pop(edgeId)
+                self._ownedEdges.discard(edgeId)
+                for otherId in edgeTracker.getLastValidFaceIds():
+                    self._removeFromBucket(self._edgeTombstones, otherId, edgeId)
+
+        self._edgeForward = {}
+        if not self._versioned:
+            self._representatives = {}
+        if not self._journal is None:
+            self._journal.compact(self)
+
+    def _pairTombstone(self, faceIds):
+        '''Returns the id of the tombstone whose last valid Faces are faceIds, or None'''
+        pairKey = self._facePairKey(*faceIds)
+        for edgeId in self._edgeTombstones.get(faceIds[0], ()):
+            tombstoneFaces = self._edgeTrackersById[edgeId].getLastValidFaceIds()
+            if self._facePairKey(*tombstoneFaces) == pairKey:
+                return edgeId
+        return None
+
+    def _stageChangedFace(self, OCCFace, changed):
+        '''Resolves the tracker of a modified or deleted OCCFace and records it in changed'''
+        faceTracker = self._getFaceTracker(OCCFace)
+        if faceTracker.getId() in changed:
+            msg = 'A given Face may only be modified or deleted once per batch.'
+            raise ValueError(msg)
+        changed[faceTracker.getId()] = faceTracker
+        return faceTracker
@@ -0,0 +1,241 @@
+from collections import Counter
+from PyTopoNamer.TopoTracker import hashCodeKey
+from PyTopoNamer.TrackedFace import TrackedFace
+from PyTopoNamer.TrackedEdge import TrackedEdge
+from PyTopoNamer.NamingTable import NamingTable
+from PyTopoNamer.NameFormatter import names
+
+class TopoTrackerView(object):
+    '''A read-only `TopoTracker` backed by a memory-mapped `NamingTable`.
+
+    This is meant for resolving a handful of names in a big model, e.g. to regenerate a
+    single chamfer, without loading the whole naming state. Opening the view only maps
+    the file. `TrackedFace`s and `TrackedEdge`s are built the first time `getEdgeName` or
+    `getEdgeByName` needs them and are cached afterwards, so memory grows with the number
+    of queries rather than with the size of the model.
+
+    The live OCCFaces are only needed by `getEdgeByName`. They are indexed by shape key
+    the first time it is called, and a Face is only resolved to an OCCFace whose Edges
+    match its Edges in the table, see `_liveFace`.
+
+    The table holds the lineage of the Faces and Edges too, so `getEdgeByName` follows it
+    just like `TopoTracker.getEdgeByName` does.'''
+
+    def __init__(self, path, OCCFaces, shapeKey=hashCodeKey):
+        self._table = NamingTable(path)
+        self._OCCFaces = OCCFaces
+        self._shapeKey = shapeKey
+        self._faceByKey = None
+        self._claimedFaces = set()
+        self._faceTrackersById = {}
+        self._edgeTrackersById = {}
+
+    def close(self):
+        self._table.close()
+
+    def _liveFace(self, faceId, key):
+        '''Returns the live OCCFace of the Face faceId, whose shape key is key, or None.
+
+        Several OCCFaces may share a key. Only one that no other Face was resolved to, whose
+        Edge keys are those of the Edges of faceId in the table, and that shares an isSame
+        Edge with each Face that faceId shares an Edge with, counts. A Face that is not
+        resolved yet is stood in for by the live OCCFaces with its key.'''
+        if self._faceByKey is None:
+            self._faceByKey = {}
+            for OCCFace in self._OCCFaces:
+                self._faceByKey.setdefault(self._shapeKey(OCCFace), []).append(OCCFace)
+        # The table has no Edge list per Face, so only the keys of a candidate's own Edges
+        # can be checked. The candidate with the most Edges is the one that has them all.
+        candidates = [i for i in self._faceByKey.get(key, ())
+                      if not id(i) in self._claimedFaces and self._matches(faceId, i)]
+        if len(candidates) == 0:
+            return None
+        OCCFace = max(candidates, key=lambda face: len(face.Edges))
+        self._claimedFaces.add(id(OCCFace))
+        return OCCFace
+
+    def _matches(self, faceId, OCCFace):
+        edges = list(OCCFace.Edges)
+        edgeKeys = Counter([self._shapeKey(i) for i in edges])
+        for key, count in edgeKeys.items():
+            records = [i for i in self._table.findEdgesByKey(key) if faceId in i[2]]
+            if sum([i[2].count(faceId) for i in records]) != count:
+                return False
+            for record in records:
+                others = [i for i in record[2] if i != faceId]
+                if len(others) == 0:
+                    continue
+                if others[0] in self._faceTrackersById:
+                    otherEdges = self._liveEdges(others[0], key)
+                else:
+                    # Not resolved yet: any live Face with its key will do
+                    otherRecord = self._table.findFace(others[0])
+                    otherFaces = self._faceByKey.get(otherRecord[1], ())
+                    otherEdges = [i for face in otherFaces if not face is OCCFace
+                                  for i in face.Edges if self._shapeKey(i) == key]
+                if not any(edge.isSame(other) for edge in edges
+                           if self._shapeKey(edge) == key for other in otherEdges):
+                    return False
+        return True
+
+    def _getFaceTracker(self, faceId):
+        faceTracker = self._faceTrackersById.get(faceId)
+        if faceTracker is None:
+            record = self._table.findFace(faceId)
+            if record is None:
+                msg = '{} is not a valid FaceName. There is no tracker with that name'
+                raise ValueError(msg.format(names.format('Face', faceId)))
+            OCCFace = None
+            if not record[1] is None:
+                OCCFace = self._liveFace(faceId, record[1])
+            faceTracker = TrackedFace(OCCFace, faceId)
+            self._faceTrackersById[faceId] = faceTracker
+        return faceTracker
+
+    def _materializeEdge(self, record, OCCEdge=None):
+        edgeId, key, faceIds, lastValidFaceIds = record
+        edgeTracker = self._edgeTrackersById.get(edgeId)
+        if edgeTracker is None:
+            edgeTracker = TrackedEdge(OCCEdge, edgeId)
+            edgeTracker.restoreFaces(faceIds, lastValidFaceIds)
+            self._edgeTrackersById[edgeId] = edgeTracker
+        return edgeTracker
+
+    def _getEdgeTracker(self, EdgeName):
+        base, edgeId = names.parse(EdgeName)
+        record = None
+        if base == 'Edge':
+            record = self._table.findEdge(edgeId)
+        if record is None:
+            msg = '{} is not a valid EdgeName. There is no tracker with that name'
+            raise ValueError(msg.format(EdgeName))
+        return self._materializeEdge(record)
+
+    def _liveEdges(self, faceId, key=None):
+        '''Returns the current OCCEdges of the Face faceId, optionally only those with key'''
+        faceTracker = self._getFaceTracker(faceId)
+        if key is None:
+            return list(faceTracker.getEdges())
+        edgeKeys = faceTracker.getEdgeKeys(self._shapeKey)
+        return [i for i, edgeKey in zip(faceTracker.getEdges(), edgeKeys) if edgeKey == key]
+
+    def getEdgeName(self, OCCEdge):
+        '''Returns the topological name of OCCEdge'''
+        key = self._shapeKey(OCCEdge)
+        for record in self._table.findEdgesByKey(key):
+            faceIds = record[2]
+            if len(faceIds) != 2:
+                continue
+            # Several Edges may share a key. Only the one that is isSame to OCCEdge counts.
+            for liveEdge in self._liveEdges(faceIds[0], key):
+                if liveEdge.isSame(OCCEdge):
+                    return self._materializeEdge(record, liveEdge).getName()
+        msg = 'This edgeName is invalid - no two Faces share it'
+        raise ValueError(msg)
+
+    def _pairEdges(self, faceId0, faceId1):
+        '''Returns (EdgeId, OCCEdge) for each Edge that the Faces faceId0 and faceId1 share
+        now, sorted by id like `TopoTracker._edgesByFacePair`'''
+        pair = sorted([faceId0, faceId1])
+        edgesB = {}
+        for OCCEdge in self._liveEdges(faceId1):
+            edgesB.setdefault(self._shapeKey(OCCEdge), []).append(OCCEdge)
+        # Several Edges of the pair may share a key: they are matched up in order
+        ranks = {}
+        found = []
+        for OCCEdge in self._liveEdges(faceId0):
+            key = self._shapeKey(OCCEdge)
+            if not any(OCCEdge.isSame(i) for i in edgesB.get(key, [])):
+                continue
+            edgeIds = sorted([i[0] for i in self._table.findEdgesByKey(key)
+                              if sorted(i[2]) == pair])
+            rank = ranks.get(key, 0)
+            ranks[key] = rank + 1
+            if rank < len(edgeIds):
+                found.append((edgeIds[rank], OCCEdge))
+        return sorted(found, key=lambda i: i[0])
+
+    def _descendants(self, edgeId):
+        '''Returns the ids of every descendant of the Edge edgeId, depth first'''
+        found = []
+        stack = list(reversed(self._table.findEdgeChildren(edgeId)))
+        while len(stack) > 0:
+            childId = stack.pop()
+            found.append(childId)
+            stack.extend(reversed(self._table.findEdgeChildren(childId)))
+        return found
+
+    def _isLiveFace(self, faceId):
+        record = self._table.findFace(faceId)
+        return not record is None and not record[1] is None
+
+    def _findFace(self, faceId):
+        '''Returns the Face that the merged Face faceId was merged into, see
+        `TopoTracker._findFace`'''
+        steps = 0
+        while True:
+            targetId = self._table.findFaceMerge(faceId)
+            if targetId is None or (steps > 0 and len(self._table.findFaceChildren(faceId)) > 0):
+                return faceId
+            faceId = targetId
+            steps += 1
+
+    def _faceRepresentatives(self, faceId):
+        '''Returns the ids of the current Faces that the Face faceId stands for, see
+        `TopoTracker.getRepresentatives`'''
+        found = []
+        seen = set([faceId])
+        stack = [faceId]
+        while len(stack) > 0:
+            current = stack.pop()
+            following = self._table.findFaceChildren(current)
+            if self._isLiveFace(current):
+                found.append(current)
+            elif not self._table.findFaceMerge(current) is None:
+                following.insert(0, self._findFace(current))
+            for nextId in reversed(following):
+                if not nextId in seen:
+                    seen.add(nextId)
+                    stack.append(nextId)
+        return found
+
+    def getEdgeByName(self, edgeName):
+        '''Given edgeName, returns the appropriate OCCEdge(s). See `TopoTracker.getEdgeByName`
+
+        The Edge itself, if it is still valid, followed by its valid descendants. If there
+        are none, the Edges currently shared by the representatives of its last valid
+        Faces.'''
+        edgeTracker = self._getEdgeTracker(edgeName)
+        faces = edgeTracker.getLastValidFaceIds()
+        if len(faces) != 2:
+            msg = 'This Edge in invalid: it was never shared by two Faces'
+            raise ValueError(msg)
+
+        edges = []
+        for edgeId in [edgeTracker.getId()] + self._descendants(edgeTracker.getId()):
+            faceIds = self._table.findEdge(edgeId)[2]
+            if len(faceIds) == 2:
+                edges.extend([OCCEdge for pairEdge, OCCEdge in self._pairEdges(*faceIds)
+                              if pairEdge == edgeId])
+        if len(edges) == 0:
+            for faceId0 in self._faceRepresentatives(faces[0]):
+                for faceId1 in self._faceRepresentatives(faces[1]):
+                    for edgeId, OCCEdge in self._pairEdges(faceId0, faceId1):
+                        if not any(OCCEdge is i for i in edges):
+                            edges.append(OCCEdge)
+
+        if len(edges) == 0:
+            faces = edgeTracker.getLastValidFaceNames()
+            msg = 'There are no Edges that share these two faces: {}, {}'.format(faces[0], faces[1])
+            raise ValueError(msg)
+        return edges
+
+    def _readOnly(self, *args, **kwargs):
+        msg = 'A TopoTrackerView is read-only'
+        raise ValueError(msg)
+
+    addFace = _readOnly
+    addFaces = _readOnly
+    modifyFace = _readOnly
+    deleteFace = _readOnly
+    transaction = _readOnly
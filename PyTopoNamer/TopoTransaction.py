@@ -0,0 +1,79 @@
+class TopoTransaction(object):
+
+    """Stages Face changes for a `TopoTracker` and applies them in one step.
+
+    Nothing happens to the tracker until `commit` is called. At that point the whole batch
+    is checked against the tracker's current state, and it is either applied completely or,
+    if a check fails, not at all. `rollback` simply discards the staged changes.
+
+    A TopoTransaction can also be used as a context manager, in which case it is committed
+    when the block exits normally and rolled back if the block raises."""
+
+    def __init__(self, tracker):
+        self._tracker = tracker
+        self._newFaces = []
+        self._newParents = []
+        self._modifiedFaces = []
+        self._deletedFaces = []
+        self._mergedInto = []
+        self._closed = False
+
+    def _checkOpen(self):
+        if self._closed:
+            msg = 'This transaction has already been committed or rolled back'
+            raise ValueError(msg)
+
+    def addFace(self, OCCFace, parent=None):
+        '''Stage OCCFace as a new Face. parent is the tracked OCCFace it was split off.'''
+        self._checkOpen()
+        self._newFaces.append(OCCFace)
+        self._newParents.append(parent)
+
+    def modifyFace(self, oldOCCFace, newOCCFace):
+        '''Stage the modification of the tracked oldOCCFace into newOCCFace'''
+        self._checkOpen()
+        self._modifiedFaces.append((oldOCCFace, newOCCFace))
+
+    def deleteFace(self, OCCFace, mergedInto=None):
+        '''Stage the deletion of the tracked OCCFace.
+
+        mergedInto is the OCCFace it was merged into, if any. It must be part of the shape
+        once the transaction is committed.'''
+        self._checkOpen()
+        self._deletedFaces.append(OCCFace)
+        self._mergedInto.append(mergedInto)
+
+    def commit(self):
+        '''Apply every staged change to the tracker.
+
+        returns the topological names of the new Faces. If the batch is rejected a
+        ValueError is raised, the tracker is left untouched and the transaction stays open
+        so that it may still be rolled back.'''
+        self._checkOpen()
+        names = self._tracker._applyChanges(self._newFaces, self._modifiedFaces,
+                                            self._deletedFaces, self._newParents,
+                                            self._mergedInto)
+        self._closed = True
+        return names
+
+    def rollback(self):
+        '''Discard every staged change'''
+        self._checkOpen()
+        self._newFaces = []
+        self._newParents = []
+        self._modifiedFaces = []
+        self._deletedFaces = []
+        self._mergedInto = []
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if self._closed:
+            return False
+        if excType is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
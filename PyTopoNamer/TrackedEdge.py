@@ -1,4 +1,6 @@
 from PyTopoNamer.TrackedOCCObj import TrackedOCCObj
+from PyTopoNamer.TrackedFace import TrackedFace
+from PyTopoNamer.NameFormatter import names
 
 class TrackedEdge(TrackedOCCObj):
 
@@ -6,12 +8,26 @@ class TrackedEdge(TrackedOCCObj):
     
     Also keeps track of whether or not this Edge is 'valid'. A 'valid' Edge is one that
     has two faces which share it. If one or both of these Faces no longer exist, the Edge
-    is invalid"""
+    is invalid
+
+    The Faces are stored by id (see `NameFormatter`). Methods that take a Face accept
+    either its name or its id."""
+
+    __slots__ = ('_faceIds', '_lastValidFaceIds')
+
+    _base = 'Edge'
 
     def __init__(self, occEdge, edgeName, parent=None):
         super(TrackedEdge, self).__init__(occEdge, edgeName, parent)
-        self._faceNames = []
-        self._lastValidFaceNames = []
+        self._faceIds = []
+        # A tuple, so that the (common) never-valid Edge shares the empty tuple
+        self._lastValidFaceIds = ()
+
+    def clone(self):
+        other = super(TrackedEdge, self).clone()
+        other._faceIds = self._faceIds[:]
+        other._lastValidFaceIds = self._lastValidFaceIds
+        return other
 
     def _checkEdges(self, occEdges):
         for occEdge in occEdges:
@@ -19,45 +35,61 @@ class TrackedEdge(TrackedOCCObj):
                 return True
         return False
 
+    def _toFaceId(self, faceName):
+        if type(faceName) == type('') or type(faceName) == type(()):
+            return TrackedFace._toId(faceName)
+        msg = 'faceName must be the actual topological name of the Face you are checking for'
+        raise ValueError(msg)
+
     def getOCCEdge(self):
         '''Convenience method'''
         return self.getOCCObj()
 
     def hasFace(self, faceName):
-        if type(faceName) == type(''):
-            return faceName in self._faceNames
-        else:
-            msg = 'faceName must be the actual topological name of the Face you are checking for'
-            raise ValueError(msg)
+        return self._toFaceId(faceName) in self._faceIds
 
     def isValid(self):
         '''Returns True if the Edge has two faces that share it.'''
-        return len(self._faceNames) == 2
+        return len(self._faceIds) == 2
 
-    def addFace(self, trackedFace):
+    def addFace(self, trackedFace, trusted=False):
         '''Check if this TrackedEdge has a common Edge with trackedFace
         
-        If it does, we will add the name of the face to _faceNames. If it doesn't, then it
-        returns false and changes nothing internally '''
+        If it does, we will add the id of the face to _faceIds. If it doesn't, then it
+        returns false and changes nothing internally
+
+        A caller that already matched this Edge against the Edges of trackedFace, like
+        `TopoTracker`, passes trusted=True to skip checking it again.'''
 
-        if not self._checkEdges(trackedFace.getOCCFace().Edges):
+        if not trusted and not self._checkEdges(trackedFace.getEdges()):
             msg = 'Cannot add a face that does not contain this Edge'
             raise ValueError(msg)
-        elif len(self._faceNames) == 2:
+        elif len(self._faceIds) == 2:
             msg = 'Only two Faces may share a given Edge.'
             raise ValueError(msg)
 
-        self._faceNames.append(trackedFace.getName())
-        if len(self._faceNames) == 2:
-            self._lastValidFaceNames = self._faceNames[:]
+        self._faceIds.append(trackedFace.getId())
+        if len(self._faceIds) == 2:
+            self._lastValidFaceIds = tuple(self._faceIds)
+
 
+    def restoreFaces(self, faceIds, lastValidFaceIds):
+        '''Set the Face ids directly, e.g. when loading a snapshot. Nothing is checked.'''
+        self._faceIds = list(faceIds)
+        self._lastValidFaceIds = tuple(lastValidFaceIds)
 
     def delFace(self, faceName):
-        index = self._faceNames.index(faceName)
-        self._faceNames.pop(index)
+        index = self._faceIds.index(self._toFaceId(faceName))
+        self._faceIds.pop(index)
+
+    def getFaceIds(self):
+        return self._faceIds[:]
 
     def getFaceNames(self):
-        return self._faceNames[:]
+        return [names.format('Face', i) for i in self._faceIds]
+
+    def getLastValidFaceIds(self):
+        return list(self._lastValidFaceIds)
 
     def getLastValidFaceNames(self):
-        return self._lastValidFaceNames[:]
+        return [names.format('Face', i) for i in self._lastValidFaceIds]
@@ -2,13 +2,61 @@ from PyTopoNamer.TrackedOCCObj import TrackedOCCObj
 
 class TrackedFace(TrackedOCCObj):
     '''This class will hold instances of a tracked OpenCascade Face object
-    
+
     It will also include enough information to determine whether or not there are other
-    tracked faces that have a common OpenCascade Edge with this face'''
+    tracked faces that have a common OpenCascade Edge with this face
+
+    Every access to an OCCFace's `Edges` builds a fresh list of Edges, so the Edges and
+    their shape keys are read once and cached until the OCCFace is updated. The tracker
+    passes in the ones it already read while staging a batch, see `TopoTracker`.'''
+
+    __slots__ = ('_edges', '_edgeKeys')
+
+    _base = 'Face'
+
+    def __init__(self, occFace, faceName, parent=None, edges=None, edgeKeys=None):
+        super(TrackedFace, self).__init__(occFace, faceName, parent)
+        self._setEdges(edges, edgeKeys)
+
+    def _setEdges(self, edges, edgeKeys):
+        self._edges = None if edges is None else tuple(edges)
+        self._edgeKeys = None if edgeKeys is None else tuple(edgeKeys)
+
+    def clone(self):
+        other = super(TrackedFace, self).clone()
+        other._edges = self._edges
+        other._edgeKeys = self._edgeKeys
+        return other
 
     def getOCCFace(self):
         '''Convenience function'''
         return self.getOCCObj()
 
-    def updateOCCFace(self, newOCCFace):
-        self._occObj = newOCCFace
+    def getEdges(self):
+        '''Returns the OCCEdges of the OCCFace as a tuple, reading them only once.
+
+        Those of a released Face are not cached, so that they are not kept alive.'''
+        if self._edges is None:
+            occFace = self.getOCCFace()
+            if occFace is None:
+                return ()
+            if self.isReleased():
+                return tuple(occFace.Edges)
+            self._edges = tuple(occFace.Edges)
+        return self._edges
+
+    def getEdgeKeys(self, shapeKey):
+        '''Returns the shape keys of `getEdges`, computing them with shapeKey only once'''
+        if self._edgeKeys is None:
+            self._edgeKeys = tuple([shapeKey(i) for i in self.getEdges()])
+        return self._edgeKeys
+
+    def updateOCCFace(self, newOCCFace, edges=None, edgeKeys=None):
+        '''Track newOCCFace from now on. edges and edgeKeys, if given, are its cached Edges.'''
+        self.restore(newOCCFace)
+        self._setEdges(edges, edgeKeys)
+
+    def release(self, signature):
+        '''See `TrackedOCCObj.release`. The cached OCCEdges are released too.'''
+        super(TrackedFace, self).release(signature)
+        self._edges = None
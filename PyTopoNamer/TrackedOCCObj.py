@@ -1,19 +1,103 @@
+import weakref
+from PyTopoNamer.NameFormatter import names
+
+def _noOCCObj():
+    '''Stands in for the weak reference of a released object that does not support them'''
+    return None
+
 class TrackedOCCObj(object):
-    '''This class will be the base class fro Tracked OCC Objects '''
+    '''This class will be the base class fro Tracked OCC Objects
+
+    A model may hold hundreds of thousands of these, so they use __slots__ rather than a
+    per-instance __dict__. Subclasses must declare their own __slots__ too.
+
+    The name is stored as an integer id (see `NameFormatter`) and only formatted into a
+    string by `getName`. Subclasses set `_base` to the prefix of their names.
+
+    Once the OCC object is superseded the tracker can `release` it: the strong reference
+    is replaced by a weak one and a `ShapeSignature`, so that the old B-rep data is freed
+    as soon as nothing else uses it.'''
+
+    __slots__ = ('_occObj', '_id', '_parent', '_weakOCCObj', '_signature')
+
+    _base = 'Object'
 
     def __init__(self, occObject, name, parent=None):
+        '''name may be either the topological name or its id'''
         self._occObj = occObject
-        self._name = name
+        self._id = self._toId(name)
         self._parent = parent
+        self._weakOCCObj = None
+        self._signature = None
+
+    @classmethod
+    def _toId(cls, name):
+        '''Returns the id for name, which may be a name string or already an id'''
+        if type(name) == type(''):
+            base, nameId = names.parse(name)
+            if base != cls._base:
+                msg = '{} is not a valid name for a {}'.format(name, cls.__name__)
+                raise ValueError(msg)
+            return nameId
+        elif type(name) == type(0):
+            return (name,)
+        return tuple(name)
+
+    def clone(self):
+        '''Returns a copy of this tracker that can be changed without affecting this one'''
+        other = self.__class__.__new__(self.__class__)
+        other._occObj = self._occObj
+        other._id = self._id
+        other._parent = self._parent
+        other._weakOCCObj = self._weakOCCObj
+        other._signature = self._signature
+        return other
 
     def getOCCObj(self):
-        return self._occObj
+        '''Returns the OCC object. For a released one, None once it has been freed.'''
+        if self._weakOCCObj is None:
+            return self._occObj
+        return self._weakOCCObj()
+
+    def release(self, signature):
+        '''Stop holding on to the OCC object, keeping signature to describe it instead.
+
+        getOCCObj keeps returning the object for as long as something else keeps it alive,
+        provided it supports weak references.'''
+        occObject = self.getOCCObj()
+        self._occObj = None
+        self._signature = signature
+        self._weakOCCObj = _noOCCObj
+        if not occObject is None:
+            try:
+                self._weakOCCObj = weakref.ref(occObject)
+            except TypeError:
+                pass
+
+    def restore(self, occObject):
+        '''Hold occObject again, e.g. when a released Edge becomes part of a Face again'''
+        self._occObj = occObject
+        self._weakOCCObj = None
+        self._signature = None
+
+    def isReleased(self):
+        return not self._weakOCCObj is None
+
+    def getSignature(self):
+        '''Returns the `ShapeSignature` kept by `release`, or None'''
+        return self._signature
 
     def getName(self):
-        return self._name
+        return names.format(self._base, self._id)
+
+    def getId(self):
+        return self._id
 
     def getParent(self):
         return self._parent
 
+    def setParent(self, parent):
+        self._parent = parent
+
     def isChildOf(self, parent):
         return parent == self._parent
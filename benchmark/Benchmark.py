@@ -0,0 +1,157 @@
+import json
+import math
+import time
+from PyTopoNamer.TopoNamer import TopoNamer
+from benchmark.ShapeGenerator import ShapeGenerator
+
+class Benchmark(object):
+
+    """Times `TopoNamer` on synthetic shapes of growing size.
+
+    Each scenario builds a shape of a few sizes with `ShapeGenerator` and times, per call:
+        addShape      tracking the whole shape
+        modifyShape   one step of a fillet chain
+        getEdgeName   naming each shared Edge
+        getEdgeByName resolving each of those names again
+    Every measurement is the best of `repeat` runs.
+
+    `run` returns the results as {scenario: {operation: [[size, seconds], ...]}}. The
+    scaling of an operation is the slope of its log-log curve, i.e. the exponent k in
+    time ~ size**k. Note that the size of a boxGrid is n, for n x n boxes.
+
+    `compare` checks results against a stored baseline. The exponents do not depend on
+    the machine, so they are held to a fixed slack. The absolute times do, so they only
+    fail past a generous factor."""
+
+    # scenario -> (sizes, function that builds the shape for a size, fillet steps)
+    # The size of the fillet chain is the number of steps, on a fixed 4 x 4 box grid.
+    SCENARIOS = {
+        'boxGrid': ([2, 4, 8, 16], lambda generator, n: generator.boxGrid(n, n), 10),
+        'prism': ([16, 64, 256, 1024], lambda generator, k: generator.prism(k), 10),
+        'filletChain': ([10, 40, 160], lambda generator, n: generator.boxGrid(4, 4), None),
+    }
+
+    OPERATIONS = ['addShape', 'modifyShape', 'getEdgeName', 'getEdgeByName']
+
+    def __init__(self, repeat=3, scenarios=None):
+        self._repeat = repeat
+        self._scenarios = scenarios
+        if self._scenarios is None:
+            self._scenarios = sorted(self.SCENARIOS)
+
+    def _measure(self, scenario, size):
+        '''Returns {operation: seconds per call} for one run of scenario at size'''
+        sizes, makeShape, steps = self.SCENARIOS[scenario]
+        if steps is None:
+            steps = size
+        generator = ShapeGenerator()
+        feature = makeShape(generator, size)
+        chain = generator.filletChain(feature, steps)
+        namer = TopoNamer()
+        timings = {}
+
+        start = time.perf_counter()
+        namer.addShape(feature)
+        timings['addShape'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for newFaces, modifiedFaces in chain:
+            namer.modifyShape(newFaces=newFaces, modifiedFaces=modifiedFaces)
+        timings['modifyShape'] = (time.perf_counter() - start) / len(chain)
+
+        # Every Edge of the final shape that is shared by two of its Faces
+        faces = list(feature.Shape.Faces)
+        for newFaces, modifiedFaces in chain:
+            replaced = dict([(id(oldFace), newFace) for oldFace, newFace in modifiedFaces])
+            faces = [replaced.get(id(face), face) for face in faces] + newFaces
+        edgeFaces = {}
+        for face in faces:
+            for edge in face.Edges:
+                edgeFaces.setdefault(edge.value, []).append(edge)
+        sharedEdges = [edges[0] for edges in edgeFaces.values() if len(edges) == 2]
+
+        start = time.perf_counter()
+        edgeNames = [namer.getEdgeName(edge) for edge in sharedEdges]
+        timings['getEdgeName'] = (time.perf_counter() - start) / len(sharedEdges)
+
+        start = time.perf_counter()
+        for edgeName in edgeNames:
+            namer.getEdgeByName(edgeName)
+        timings['getEdgeByName'] = (time.perf_counter() - start) / len(edgeNames)
+        return timings
+
+    def run(self, log=None):
+        '''Runs every scenario. log, if given, is called with a line of progress per size.'''
+        results = {}
+        for scenario in self._scenarios:
+            curves = dict([(operation, []) for operation in self.OPERATIONS])
+            for size in self.SCENARIOS[scenario][0]:
+                best = {}
+                for run in range(self._repeat):
+                    for operation, seconds in self._measure(scenario, size).items():
+                        best[operation] = min(seconds, best.get(operation, seconds))
+                for operation in self.OPERATIONS:
+                    curves[operation].append([size, best[operation]])
+                if not log is None:
+                    log('{} {}: {}'.format(scenario, size, self._formatTimings(best)))
+            results[scenario] = curves
+        return results
+
+    def _formatTimings(self, timings):
+        return ', '.join(['{} {:.1f}us'.format(operation, timings[operation] * 1e6)
+                          for operation in self.OPERATIONS])
+
+    @staticmethod
+    def exponent(curve):
+        '''Returns the slope of the log-log curve [[size, seconds], ...] from end to end'''
+        (size0, time0), (size1, time1) = curve[0], curve[-1]
+        return math.log(time1 / time0) / math.log(float(size1) / size0)
+
+    def report(self, results):
+        '''Returns a table of the scaling curves in results'''
+        lines = []
+        for scenario in sorted(results):
+            lines.append(scenario)
+            for operation in self.OPERATIONS:
+                curve = results[scenario][operation]
+                points = '  '.join(['{}: {:.1f}us'.format(size, seconds * 1e6)
+                                    for size, seconds in curve])
+                lines.append('    {:<14} k={:+.2f}   {}'.format(operation, self.exponent(curve),
+                                                                  points))
+        return '\n'.join(lines)
+
+    def compare(self, results, baseline, slack=0.3, factor=3.0):
+        '''Returns a list of the regressions of results against baseline. Empty if none.
+
+        :slack: how much an exponent may grow
+        :factor: how many times slower than the baseline a measurement may be'''
+        regressions = []
+        for scenario in sorted(results):
+            for operation in self.OPERATIONS:
+                curve = results[scenario][operation]
+                baseCurve = baseline.get(scenario, {}).get(operation)
+                if baseCurve is None:
+                    continue
+                newExponent = self.exponent(curve)
+                baseExponent = self.exponent(baseCurve)
+                if newExponent > baseExponent + slack:
+                    msg = '{} {}: scales as size**{:.2f}, the baseline as size**{:.2f}'
+                    regressions.append(msg.format(scenario, operation, newExponent,
+                                                  baseExponent))
+                for (size, seconds), (baseSize, baseSeconds) in zip(curve, baseCurve):
+                    if size == baseSize and seconds > baseSeconds * factor:
+                        msg = '{} {} at {}: {:.1f}us, the baseline took {:.1f}us'
+                        regressions.append(msg.format(scenario, operation, size,
+                                                      seconds * 1e6, baseSeconds * 1e6))
+        return regressions
+
+    @staticmethod
+    def load(path):
+        with open(path) as inFile:
+            return json.load(inFile)
+
+    @staticmethod
+    def save(path, results):
+        with open(path, 'w') as outFile:
+            json.dump(results, outFile, indent=1, sort_keys=True)
+            outFile.write('\n')
@@ -0,0 +1,107 @@
+from test.TestingHelpers import MockObjectMaker
+
+class ShapeGenerator(object):
+
+    """Builds large synthetic solids out of the fake OCC objects used by the tests.
+
+    Every generated solid is closed: each Edge is shared by exactly two Faces, just like a
+    real OpenCascade solid. The shapes are returned as FreeCAD-like features, so that they
+    can be passed straight to `TopoNamer.addShape`."""
+
+    def __init__(self):
+        self._maker = MockObjectMaker()
+
+    def feature(self, faces):
+        '''Returns a fake PartFeature whose Shape has the given Faces'''
+        feature = self._maker.FreeCADFeature()
+        feature.Shape.Faces = faces
+        return feature
+
+    def boxGrid(self, n, m):
+        '''Returns n x m boxes fused into one block, without refining the result.
+
+        The top and the bottom are each split into n x m Faces and every side into one wall
+        Face per box. 1 x 1 is a plain box.'''
+        edge = self._maker.OCCEdge
+        face = self._maker.OCCFace
+        faces = []
+        for level in range(2):
+            # Edges along x at (i, j) -> (i + 1, j) and along y at (i, j) -> (i, j + 1)
+            alongX = [[edge() for j in range(m + 1)] for i in range(n)]
+            alongY = [[edge() for j in range(m)] for i in range(n + 1)]
+            for i in range(n):
+                for j in range(m):
+                    faces.append(face(edges=[alongX[i][j], alongY[i + 1][j],
+                                             alongX[i][j + 1], alongY[i][j]]))
+            if level == 0:
+                top = (alongX, alongY)
+            else:
+                bottom = (alongX, alongY)
+
+        # Walk around the outline. Each box side on it gets a wall between two vertical Edges
+        sides = ([(top[0][i][0], bottom[0][i][0]) for i in range(n)] +
+                 [(top[1][n][j], bottom[1][n][j]) for j in range(m)] +
+                 [(top[0][i][m], bottom[0][i][m]) for i in range(n - 1, -1, -1)] +
+                 [(top[1][0][j], bottom[1][0][j]) for j in range(m - 1, -1, -1)])
+        vertical = [edge() for side in sides]
+        for index, side in enumerate(sides):
+            nextVertical = vertical[(index + 1) % len(vertical)]
+            faces.append(face(edges=list(side) + [nextVertical, vertical[index]]))
+        return self.feature(faces)
+
+    def prism(self, k):
+        '''Returns a prism on a k-sided polygon: two Faces with k Edges and k side Faces'''
+        edge = self._maker.OCCEdge
+        face = self._maker.OCCFace
+        topEdges = [edge() for i in range(k)]
+        bottomEdges = [edge() for i in range(k)]
+        vertical = [edge() for i in range(k)]
+        faces = [face(edges=topEdges[:]), face(edges=bottomEdges[:])]
+        for i in range(k):
+            faces.append(face(edges=[topEdges[i], vertical[(i + 1) % k], bottomEdges[i],
+                                     vertical[i]]))
+        return self.feature(faces)
+
+    def filletChain(self, feature, count):
+        '''Returns count successive fillets of feature as `TopoNamer.modifyShape` arguments.
+
+        Each step replaces an Edge shared by Faces A and B with a new fillet Face: A and B
+        are modified so that they share one new Edge each with the fillet instead. The
+        Edges of every fillet are filleted again later on, so the chain keeps building on
+        its own results. Topologically a chamfer is the same operation.
+
+        returns a list of (newFaces, modifiedFaces) tuples, in order'''
+        faces = list(feature.Shape.Faces)
+        facesByEdge = {}
+        for face in faces:
+            for edge in face.Edges:
+                facesByEdge.setdefault(edge.value, []).append(face)
+        candidates = [edge for face in faces for edge in face.Edges]
+
+        steps = []
+        while len(steps) < count:
+            if len(candidates) == 0:
+                msg = 'The shape ran out of Edges to fillet after {} steps'.format(len(steps))
+                raise ValueError(msg)
+            edge = candidates.pop(0)
+            shared = facesByEdge.get(edge.value, [])
+            if len(shared) != 2:
+                continue
+            del facesByEdge[edge.value]
+            filletEdges = [self._maker.OCCEdge() for i in range(4)]
+            fillet = self._maker.OCCFace(edges=filletEdges)
+            modifiedFaces = []
+            for oldFace, newEdge in zip(shared, filletEdges):
+                newFace = self._maker.OCCFace(
+                    edges=[newEdge if i is edge else i for i in oldFace.Edges])
+                for i in oldFace.Edges:
+                    if not i is edge:
+                        bucket = facesByEdge[i.value]
+                        facesByEdge[i.value] = [newFace if j is oldFace else j for j in bucket]
+                facesByEdge[newEdge.value] = [newFace, fillet]
+                modifiedFaces.append((oldFace, newFace))
+            for i in filletEdges[2:]:
+                facesByEdge[i.value] = [fillet]
+            candidates.extend(filletEdges[:2])
+            steps.append(([fillet], modifiedFaces))
+        return steps
@@ -0,0 +1,45 @@
+'''Runs the scaling benchmark. See `Benchmark`.
+
+    python -m benchmark             time everything and compare against baseline.json
+    python -m benchmark --update    time everything and store the result as the baseline
+
+The exit status is 1 if anything regressed.'''
+import argparse
+import os
+import sys
+from benchmark.Benchmark import Benchmark
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmark')
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(__file__),
+                                                           'baseline.json'))
+    parser.add_argument('--update', action='store_true',
+                        help='store the results as the new baseline')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scenario', action='append', choices=sorted(Benchmark.SCENARIOS),
+                        help='only run this scenario, may be given more than once')
+    parser.add_argument('--slack', type=float, default=0.3,
+                        help='how much a scaling exponent may grow')
+    parser.add_argument('--factor', type=float, default=3.0,
+                        help='how many times slower than the baseline a timing may be')
+    args = parser.parse_args(argv)
+
+    benchmark = Benchmark(args.repeat, args.scenario)
+    results = benchmark.run(log=print)
+    print(benchmark.report(results))
+
+    if args.update:
+        Benchmark.save(args.baseline, results)
+        print('Stored the baseline in {}'.format(args.baseline))
+        return 0
+    if not os.path.exists(args.baseline):
+        print('There is no baseline at {}, run with --update'.format(args.baseline))
+        return 0
+    regressions = benchmark.compare(results, Benchmark.load(args.baseline), args.slack,
+                                    args.factor)
+    for regression in regressions:
+        print('REGRESSION ' + regression)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,6 +10,10 @@ class BaseFakeOCCObject(object):
     def isSame(self, check):
         return self.isEqual(check)
 
+    def hashCode(self):
+        '''Mirrors OCC's hashCode: equal for any two objects that are isSame'''
+        return hash(self.value)
+
 class FakeOCCEdge(BaseFakeOCCObject):
     def __init__(self, value):
         super(FakeOCCEdge, self).__init__(value)
@@ -17,6 +21,47 @@ class FakeOCCEdge(BaseFakeOCCObject):
 class FakeOCCFace(BaseFakeOCCObject):
     Edges = list()
 
+class FakeVector(object):
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+
+class FakeVertex(object):
+    def __init__(self, point):
+        self.Point = FakeVector(*point)
+
+class FakeBoundBox(object):
+    def __init__(self, points):
+        self.XMin, self.YMin, self.ZMin = [min(i) for i in zip(*points)]
+        self.XMax, self.YMax, self.ZMax = [max(i) for i in zip(*points)]
+
+class Line(object):
+    '''Stands in for Part.Line, the Curve of a straight Edge'''
+
+class Plane(object):
+    '''Stands in for Part.Plane, the Surface of a planar Face'''
+
+def _planarGeometry(corners):
+    '''Returns the Area, centroid and unit normal of the planar polygon through corners'''
+    def sub(a, b):
+        return [i - j for i, j in zip(a, b)]
+    def cross(a, b):
+        return [a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]]
+
+    area = [0.0, 0.0, 0.0]
+    weighted = [0.0, 0.0, 0.0]
+    total = 0.0
+    for index in range(1, len(corners) - 1):
+        triangle = [corners[0], corners[index], corners[index + 1]]
+        doubled = cross(sub(triangle[1], triangle[0]), sub(triangle[2], triangle[0]))
+        area = [i + j for i, j in zip(area, doubled)]
+        size = sum([i ** 2 for i in doubled]) ** 0.5
+        total += size
+        weighted = [w + size * sum(i) / 3.0 for w, i in zip(weighted, zip(*triangle))]
+    length = sum([i ** 2 for i in area]) ** 0.5
+    return length / 2.0, [i / total for i in weighted], [i / length for i in area]
+
 class FakeOCCShape(object):
     '''A Skeleton class for use in MagicMock's `spec` arguement'''
 
@@ -28,9 +73,40 @@ class FakePartFeature(object):
 
     Shape = FakeOCCShape()
 
+class FakeHistory(object):
+
+    """A stand-in for an OpenCascade shape history, e.g. FreeCAD's `Shape.History`
+
+    Faces are looked up by their value, just like the fake OCC objects compare"""
+
+    def __init__(self):
+        self._modified = {}
+        self._generated = {}
+        self._deleted = set()
+
+    def setModified(self, oldFace, newFaces):
+        self._modified[oldFace.value] = list(newFaces)
+
+    def setGenerated(self, oldFace, newFaces):
+        self._generated[oldFace.value] = list(newFaces)
+
+    def setDeleted(self, oldFace):
+        self._deleted.add(oldFace.value)
+
+    def modified(self, oldFace):
+        return self._modified.get(oldFace.value, [])[:]
+
+    def generated(self, oldFace):
+        return self._generated.get(oldFace.value, [])[:]
+
+    def isDeleted(self, oldFace):
+        return oldFace.value in self._deleted
+
 class MockObjectMaker(object):
     def __init__(self):
         self._count = {}
+        # frozenset of the two end points -> the OCCLine between them, see `OCCPolygon`
+        self._lines = {}
         self._boxFaces = {'front':0,
                           'back':1,
                           'top':2,
@@ -57,6 +133,42 @@ class MockObjectMaker(object):
         mock_edge = FakeOCCEdge(value)
         return mock_edge
 
+    def OCCLine(self, start, end, value=None):
+        '''Create a mock OpenCascade Edge along the straight line from start to end.
+
+        Unlike `OCCEdge` it has the geometry of a real Edge: Curve, Vertexes, Length,
+        BoundBox and CenterOfMass.'''
+        mock_edge = self.OCCEdge(value)
+        mock_edge.Curve = Line()
+        mock_edge.Vertexes = [FakeVertex(start), FakeVertex(end)]
+        mock_edge.Length = sum([(i - j) ** 2 for i, j in zip(start, end)]) ** 0.5
+        mock_edge.BoundBox = FakeBoundBox([start, end])
+        mock_edge.CenterOfMass = FakeVector(*[(i + j) / 2.0 for i, j in zip(start, end)])
+        return mock_edge
+
+    def OCCPolygon(self, corners, value=None):
+        '''Create a mock planar OpenCascade Face bounded by straight Edges through corners.
+
+        Like a real Face it has a BoundBox, Area, CenterOfMass, Surface and normalAt.
+        Polygons made by the same MockObjectMaker share the Edge along a common side, just
+        like the Faces of a real solid.'''
+        edges = []
+        for index, start in enumerate(corners):
+            end = corners[(index + 1) % len(corners)]
+            side = frozenset([tuple(start), tuple(end)])
+            if not side in self._lines:
+                self._lines[side] = self.OCCLine(start, end)
+            edges.append(self._lines[side])
+        mock_face = self.OCCFace(value, edges)
+        mock_face.BoundBox = FakeBoundBox(corners)
+        area, center, normal = _planarGeometry(corners)
+        mock_face.Area = area
+        mock_face.CenterOfMass = FakeVector(*center)
+        mock_face.Surface = Plane()
+        mock_face.ParameterRange = (0.0, 1.0, 0.0, 1.0)
+        mock_face.normalAt = lambda u, v: FakeVector(*normal)
+        return mock_face
+
     def OCCFace(self, value=None, edges=None):
         '''Create a mock OpenCascade Face object
 
@@ -73,6 +185,12 @@ class MockObjectMaker(object):
 
         return mock_face
 
+    def OCCFaceFromKeys(self, faceKey, edgeKeys):
+        '''Create a mock OpenCascade Face whose hashCodes are faceKey and edgeKeys.
+
+        This is a stand-in geometry source for replaying a `TopoJournal`'''
+        return self.OCCFace(value=faceKey, edges=[self.OCCEdge(i) for i in edgeKeys])
+
     def BoxFeature(self):
         mock_feature = self.FreeCADFeature()
 
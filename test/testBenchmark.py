@@ -0,0 +1,39 @@
+import unittest
+from benchmark.Benchmark import Benchmark
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.benchmark = Benchmark(repeat=1, scenarios=['filletChain'])
+
+    def curves(self, addShape):
+        operations = ['addShape', 'modifyShape', 'getEdgeName', 'getEdgeByName']
+        curves = dict([(operation, [[1, 1e-6], [4, 1e-6]]) for operation in operations])
+        curves['addShape'] = addShape
+        return {'scenario': curves}
+
+    def test_run(self):
+        results = self.benchmark.run()
+        self.assertEqual(sorted(results), ['filletChain'])
+        self.assertEqual(sorted(results['filletChain']), sorted(Benchmark.OPERATIONS))
+        sizes = [size for size, seconds in results['filletChain']['modifyShape']]
+        self.assertEqual(sizes, Benchmark.SCENARIOS['filletChain'][0])
+        self.assertTrue('filletChain' in self.benchmark.report(results))
+
+    def test_exponent(self):
+        self.assertAlmostEqual(Benchmark.exponent([[1, 1.0], [4, 16.0]]), 2.0)
+        self.assertAlmostEqual(Benchmark.exponent([[10, 3.0], [20, 3.0], [40, 3.0]]), 0.0)
+
+    def test_compare(self):
+        baseline = self.curves([[1, 1e-3], [4, 4e-3]])
+        self.assertEqual(self.benchmark.compare(baseline, baseline), [])
+
+        # Quadratic instead of linear
+        quadratic = self.curves([[1, 1e-3], [4, 16e-3]])
+        regressions = self.benchmark.compare(quadratic, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('scenario addShape: scales as size**2.00'))
+
+        # Just slower, and only past the factor
+        slower = self.curves([[1, 5e-3], [4, 20e-3]])
+        self.assertEqual(len(self.benchmark.compare(slower, baseline)), 2)
+        self.assertEqual(self.benchmark.compare(slower, baseline, factor=10.0), [])
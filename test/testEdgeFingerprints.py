@@ -0,0 +1,47 @@
+import unittest
+from unittest import mock
+from PyTopoNamer import EdgeFingerprints as EdgeFingerprintsModule
+from PyTopoNamer.EdgeFingerprints import EdgeFingerprints
+from test.TestingHelpers import MockObjectMaker
+
+class TestEdgeFingerprints(unittest.TestCase):
+    def setUp(self):
+        self.maker = MockObjectMaker()
+        # A square, and the same square with its Edges running the other way
+        corners = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)]
+        self.edges = [self.maker.OCCLine(corners[i], corners[(i + 1) % 4]) for i in range(4)]
+        self.reversed = [self.maker.OCCLine(corners[(i + 1) % 4], corners[i]) for i in range(4)]
+
+    def test_fingerprint(self):
+        fingerprint = EdgeFingerprints.fingerprint(self.edges[1])
+        self.assertEqual(len(fingerprint), EdgeFingerprints.WIDTH)
+        self.assertEqual(fingerprint[1:8], (1, 0, 0, 1, 1, 0, 1.0))
+        self.assertEqual(fingerprint[8:], (1, 0, 0, 1, 1, 0))
+        self.assertEqual(fingerprint, EdgeFingerprints.fingerprint(self.reversed[1]))
+        self.assertEqual(EdgeFingerprints.fingerprint(self.maker.OCCEdge()), None)
+
+    def checkMatch(self):
+        ids = [(i,) for i in range(4)]
+        fingerprints = [EdgeFingerprints.fingerprint(i) for i in self.edges]
+        table = EdgeFingerprints(ids[:3], fingerprints[:3])
+        table = table.extend([ids[3], (4,)], [fingerprints[3], None])
+
+        self.assertEqual(len(table), 5)
+        self.assertEqual(table.getIds(), tuple(ids) + ((4,),))
+        # An Edge without a fingerprint is never ruled out
+        self.assertEqual(table.match(EdgeFingerprints.fingerprint(self.reversed[2])),
+                         [(2,), (4,)])
+        moved = list(fingerprints[2])
+        moved[1] += 1e-9
+        self.assertEqual(table.match(tuple(moved)), [(2,), (4,)])
+        self.assertEqual(table.match(tuple(moved), tolerance=1e-10), [(4,)])
+
+        empty = EdgeFingerprints([], [])
+        self.assertEqual(empty.match(fingerprints[0]), [])
+
+    def test_match(self):
+        self.checkMatch()
+
+    def test_matchWithoutNumPy(self):
+        with mock.patch.object(EdgeFingerprintsModule, 'numpy', None):
+            self.checkMatch()
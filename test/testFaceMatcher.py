@@ -0,0 +1,86 @@
+import unittest
+from PyTopoNamer.FaceMatcher import FaceMatcher
+from test.TestingHelpers import MockObjectMaker
+
+def boxFaces(maker, height, x=0):
+    '''Returns the bottom, top, front, right, back and left Faces of a 1 x 1 x height box'''
+    maker._lines.clear()
+    base = [(x, 0, 0), (x + 1, 0, 0), (x + 1, 1, 0), (x, 1, 0)]
+    top = [(i, j, height) for i, j, k in base]
+    faces = [maker.OCCPolygon(base[::-1]), maker.OCCPolygon(top)]
+    for index in range(4):
+        following = (index + 1) % 4
+        faces.append(maker.OCCPolygon([base[index], base[following], top[following],
+                                       top[index]]))
+    return faces
+
+class TestFaceMatcher(unittest.TestCase):
+    def setUp(self):
+        self.maker = MockObjectMaker()
+        self.matcher = FaceMatcher(lambda occShape: occShape.hashCode())
+
+    def test_stretchedBox(self):
+        '''Every Face of a box that got taller is matched to its counterpart'''
+        oldFaces = boxFaces(self.maker, 1)
+        newFaces = boxFaces(self.maker, 2)
+        new, modified, deleted = self.matcher.match(oldFaces, newFaces)
+
+        self.assertEqual(new, [])
+        self.assertEqual(deleted, [])
+        self.assertEqual(modified, list(zip(oldFaces, newFaces)))
+
+    def test_unchangedFaces(self):
+        '''A Face that isEqual to an old one is left out'''
+        oldFaces = boxFaces(self.maker, 1)
+        newFaces = oldFaces[:1] + boxFaces(self.maker, 2)[1:]
+        new, modified, deleted = self.matcher.match(oldFaces, newFaces[::-1])
+
+        self.assertEqual([i for i, j in modified], oldFaces[1:])
+        self.assertEqual([j for i, j in modified], newFaces[1:])
+
+    def test_newAndDeletedFaces(self):
+        '''Faces too far apart, or with another type of Surface, are not matched'''
+        oldFaces = boxFaces(self.maker, 1)
+        newFaces = boxFaces(self.maker, 1)
+        moved = boxFaces(self.maker, 1, x=10)
+        newFaces[0] = moved[0]
+        newFaces[1].Surface = object()
+        new, modified, deleted = self.matcher.match(oldFaces, newFaces)
+
+        self.assertEqual(new, newFaces[:2])
+        self.assertEqual(deleted, oldFaces[:2])
+        self.assertEqual(modified, list(zip(oldFaces[2:], newFaces[2:])))
+
+    def test_facesWithoutGeometry(self):
+        '''Faces without geometry can only be matched when they are unchanged'''
+        oldFaces = [self.maker.OCCFace(), self.maker.OCCFace()]
+        newFaces = [self.maker.OCCFace(), oldFaces[1]]
+        self.assertEqual(self.matcher.match(oldFaces, newFaces),
+                         ([newFaces[0]], [], [oldFaces[0]]))
+
+    def test_bestPairFirst(self):
+        '''When two old Faces want the same new Face, the better pair wins'''
+        square = lambda x, size: self.maker.OCCPolygon(
+            [(x, 0, 0), (x + size, 0, 0), (x + size, size, 0), (x, size, 0)])
+        oldFaces = [square(0, 1), square(0.2, 1)]
+        newFaces = [square(0.15, 1), square(5, 1)]
+        new, modified, deleted = self.matcher.match(oldFaces, newFaces)
+
+        self.assertEqual(modified, [(oldFaces[1], newFaces[0])])
+        self.assertEqual(deleted, [oldFaces[0]])
+        self.assertEqual(new, [newFaces[1]])
+
+    def test_manyFaces(self):
+        '''A grid of thousands of Faces that all moved a bit is matched one to one'''
+        def grid(offset):
+            self.maker._lines.clear()
+            return [self.maker.OCCPolygon([(i + offset, j, 0), (i + 0.9 + offset, j, 0),
+                                           (i + 0.9 + offset, j + 0.9, 0),
+                                           (i + offset, j + 0.9, 0)])
+                    for i in range(50) for j in range(40)]
+        oldFaces = grid(0)
+        newFaces = grid(0.3)
+        new, modified, deleted = self.matcher.match(oldFaces, newFaces[::-1])
+
+        self.assertEqual((new, deleted), ([], []))
+        self.assertEqual(modified, list(zip(oldFaces, newFaces)))
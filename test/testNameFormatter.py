@@ -0,0 +1,56 @@
+import unittest
+from PyTopoNamer.NameFormatter import NameFormatter
+
+class TestNameFormatter(unittest.TestCase):
+    def setUp(self):
+        self.formatter = NameFormatter()
+
+    def test_format(self):
+        self.assertEqual(self.formatter.format('Face', (3,)), 'Face003')
+        self.assertEqual(self.formatter.format('Edge', (2, 1, 2)), 'Edge002bc')
+        self.assertEqual(self.formatter.format('Edge', (1234,)), 'Edge1234')
+
+    def test_parse(self):
+        self.assertEqual(self.formatter.parse('Face003'), ('Face', (3,)))
+        self.assertEqual(self.formatter.parse('Edge002bc'), ('Edge', (2, 1, 2)))
+        self.assertEqual(self.formatter.parse('Edge1234'), ('Edge', (1234,)))
+        self.assertRaises(ValueError, self.formatter.parse, 'Edge')
+        self.assertRaises(ValueError, self.formatter.parse, '003')
+        self.assertRaises(ValueError, self.formatter.parse, 'Edge002B')
+
+    def test_parseRejectsAliases(self):
+        '''Only the formatted name round-trips, other spellings of the index are rejected'''
+        self.assertRaises(ValueError, self.formatter.parse, 'Face3')
+        self.assertRaises(ValueError, self.formatter.parse, 'Face0003')
+        self.assertRaises(ValueError, self.formatter.parse, 'Edge01000')
+
+    def test_formatIsCached(self):
+        name0 = self.formatter.format('Face', (3,))
+        name1 = self.formatter.format('Face', (3,))
+        self.assertTrue(name0 is name1)
+
+    def test_cacheIsBounded(self):
+        formatter = NameFormatter(maxSize=10)
+        for i in range(25):
+            formatter.format('Edge', (i,))
+            formatter.parse('Face{:03d}'.format(i))
+        self.assertTrue(len(formatter._names) <= 10)
+        self.assertTrue(len(formatter._ids) <= 10)
+        self.assertEqual(formatter.parse('Edge024'), ('Edge', (24,)))
+
+    def test_sortKey(self):
+        unsorted = ['Edge1000', 'Edge999', 'Edge002a', 'Edge002']
+        check = sorted(unsorted, key=self.formatter.sortKey)
+        self.assertEqual(check, ['Edge002', 'Edge002a', 'Edge999', 'Edge1000'])
+
+    def test_nextSubId(self):
+        self.assertEqual(NameFormatter.nextSubId((1,)), (1, 0))
+        self.assertEqual(NameFormatter.nextSubId((2, 1, 1)), (2, 1, 2))
+        self.assertEqual(NameFormatter.nextSubId((1, 0, 25)), (1, 0, 0, 0))
+
+    def test_followingSubId(self):
+        self.assertEqual(NameFormatter.followingSubId((1,)), (1, 0))
+        self.assertEqual(NameFormatter.followingSubId((2, 1, 1)), (2, 1, 2))
+        self.assertEqual(NameFormatter.followingSubId((1, 25)), (1, 0, 0))
+        self.assertEqual(NameFormatter.followingSubId((1, 0, 25)), (1, 1, 0))
+        self.assertEqual(NameFormatter.followingSubId((1, 25, 25)), (1, 0, 0, 0))
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from PyTopoNamer.NamingTable import NamingTable
+
+class TestNamingTable(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        snapshot = {'version': 1, 'numbFaces': 3, 'numbEdges': 12,
+                    'faces': [[[0], 100], [[1], None], [[2], 102]],
+                    'edges': [[[11], 211, [[0]], []],
+                              [[2, 0], 202, [[0], [2]], [[0], [2]]],
+                              [[2], None, [], [[0], [1]]],
+                              [[3], 202, [[2]], []]]}
+        NamingTable.write(self.path, snapshot)
+        self.table = NamingTable(self.path)
+
+    def tearDown(self):
+        self.table.close()
+        os.remove(self.path)
+
+    def test_header(self):
+        self.assertEqual(self.table.numbFaces, 3)
+        self.assertEqual(self.table.numbEdges, 12)
+        self.assertEqual(len(self.table), 3)
+
+    def test_findEdge(self):
+        self.assertEqual(self.table.findEdge((2,)), ((2,), None, [], [(0,), (1,)]))
+        self.assertEqual(self.table.findEdge((2, 0)), ((2, 0), 202, [(0,), (2,)], [(0,), (2,)]))
+        self.assertEqual(self.table.findEdge((11,)), ((11,), 211, [(0,)], []))
+        self.assertEqual(self.table.findEdge((4,)), None)
+        self.assertEqual(self.table.findEdge((2, 1)), None)
+
+    def test_findEdgesByKey(self):
+        edgeIds = [i[0] for i in self.table.findEdgesByKey(202)]
+        self.assertEqual(sorted(edgeIds), [(2, 0), (3,)])
+        self.assertEqual(self.table.findEdgesByKey(203), [])
+
+    def test_findFace(self):
+        self.assertEqual(self.table.findFace((1,)), ((1,), None))
+        self.assertEqual(self.table.findFace((2,)), ((2,), 102))
+        self.assertEqual(self.table.findFace((3,)), None)
+
+    def test_lineage(self):
+        snapshot = {'version': 1, 'numbFaces': 4, 'numbEdges': 3,
+                    'faces': [[[0], 100], [[1], None], [[2], 102], [[3], 103]],
+                    'edges': [[[0], None, [], [[0], [1]]],
+                              [[0, 1], 201, [[0], [2]], [[0], [2]]],
+                              [[0, 0], 200, [[0], [2]], [[0], [2]]]],
+                    'lineage': {'parents': [[[0, 1], [0]], [[0, 0], [0]]],
+                                'faceParents': [[[3], [2]]],
+                                'faceMerges': [[[1], [2]]]}}
+        NamingTable.write(self.path, snapshot)
+        table = NamingTable(self.path)
+        self.assertEqual(table.findEdgeChildren((0,)), [(0, 1), (0, 0)])
+        self.assertEqual(table.findEdgeChildren((0, 0)), [])
+        self.assertEqual(table.findFaceChildren((2,)), [(3,)])
+        self.assertEqual(table.findFaceMerge((1,)), (2,))
+        self.assertEqual(table.findFaceMerge((2,)), None)
+        table.close()
+        self.assertEqual(self.table.findEdgeChildren((2,)), [])
+
+    def test_packId(self):
+        for nameId in [(0,), (5, 0), (5, 25), (5, 0, 0), (5, 25, 25, 1)]:
+            packed = NamingTable._packId(nameId)
+            self.assertEqual(NamingTable._unpackId(*packed), nameId)
+        self.assertRaises(ValueError, NamingTable._packId, (1,) + (0,) * 7)
+
+    def test_notATable(self):
+        with open(self.path, 'wb') as outFile:
+            outFile.write(b'\0' * 64)
+        self.assertRaises(ValueError, NamingTable, self.path)
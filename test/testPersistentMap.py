@@ -0,0 +1,81 @@
+import unittest
+from PyTopoNamer.PersistentMap import PersistentMap
+
+class CollidingKey(object):
+    '''A key whose hash is the same for every instance'''
+    def __init__(self, value):
+        self.value = value
+
+    def __hash__(self):
+        return 7
+
+    def __eq__(self, other):
+        return isinstance(other, CollidingKey) and self.value == other.value
+
+class TestPersistentMap(unittest.TestCase):
+    def setUp(self):
+        self.pmap = PersistentMap()
+        for i in range(1000):
+            self.pmap[(i,)] = i
+
+    def test_getSet(self):
+        self.assertEqual(len(self.pmap), 1000)
+        self.assertEqual(self.pmap[(500,)], 500)
+        self.assertEqual(self.pmap.get((1000,)), None)
+        self.assertEqual(self.pmap.get((1000,), 'missing'), 'missing')
+        self.assertTrue((999,) in self.pmap)
+        self.assertRaises(KeyError, self.pmap.__getitem__, (1000,))
+
+        self.pmap[(500,)] = 'changed'
+        self.assertEqual(self.pmap[(500,)], 'changed')
+        self.assertEqual(len(self.pmap), 1000)
+        self.assertEqual(sorted(self.pmap.keys()), [(i,) for i in range(1000)])
+
+    def test_delete(self):
+        for i in range(0, 1000, 2):
+            del self.pmap[(i,)]
+        self.assertEqual(self.pmap.pop((1,)), 1)
+        self.assertEqual(self.pmap.pop((1,), None), None)
+        self.assertRaises(KeyError, self.pmap.pop, (1,))
+        self.assertRaises(KeyError, self.pmap.__delitem__, (0,))
+
+        self.assertEqual(len(self.pmap), 499)
+        self.assertEqual(dict(self.pmap.items()), dict(((i,), i) for i in range(3, 1000, 2)))
+
+    def test_copyIsIndependent(self):
+        '''Changing a copy never changes the original, and vice versa'''
+        other = self.pmap.copy()
+        other[(0,)] = 'other'
+        del other[(1,)]
+        other[(1000,)] = 1000
+        self.pmap[(2,)] = 'original'
+
+        self.assertEqual(self.pmap[(0,)], 0)
+        self.assertEqual(self.pmap[(1,)], 1)
+        self.assertFalse((1000,) in self.pmap)
+        self.assertEqual(other[(0,)], 'other')
+        self.assertEqual(other[(2,)], 2)
+        self.assertFalse((1,) in other)
+        self.assertEqual(len(self.pmap), 1000)
+        self.assertEqual(len(other), 1000)
+
+    def test_copySharesStructure(self):
+        '''A write to a copy only copies the nodes on the path to the changed key'''
+        other = self.pmap.copy()
+        other[(0,)] = 'other'
+        shared = [i for i in other._root.entries if i in self.pmap._root.entries]
+        self.assertEqual(len(shared), len(self.pmap._root.entries) - 1)
+
+    def test_collidingHashes(self):
+        pmap = PersistentMap([(CollidingKey(i), i) for i in range(5)])
+        other = pmap.copy()
+        del other[CollidingKey(2)]
+
+        self.assertEqual(pmap[CollidingKey(2)], 2)
+        self.assertFalse(CollidingKey(2) in other)
+        self.assertEqual(sorted(other.values()), [0, 1, 3, 4])
+
+    def test_equality(self):
+        self.assertEqual(PersistentMap(), {})
+        self.assertEqual(PersistentMap([('a', 1)]), PersistentMap([('a', 1)]))
+        self.assertNotEqual(self.pmap, {})
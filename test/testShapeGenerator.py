@@ -0,0 +1,53 @@
+import unittest
+from benchmark.ShapeGenerator import ShapeGenerator
+from PyTopoNamer.TopoNamer import TopoNamer
+
+class TestShapeGenerator(unittest.TestCase):
+    def setUp(self):
+        self.generator = ShapeGenerator()
+
+    def edgeShares(self, faces):
+        '''Returns the number of Faces that share each Edge'''
+        shares = {}
+        for face in faces:
+            for edge in face.Edges:
+                shares[edge.value] = shares.get(edge.value, 0) + 1
+        return shares
+
+    def test_boxGrid(self):
+        box = self.generator.boxGrid(1, 1)
+        self.assertEqual(len(box.Shape.Faces), 6)
+        self.assertEqual(list(self.edgeShares(box.Shape.Faces).values()), [2] * 12)
+
+        grid = self.generator.boxGrid(3, 2)
+        shares = self.edgeShares(grid.Shape.Faces)
+        # 6 top and 6 bottom Faces plus 10 walls
+        self.assertEqual(len(grid.Shape.Faces), 22)
+        self.assertEqual(set(shares.values()), set([2]))
+
+    def test_prism(self):
+        prism = self.generator.prism(7)
+        self.assertEqual(len(prism.Shape.Faces), 9)
+        self.assertEqual(len(prism.Shape.Faces[0].Edges), 7)
+        self.assertEqual(list(self.edgeShares(prism.Shape.Faces).values()), [2] * 21)
+
+    def test_filletChain(self):
+        '''Every step is a valid modifyShape, and the solid stays closed'''
+        box = self.generator.boxGrid(1, 1)
+        namer = TopoNamer()
+        namer.addShape(box)
+        faces = list(box.Shape.Faces)
+        for newFaces, modifiedFaces in self.generator.filletChain(box, 20):
+            filletedEdge = [i for i in modifiedFaces[0][0].Edges
+                            if not i in modifiedFaces[0][1].Edges][0]
+            filletedName = namer.getEdgeName(filletedEdge)
+            namer.modifyShape(newFaces=newFaces, modifiedFaces=modifiedFaces)
+            self.assertRaises(ValueError, namer.getEdgeByName, filletedName)
+            replaced = dict([(id(oldFace), newFace) for oldFace, newFace in modifiedFaces])
+            faces = [replaced.get(id(face), face) for face in faces] + newFaces
+
+        self.assertEqual(len(faces), 26)
+        shares = self.edgeShares(faces)
+        # Each fillet adds two Edges that are shared and two that are not
+        self.assertEqual(sorted(shares.values()).count(1), 40)
+        self.assertEqual(sorted(shares.values()).count(2), 12 + 20)
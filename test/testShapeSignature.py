@@ -0,0 +1,69 @@
+import unittest
+from PyTopoNamer.ShapeSignature import ShapeSignature
+from test.TestingHelpers import MockObjectMaker
+
+class FakeVector(object):
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+
+class TestShapeSignature(unittest.TestCase):
+    def setUp(self):
+        self.maker = MockObjectMaker()
+
+    def test_fromShape(self):
+        edge = self.maker.OCCEdge()
+        edge.Length = 2.0
+        edge.CenterOfMass = FakeVector(1.0, 0.0, 0.5)
+        signature = ShapeSignature.fromShape(edge, lambda occShape: occShape.hashCode())
+
+        self.assertEqual(signature.getKey(), edge.hashCode())
+        self.assertEqual(signature.getLength(), 2.0)
+        self.assertEqual(signature.getArea(), None)
+        self.assertEqual(signature.getCenter(), (1.0, 0.0, 0.5))
+
+    def test_fromShapeWithoutMeasures(self):
+        face = self.maker.OCCFace()
+        signature = ShapeSignature.fromShape(face, lambda occShape: 7)
+        self.assertEqual(signature.getKey(), 7)
+        self.assertEqual(signature.getCenter(), None)
+
+    def test_fromFace(self):
+        face = self.maker.OCCPolygon([(0, 0, 0), (2, 0, 0), (2, 1, 0), (0, 1, 0)])
+        signature = ShapeSignature.fromShape(face, lambda occShape: 7)
+        self.assertEqual(signature.getArea(), 2.0)
+        self.assertEqual(signature.getCenter(), (1.0, 0.5, 0.0))
+        self.assertEqual(signature.getSurface(), 'Plane')
+        self.assertEqual(signature.getNormal(), (0.0, 0.0, 1.0))
+
+    def test_fromEdge(self):
+        '''An Edge has a normalAt too, but a two-valued parameter range and no normal'''
+        def normalAt(*parameters):
+            raise RuntimeError('No normal defined')
+        edge = self.maker.OCCEdge()
+        edge.Length = 2.0
+        edge.ParameterRange = (0.0, 2.0)
+        edge.normalAt = normalAt
+        signature = ShapeSignature.fromShape(edge, lambda occShape: 7)
+        self.assertEqual(signature.getLength(), 2.0)
+        self.assertEqual(signature.getNormal(), None)
+
+        # A Face without a normal, e.g. a degenerate one
+        face = self.maker.OCCFace()
+        face.ParameterRange = (0.0, 1.0, 0.0, 1.0)
+        face.normalAt = normalAt
+        self.assertEqual(ShapeSignature.fromShape(face, lambda occShape: 7).getNormal(), None)
+
+    def test_isClose(self):
+        signature = ShapeSignature(1, length=2.0, center=(0.0, 0.0, 0.0))
+        self.assertTrue(signature.isClose(ShapeSignature(2, length=2.0 + 1e-9)))
+        self.assertTrue(signature.isClose(ShapeSignature(2, center=(0.0, 0.0, 1e-9))))
+        self.assertFalse(signature.isClose(ShapeSignature(2, length=2.1)))
+        self.assertFalse(signature.isClose(ShapeSignature(2, center=(0.0, 0.1, 0.0))))
+        self.assertTrue(signature.isClose(ShapeSignature(2, length=2.1), tolerance=0.2))
+
+        plane = ShapeSignature(1, surface='Plane', normal=(0.0, 0.0, 1.0))
+        self.assertTrue(plane.isClose(ShapeSignature(2, surface='Plane')))
+        self.assertFalse(plane.isClose(ShapeSignature(2, surface='Cylinder')))
+        self.assertFalse(plane.isClose(ShapeSignature(2, normal=(0.0, 1.0, 0.0))))
@@ -0,0 +1,57 @@
+import unittest
+from PyTopoNamer.SpatialIndex import SpatialIndex
+from test.TestingHelpers import MockObjectMaker
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SpatialIndex()
+        # A 10 x 10 grid of unit squares, one unit apart
+        for i in range(10):
+            for j in range(10):
+                self.index.insert((i, j), (2 * i, 2 * j, 0, 2 * i + 1, 2 * j + 1, 0))
+
+    def test_boxOf(self):
+        maker = MockObjectMaker()
+        edge = maker.OCCLine((1, 2, 3), (0, 5, 3))
+        self.assertEqual(SpatialIndex.boxOf(edge), (0, 2, 3, 1, 5, 3))
+        self.assertEqual(SpatialIndex.boxOf(maker.OCCEdge()), None)
+
+    def test_find(self):
+        self.assertEqual(self.index.find((2.5, 2.5, 0, 2.5, 2.5, 0)), [(1, 1)])
+        self.assertEqual(self.index.find((1.5, 1.5, 0, 1.5, 1.5, 0)), [])
+        self.assertEqual(self.index.find((1.5, 1.5, 0, 1.5, 1.5, 0), tolerance=0.5),
+                         [(0, 0), (0, 1), (1, 0), (1, 1)])
+        # A query that covers the whole grid
+        self.assertEqual(len(self.index.find((-1, -1, -1, 100, 100, 1))), 100)
+
+    def test_adaptiveCellSize(self):
+        self.assertEqual(self.index.getCellSize(), 1.0)
+        small = SpatialIndex()
+        small.insert('a', (0, 0, 0, 1, 1, 1))
+        self.assertEqual(small.getCellSize(), None)
+        self.assertEqual(small.find((0.5, 0.5, 0.5, 0.5, 0.5, 0.5)), ['a'])
+
+    def test_insertAndRemove(self):
+        self.index.insert((1, 1), (50, 50, 0, 51, 51, 0))
+        self.assertEqual(self.index.find((2.5, 2.5, 0, 2.5, 2.5, 0)), [])
+        self.assertEqual(self.index.find((50.5, 50.5, 0, 50.5, 50.5, 0)), [(1, 1)])
+        self.assertEqual(self.index.getBox((1, 1)), (50, 50, 0, 51, 51, 0))
+
+        # A box far bigger than the cells is found from anywhere it covers
+        self.index.insert((100, 100), (-100, -100, -100, 100, 100, 100))
+        self.assertEqual(self.index.find((50.5, 50.5, 0, 50.5, 50.5, 0)),
+                         [(1, 1), (100, 100)])
+        self.assertEqual(self.index.find((2.5, 2.5, 0, 2.5, 2.5, 0)), [(100, 100)])
+
+        self.index.remove((100, 100))
+        self.index.remove((1, 1))
+        self.index.remove((200, 200))
+        self.assertEqual(len(self.index), 99)
+        self.assertFalse((1, 1) in self.index)
+        self.assertEqual(self.index.find((50.5, 50.5, 0, 50.5, 50.5, 0), tolerance=10), [])
+
+    def test_fixedCellSize(self):
+        index = SpatialIndex(cellSize=0.25)
+        index.insert('a', (0, 0, 0, 1, 1, 0))
+        self.assertEqual(index.getCellSize(), 0.25)
+        self.assertEqual(index.find((0.9, 0.1, 0, 0.9, 0.1, 0)), ['a'])
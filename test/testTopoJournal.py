@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from PyTopoNamer.TopoTracker import TopoTracker
+from PyTopoNamer.TopoNamer import TopoNamer
+from PyTopoNamer.TopoJournal import TopoJournal
+from test.TestingHelpers import MockObjectMaker
+
+class TestTopoJournal(unittest.TestCase):
+    def setUp(self):
+        self.maker = MockObjectMaker()
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.journal = TopoJournal(self.path)
+        self.namer = TopoNamer()
+        self.namer._tracker.setJournal(self.journal)
+
+    def tearDown(self):
+        self.journal.close()
+        os.remove(self.path)
+
+    def makeFillet(self):
+        '''Track a box and fillet it, see `TestTopoNamer.test_makeFillet`'''
+        box = self.maker.BoxFeature()
+        self.namer.addShape(box)
+        filletFace, newBox = self.maker.createFillet()
+        modifiedFaces = []
+        for faceIndex in self.maker._boxFaces.values():
+            modifiedFaces.append((box.Shape.Faces[faceIndex], newBox.Shape.Faces[faceIndex]))
+        self.namer.modifyShape(newFaces=[filletFace], modifiedFaces=modifiedFaces[1:])
+        self.namer._tracker.deleteFace(box.Shape.Faces[0])
+
+    def replay(self):
+        with TopoJournal(self.path, readOnly=True) as journal:
+            return journal.replay(self.maker.OCCFaceFromKeys)
+
+    def test_replay(self):
+        self.makeFillet()
+        self.assertEqual(len(self.journal), 3)
+
+        replayed = self.replay()
+        self.assertEqual(replayed.getSnapshot(), self.namer.getSnapshot())
+
+    def test_replayLineage(self):
+        '''Split and merged Faces are replayed too'''
+        box = self.maker.BoxFeature()
+        self.namer.addShape(box)
+        faces = box.Shape.Faces
+        splitFace = self.maker.OCCFace()
+        self.namer.modifyShape(newFaces=[splitFace], deletedFaces=[faces[1]],
+                               splitFaces=[(faces[0], splitFace)],
+                               mergedFaces=[(faces[1], faces[2])])
+        self.assertEqual(len(self.journal._records[-1]), 5)
+
+        replayed = self.replay()
+        self.assertEqual(replayed.getSnapshot(), self.namer.getSnapshot())
+        self.assertEqual(replayed.getRepresentatives('Face001'), ['Face002'])
+
+    def test_trackerCompaction(self):
+        '''Compacting the tracker writes a snapshot, since replay could not reproduce it'''
+        self.makeFillet()
+        self.namer.compact()
+        self.assertEqual(len(self.journal), 0)
+
+        replayed = self.replay()
+        self.assertEqual(replayed.getSnapshot(), self.namer.getSnapshot())
+
+    def test_replayAfterCompaction(self):
+        '''An Edge without Faces that comes back after a compaction keeps its name'''
+        self.journal._threshold = 2
+        tracker = self.namer._tracker
+        edges = [self.maker.OCCEdge() for i in range(3)]
+        face = self.maker.OCCFace(edges=edges[:2])
+        tracker.addFace(face)
+        tracker.modifyFace(face, self.maker.OCCFace(edges=edges[2:]))
+        tracker.addFace(self.maker.OCCFace())
+        self.assertEqual(len(self.journal), 0)
+
+        tracker.addFace(self.maker.OCCFace(edges=[edges[0]]))
+        self.assertEqual(tracker._getEdgeTracker('Edge000').getFaceNames(), ['Face002'])
+        replayed = self.replay()
+        self.assertEqual(replayed.getSnapshot(), self.namer.getSnapshot())
+        self.assertEqual(replayed._getEdgeTracker('Edge000').getFaceNames(), ['Face002'])
+
+    def test_rejectedBatchIsNotRecorded(self):
+        face = self.maker.OCCFace()
+        self.namer._tracker.addFace(face)
+        self.assertRaises(ValueError, self.namer._tracker.addFace, face)
+        self.assertEqual(len(self.journal), 1)
+
+    def test_compaction(self):
+        self.journal._threshold = 2
+        self.makeFillet()
+
+        # The third batch pushed the journal over the threshold
+        self.assertEqual(len(self.journal), 0)
+        with open(self.path) as inFile:
+            self.assertEqual(len(inFile.readlines()), 1)
+
+        # Further changes are appended after the snapshot
+        self.namer._tracker.addFace(self.maker.OCCFace())
+        self.assertEqual(len(self.journal), 1)
+        replayed = self.replay()
+        self.assertEqual(replayed.getSnapshot(), self.namer.getSnapshot())
+
+    def test_tornWrite(self):
+        self.makeFillet()
+        with open(self.path, 'a') as outFile:
+            outFile.write('["b",[[12')
+
+        with TopoJournal(self.path) as journal:
+            self.assertEqual(len(journal), 3)
+            tracker = TopoTracker()
+            tracker.setJournal(journal)
+            tracker.addFace(self.maker.OCCFace())
+
+        with TopoJournal(self.path, readOnly=True) as journal:
+            self.assertEqual(len(journal), 4)
+
+    def test_readOnly(self):
+        '''A read-only journal can be replayed, but neither written to nor repaired'''
+        self.makeFillet()
+        with open(self.path, 'a') as outFile:
+            outFile.write('["b",[[12')
+
+        with TopoJournal(self.path, readOnly=True) as journal:
+            self.assertEqual(len(journal), 3)
+            tracker = self.namer._tracker
+            self.assertRaises(ValueError, journal.compact, tracker)
+            self.assertRaises(ValueError, journal.recordBatch, tracker, [], [], [])
+        with open(self.path) as inFile:
+            self.assertTrue(inFile.read().endswith('["b",[[12'))
@@ -1,6 +1,9 @@
 import unittest
+from unittest import mock
 from PyTopoNamer.TopoNamer import TopoNamer
-from test.TestingHelpers import MockObjectMaker
+from PyTopoNamer.TopoStats import TopoStats
+from test.TestingHelpers import MockObjectMaker, FakeHistory
+from test.testFaceMatcher import boxFaces
 
 class TestTopoNamer(unittest.TestCase):
     def setUp(self):
@@ -13,6 +16,14 @@ class TestTopoNamer(unittest.TestCase):
         # This is how we track the topology of the box
         self.namer.addShape(self.box)
 
+    def test_addShape(self):
+        '''Every Face of the box is named, and its twelve Edges are each shared by two'''
+        tracker = self.namer._tracker
+        faceNames = [i.getName() for i in tracker._faceTrackers]
+        self.assertEqual(faceNames, ['Face{:03d}'.format(i) for i in range(6)])
+        self.assertEqual(len(tracker._edgeTrackers), 12)
+        self.assertTrue(all(i.isValid() for i in tracker._edgeTrackers))
+
     def test_makeFillet(self):
         '''When a fillet is created on an Edge, that Edge is no longer valid.
         '''
@@ -43,3 +54,136 @@ class TestTopoNamer(unittest.TestCase):
         self.namer.modifyShape(modifiedFaces=modifiedFaces, newFaces=newFaces)
 
         self.assertRaises(ValueError, self.namer._tracker.getEdgeByName, filletEdgeName)
+
+    def test_modifyShapeIsAtomic(self):
+        '''If one change is rejected, none of the changes are applied'''
+        tracker = self.namer._tracker
+        front = self.box.Shape.Faces[self.maker._boxFaces['front']]
+        top = self.box.Shape.Faces[self.maker._boxFaces['top']]
+        newTop = self.maker.OCCFace(edges=top.Edges[:])
+        # A third Face on the Edge between front and top is not allowed
+        badFace = self.maker.OCCFace(edges=[front.Edges[0]])
+        before = [(i.getName(), i.getFaceNames()) for i in tracker._edgeTrackers]
+
+        self.assertRaises(ValueError, self.namer.modifyShape, newFaces=[badFace],
+                          modifiedFaces=[(top, newTop)])
+        after = [(i.getName(), i.getFaceNames()) for i in tracker._edgeTrackers]
+        self.assertEqual(after, before)
+        self.assertEqual(self.namer.getEdgeName(front.Edges[0]), 'Edge000')
+
+    def test_applyHistory_fillet(self):
+        '''The fillet from test_makeFillet, described by a history object instead'''
+        filletEdge = self.box.Shape.Faces[0].Edges[0]
+        filletEdgeName = self.namer.getEdgeName(filletEdge)
+        keptEdgeName = self.namer.getEdgeName(self.box.Shape.Faces[0].Edges[1])
+        filletFace, newBox = self.maker.createFillet()
+
+        history = FakeHistory()
+        for faceIndex in self.maker._boxFaces.values():
+            oldFace = self.box.Shape.Faces[faceIndex]
+            history.setModified(oldFace, [newBox.Shape.Faces[faceIndex]])
+        # Both Faces of the filleted Edge report the fillet as generated
+        history.setGenerated(self.box.Shape.Faces[self.maker._boxFaces['front']], [filletFace])
+        history.setGenerated(self.box.Shape.Faces[self.maker._boxFaces['top']], [filletFace])
+
+        self.namer.applyHistory(history, self.box.Shape.Faces)
+
+        self.assertRaises(ValueError, self.namer.getEdgeByName, filletEdgeName)
+        recovered = self.namer.getEdgeByName(keptEdgeName)
+        newKeptEdge = newBox.Shape.Faces[0].Edges[1]
+        self.assertEqual([i.value for i in recovered], [newKeptEdge.value])
+        self.assertEqual(len(self.namer._tracker._faceTrackers), 7)
+
+    def test_applyHistory_deleteAndMerge(self):
+        '''A deleted Face and a Face merged into another one both stop sharing Edges'''
+        faces = self.box.Shape.Faces
+        front = faces[self.maker._boxFaces['front']]
+        back = faces[self.maker._boxFaces['back']]
+        top = faces[self.maker._boxFaces['top']]
+        newTop = self.maker.OCCFace(edges=top.Edges[:])
+
+        tracker = self.namer._tracker
+        topName = tracker._getFaceTracker(top).getName()
+        frontName = tracker._getFaceTracker(front).getName()
+
+        history = FakeHistory()
+        history.setDeleted(front)
+        history.setModified(top, [newTop])
+        history.setModified(back, [newTop])
+
+        self.namer.applyHistory(history, faces)
+
+        # The merged Face resolves to the one it was merged into, the deleted one to nothing
+        self.assertEqual(self.namer.getRepresentatives(topName), ['Face001'])
+        self.assertEqual(self.namer.getRepresentatives(frontName), [])
+        # back comes first in faces, so top is the one that was merged away
+        self.assertEqual(tracker._getFaceTracker(newTop).getName(), 'Face001')
+        self.assertRaises(ValueError, tracker._getFaceTracker, top)
+        self.assertRaises(ValueError, tracker._getFaceTracker, front)
+        self.assertRaises(ValueError, self.namer.getEdgeName, front.Edges[0])
+        self.assertRaises(ValueError, self.namer.getEdgeName, back.Edges[0])
+
+    def test_restoreSnapshot(self):
+        edge = self.box.Shape.Faces[0].Edges[2]
+        edgeName = self.namer.getEdgeName(edge)
+        snapshot = self.namer.getSnapshot()
+
+        namer = TopoNamer()
+        namer.restoreSnapshot(snapshot, self.box)
+
+        self.assertEqual(namer.getEdgeName(edge), edgeName)
+        self.assertEqual([i.value for i in namer.getEdgeByName(edgeName)], [edge.value])
+
+    def test_undoRedo(self):
+        '''A versioned TopoNamer can go back to the names it had before a modifyShape'''
+        namer = TopoNamer(versioned=True)
+        namer.addShape(self.box)
+        filletEdge = self.box.Shape.Faces[0].Edges[0]
+        filletEdgeName = namer.getEdgeName(filletEdge)
+        beforeFillet = namer.getVersion()
+
+        filletFace, newBox = self.maker.createFillet()
+        modifiedFaces = []
+        for faceIndex in self.maker._boxFaces.values():
+            modifiedFaces.append((self.box.Shape.Faces[faceIndex],
+                                  newBox.Shape.Faces[faceIndex]))
+        namer.modifyShape(modifiedFaces=modifiedFaces, newFaces=[filletFace])
+        afterFillet = namer.getVersion()
+        self.assertRaises(ValueError, namer.getEdgeByName, filletEdgeName)
+
+        namer.checkout(beforeFillet)
+        self.assertEqual(namer.getEdgeName(filletEdge), filletEdgeName)
+        namer.checkout(afterFillet)
+        self.assertRaises(ValueError, namer.getEdgeByName, filletEdgeName)
+
+    def test_stats(self):
+        '''A sink sees every operation of the namer and its tracker, even after a restore'''
+        events = []
+        stats = TopoStats()
+        stats.addSink(events.append)
+        self.namer.setStats(stats)
+
+        snapshot = self.namer.getSnapshot()
+        self.namer.restoreSnapshot(snapshot, self.box)
+        self.namer.getEdgeName(self.box.Shape.Faces[0].Edges[0])
+
+        self.assertEqual([i['operation'] for i in events],
+                         ['getSnapshot', 'restoreSnapshot', 'getEdgeName', 'getEdgeName'])
+        self.assertEqual(events[-1]['counts'], {'isSame': 1})
+        self.assertEqual(stats.getHitRate('edgeIndex'), 1.0)
+
+    def test_rematchShape(self):
+        '''Without a history the Faces are matched by geometry, and the names follow them'''
+        namer = TopoNamer()
+        oldShape = self.maker.FreeCADFeature().Shape
+        oldShape.Faces = boxFaces(self.maker, 1)
+        namer.addShape(mock.Mock(Shape=oldShape))
+        # The Edge between the top and the front
+        edgeName = namer.getEdgeName(oldShape.Faces[1].Edges[0])
+
+        newShape = self.maker.FreeCADFeature().Shape
+        newShape.Faces = boxFaces(self.maker, 3)
+        new, modified, deleted = namer.rematchShape(oldShape, newShape)
+
+        self.assertEqual(len(modified), 6)
+        self.assertEqual(namer.getEdgeByName(edgeName), [newShape.Faces[1].Edges[0]])
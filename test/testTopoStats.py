@@ -0,0 +1,59 @@
+import unittest
+from PyTopoNamer.TopoStats import TopoStats
+
+class TestTopoStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = TopoStats()
+
+    def test_countsAndLookups(self):
+        self.stats.count('isSame')
+        self.stats.count('isSame', 3)
+        self.stats.lookup('edgeIndex', True)
+        self.stats.lookup('edgeIndex', False)
+        self.stats.lookup('edgeIndex', True)
+        self.stats.lookup('edgeIndex', True)
+
+        self.assertEqual(self.stats.getCounts(), {'isSame': 4})
+        self.assertEqual(self.stats.getLookups(), {'edgeIndex': (3, 1)})
+        self.assertEqual(self.stats.getHitRate('edgeIndex'), 0.75)
+        self.assertEqual(self.stats.getHitRate('faceIndex'), None)
+
+    def test_timedTracesToSinks(self):
+        events = []
+        self.stats.addSink(events.append)
+        def operation(value):
+            self.stats.count('Edges', value)
+            return value * 2
+        timed = self.stats.timed('operation', operation)
+
+        self.assertEqual(timed(3), 6)
+        self.assertEqual(timed(value=0), 0)
+
+        calls, seconds = self.stats.getTimings()['operation']
+        self.assertEqual(calls, 2)
+        self.assertTrue(seconds >= 0)
+        self.assertEqual([i['operation'] for i in events], ['operation', 'operation'])
+        self.assertEqual(events[0]['counts'], {'Edges': 3})
+        self.assertEqual(events[1]['counts'], {})
+
+        self.stats.removeSink(events.append)
+        timed(1)
+        self.assertEqual(len(events), 2)
+
+    def test_timedRecordsFailures(self):
+        def operation():
+            raise ValueError('rejected')
+        timed = self.stats.timed('operation', operation)
+        self.assertRaises(ValueError, timed)
+        self.assertEqual(self.stats.getTimings()['operation'][0], 1)
+
+    def test_reset(self):
+        self.stats.count('isEqual')
+        self.stats.lookup('faceIndex', False)
+        self.stats.timed('operation', lambda: None)()
+        self.assertTrue('isEqual 1' in ' '.join(self.stats.report().split()))
+
+        self.stats.reset()
+        self.assertEqual(self.stats.getCounts(), {})
+        self.assertEqual(self.stats.getTimings(), {})
+        self.assertEqual(self.stats.getLookups(), {})
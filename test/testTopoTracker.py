@@ -1,7 +1,14 @@
 import unittest
+from unittest import mock
 from PyTopoNamer.TopoTracker import TopoTracker
+from PyTopoNamer.TopoStats import TopoStats
+from PyTopoNamer.NamingTable import NamingTable
 from test.TestingHelpers import MockObjectMaker
 import copy
+import gc
+import json
+import os
+import tempfile
 
 class TestTracker(unittest.TestCase):
     def setUp(self):
@@ -246,3 +253,850 @@ class TestTracker(unittest.TestCase):
         checkValues = [edge.value for edge in checkEdges]
 
         self.assertEqual(checkValues, [mock_face0b.Edges[0].value])
+
+    def test_getEdgeByName_SplitPiece(self):
+        '''A piece of a split Edge only returns itself, not its siblings'''
+        mock_face0a = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1a = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1a.Edges[0] = mock_face0a.Edges[0]
+        mock_face0b = self.maker.OCCFace(edges=mock_face0a.Edges + [self.maker.OCCEdge()])
+        mock_face1b = self.maker.OCCFace(edges=mock_face1a.Edges + [mock_face0b.Edges[-1]])
+
+        self.tracker.addFaces([mock_face0a, mock_face1a])
+        self.tracker.modifyFace(mock_face0a, mock_face0b)
+        self.tracker.modifyFace(mock_face1a, mock_face1b)
+
+        self.assertEqual(self.tracker.getEdgeName(mock_face0b.Edges[-1]), 'Edge007')
+        self.assertEqual(self.tracker.getEdgeDescendants('Edge000'), ['Edge007'])
+        self.assertEqual(self.tracker.getEdgeByName('Edge007'), [mock_face0b.Edges[-1]])
+        self.assertEqual(self.tracker.getEdgeDescendants('Edge007'), [])
+
+    def test_getEdgeDescendants(self):
+        '''Edges split within one batch are named after the Edge they split'''
+        mock_face0a = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1a = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1a.Edges[0] = mock_face0a.Edges[0]
+        self.tracker.addFaces([mock_face0a, mock_face1a])
+
+        # Edge000 is split in two, both pieces are new
+        pieces = [self.maker.OCCEdge(), self.maker.OCCEdge()]
+        mock_face0b = self.maker.OCCFace(edges=pieces + mock_face0a.Edges[1:])
+        mock_face1b = self.maker.OCCFace(edges=pieces + mock_face1a.Edges[1:])
+        with self.tracker.transaction() as transaction:
+            transaction.modifyFace(mock_face0a, mock_face0b)
+            transaction.modifyFace(mock_face1a, mock_face1b)
+
+        self.assertEqual([self.tracker.getEdgeName(i) for i in pieces], ['Edge000a', 'Edge000b'])
+        self.assertEqual(self.tracker.getEdgeDescendants('Edge000'), ['Edge000a', 'Edge000b'])
+        self.assertEqual(self.tracker.getEdgeByName('Edge000'), pieces)
+        self.assertEqual(self.tracker.getEdgeByName('Edge000b'), [pieces[1]])
+        self.assertEqual(self.tracker._numbEdges, 7)
+
+        # The second piece is split again. Sub-names are never nested.
+        more = [self.maker.OCCEdge(), self.maker.OCCEdge()]
+        mock_face0c = self.maker.OCCFace(edges=pieces[:1] + more + mock_face0a.Edges[1:])
+        mock_face1c = self.maker.OCCFace(edges=pieces[:1] + more + mock_face1a.Edges[1:])
+        with self.tracker.transaction() as transaction:
+            transaction.modifyFace(mock_face0b, mock_face0c)
+            transaction.modifyFace(mock_face1b, mock_face1c)
+
+        self.assertEqual([self.tracker.getEdgeName(i) for i in more], ['Edge000c', 'Edge000d'])
+        self.assertEqual(self.tracker.getEdgeDescendants('Edge000'),
+                         ['Edge000a', 'Edge000c', 'Edge000d'])
+        self.assertEqual(self.tracker.getEdgeDescendants('Edge000b'), ['Edge000c', 'Edge000d'])
+        self.assertEqual(self.tracker.getEdgeByName('Edge000b'), more)
+
+        snapshot = json.loads(json.dumps(self.tracker.getSnapshot()))
+        restored = TopoTracker.fromSnapshot(snapshot, [mock_face0c, mock_face1c])
+        self.assertEqual(restored.getSnapshot(), self.tracker.getSnapshot())
+        self.assertEqual(restored.getEdgeDescendants('Edge000'),
+                         ['Edge000a', 'Edge000c', 'Edge000d'])
+
+        # The dropped Edges leave the lineage, their children move up
+        self.tracker.deleteFace(mock_face1c)
+        self.tracker.compact()
+        self.assertEqual(self.tracker._edgeChildren, {})
+        self.assertEqual(self.tracker._getEdgeTracker('Edge000c').getParent(), None)
+
+    def test_subNamesStayShort(self):
+        '''An Edge replaced on every recompute counts up its sub-names: ..., z, aa, ab, ...'''
+        faces = [self.maker.OCCFace(), self.maker.OCCFace()]
+        faces[1].Edges[0] = faces[0].Edges[0]
+        self.tracker.addFaces(faces)
+        for i in range(500):
+            edge = self.maker.OCCEdge()
+            newFaces = [self.maker.OCCFace(edges=[edge] + face.Edges[1:]) for face in faces]
+            with self.tracker.transaction() as transaction:
+                for face, newFace in zip(faces, newFaces):
+                    transaction.modifyFace(face, newFace)
+            faces = newFaces
+
+        self.assertEqual(self.tracker.getEdgeName(edge), 'Edge000sf')
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            self.tracker.writeNamingTable(path)
+            table = NamingTable(path)
+            self.assertEqual(table.findEdge((0, 18, 5))[2], [(0,), (1,)])
+            table.close()
+        finally:
+            os.remove(path)
+
+    def test_getEdgeDescendants_LongHistory(self):
+        '''The Edges that were replaced long ago are not walked again'''
+        faces = [self.maker.OCCFace(), self.maker.OCCFace()]
+        faces[1].Edges[0] = faces[0].Edges[0]
+        self.tracker.addFaces(faces)
+        oldNames = ['Edge000']
+        def recompute():
+            edge = self.maker.OCCEdge()
+            newFaces = [self.maker.OCCFace(edges=[edge] + face.Edges[1:]) for face in faces]
+            with self.tracker.transaction() as transaction:
+                for face, newFace in zip(faces, newFaces):
+                    transaction.modifyFace(face, newFace)
+            faces[:] = newFaces
+            return edge
+
+        for i in range(300):
+            edge = recompute()
+            for name in oldNames:
+                self.assertEqual(self.tracker.getEdgeByName(name), [edge])
+            if i == 100:
+                oldNames.append(self.tracker.getEdgeName(edge))
+
+        edge = recompute()
+        hasFaces = mock.Mock(wraps=self.tracker._hasFaces)
+        with mock.patch.object(self.tracker, '_hasFaces', hasFaces):
+            self.assertEqual(self.tracker.getEdgeDescendants('Edge000'), ['Edge000ko'])
+            self.assertEqual(self.tracker.getEdgeDescendants('Edge000cw'), ['Edge000ko'])
+        self.assertTrue(hasFaces.call_count < 20)
+
+        # Once compacted the replaced Edges are still skipped
+        self.tracker.compact()
+        self.assertEqual(self.tracker.getEdgeDescendants('Edge000'), ['Edge000ko'])
+
+    def test_getEdgeDescendants_Seams(self):
+        '''Edges that become shared in the same batch are not pieces of each other'''
+        seams = [self.maker.OCCEdge(), self.maker.OCCEdge()]
+        halves = [self.maker.OCCFace(edges=seams[:]), self.maker.OCCFace(edges=seams[:])]
+        self.tracker.addFaces(halves)
+
+        self.assertEqual(self.tracker.getEdgeDescendants('Edge000'), [])
+        self.assertEqual(self.tracker.getEdgeDescendants('Edge001'), [])
+        self.assertEqual(self.tracker.getEdgeByName('Edge001'), [seams[1]])
+
+    def test_edgeIndexKeyedByShapeKey(self):
+        '''Edges are bucketed by the hashCode of the OCC object'''
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1.Edges[0] = mock_face0.Edges[0]
+
+        self.tracker.addFace(mock_face0)
+        self.tracker.addFace(mock_face1)
+
+        sharedEdge = mock_face0.Edges[0]
+        bucket = self.tracker._edgeIndex[sharedEdge.hashCode()]
+        self.assertEqual(len(self.tracker._edgeIndex), 7)
+        self.assertEqual(len(bucket), 1)
+        self.assertTrue(self.tracker._edgeTrackersById[bucket[0]].isValid())
+
+    def test_getRepresentatives(self):
+        '''Old FaceNames resolve through splits and chains of merges, per version'''
+        self.tracker = TopoTracker(versioned=True)
+        mock_face0, mock_face1, mock_face2 = [self.maker.OCCFace() for i in range(3)]
+        self.tracker.addFaces([mock_face0, mock_face1, mock_face2])
+
+        # Face003 is split off Face000, and Face001 is merged into Face002
+        mock_face0b = self.maker.OCCFace(edges=mock_face0.Edges[:2])
+        mock_face3 = self.maker.OCCFace(edges=mock_face0.Edges[2:])
+        with self.tracker.transaction() as transaction:
+            transaction.modifyFace(mock_face0, mock_face0b)
+            transaction.addFace(mock_face3, parent=mock_face0)
+            transaction.deleteFace(mock_face1, mergedInto=mock_face2)
+        version = self.tracker.getVersion()
+
+        self.assertEqual(self.tracker.getRepresentatives('Face000'), ['Face000', 'Face003'])
+        self.assertEqual(self.tracker.getRepresentatives('Face001'), ['Face002'])
+        self.assertEqual(self.tracker._getFaceTrackerByFaceName('Face003').getParent(), (0,))
+
+        # Face002 follows Face001 into Face003, and the chain is compressed
+        with self.tracker.transaction() as transaction:
+            transaction.deleteFace(mock_face2, mergedInto=mock_face3)
+        self.assertEqual(self.tracker.getRepresentatives('Face001'), ['Face003'])
+        self.assertEqual(self.tracker._faceForward[(1,)], (3,))
+
+        # Merging Face003 back into the Face it was split off does not loop
+        self.tracker.deleteFace(mock_face3)
+        self.assertEqual(self.tracker.getRepresentatives('Face001'), [])
+        with self.tracker.transaction() as transaction:
+            transaction.addFace(mock_face3)
+        with self.tracker.transaction() as transaction:
+            transaction.deleteFace(mock_face3, mergedInto=mock_face0b)
+        self.assertEqual(self.tracker.getRepresentatives('Face004'), ['Face000'])
+        self.assertEqual(self.tracker.getRepresentatives('Face000'), ['Face000'])
+
+        # Every version keeps its own answers
+        self.tracker.checkout(version)
+        self.assertEqual(self.tracker.getRepresentatives('Face001'), ['Face002'])
+
+        snapshot = json.loads(json.dumps(self.tracker.getSnapshot()))
+        restored = TopoTracker.fromSnapshot(snapshot, [mock_face0b, mock_face2, mock_face3])
+        self.assertEqual(restored.getSnapshot(), self.tracker.getSnapshot())
+        self.assertEqual(restored.getRepresentatives('Face000'), ['Face000', 'Face003'])
+
+        # A Face can only be merged into a Face of the resulting shape
+        transaction = self.tracker.transaction()
+        transaction.deleteFace(mock_face2, mergedInto=mock_face1)
+        self.assertRaises(ValueError, transaction.commit)
+        self.assertRaises(ValueError, self.tracker.getRepresentatives, 'Face009')
+
+    def test_lazyEdges(self):
+        '''A lazy tracker only creates the Edges that are asked for, with the same names'''
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1.Edges[0] = mock_face0.Edges[0]
+        mock_face2 = self.maker.OCCFace(edges=[mock_face0.Edges[1], mock_face1.Edges[1]])
+        faces = [mock_face0, mock_face1, mock_face2]
+        self.tracker.addFaces(faces)
+        lazy = TopoTracker(lazy=True)
+        self.assertEqual(lazy.addFaces(faces), ['Face000', 'Face001', 'Face002'])
+        self.assertEqual(len(lazy._edgeTrackersById), 0)
+        self.assertEqual(lazy._numbEdges, self.tracker._numbEdges)
+
+        # Asked for in the opposite order, the names are still the same
+        self.assertEqual(lazy.getEdgeName(mock_face2.Edges[1]), 'Edge004')
+        self.assertEqual(lazy.getEdgeNameFromFaces('Face000', 'Face001'), 'Edge000')
+        self.assertEqual(len(lazy._edgeTrackersById), 2)
+        self.assertEqual(lazy.getEdgeByName('Edge001'), [mock_face0.Edges[1]])
+        self.assertRaises(ValueError, lazy.getEdgeName, mock_face0.Edges[2])
+        self.assertEqual(lazy.getSnapshot(), self.tracker.getSnapshot())
+
+        # Changing a Face only materializes the Edges it can touch
+        lazy = TopoTracker(lazy=True)
+        lazy.addFaces(faces)
+        mock_face2b = self.maker.OCCFace(edges=mock_face2.Edges[:1])
+        lazy.modifyFace(mock_face2, mock_face2b)
+        self.tracker.modifyFace(mock_face2, mock_face2b)
+        self.assertEqual(sorted(lazy._edgeTrackersById), [(1,), (4,)])
+        self.assertEqual(len(lazy._lazyEdges), 5)
+        self.assertEqual(lazy.getSnapshot(), self.tracker.getSnapshot())
+
+        # A third Face on an Edge is still rejected straight away
+        mock_face3 = self.maker.OCCFace(edges=[mock_face0.Edges[0]])
+        lazy = TopoTracker(lazy=True)
+        lazy.addFaces(faces)
+        self.assertRaises(ValueError, lazy.addFace, mock_face3)
+        self.assertEqual(len(lazy._faceTrackersById), 3)
+        self.assertRaises(ValueError, TopoTracker, versioned=True, lazy=True)
+
+    def test_lazyEdgesNearAndCompact(self):
+        '''getEdgesNear and compact only materialize the Edges they need'''
+        squares = [self.maker.OCCPolygon([(i, 0, 0), (i + 1, 0, 0), (i + 1, 1, 0), (i, 1, 0)])
+                   for i in range(10)]
+        lazy = TopoTracker(lazy=True)
+        lazy.addFaces(squares)
+        self.tracker.addFaces(squares)
+        probe = self.maker.OCCLine((1, 0.2, 0), (1, 0.8, 0))
+        self.assertEqual(lazy.getEdgesNear(probe), self.tracker.getEdgesNear(probe))
+        # The Edges of Face000 and Face001, and not those of the 8 others
+        self.assertEqual(len(lazy._edgeTrackersById), 7)
+
+        lazy.deleteFace(squares[9])
+        self.tracker.deleteFace(squares[9])
+        lazy.compact()
+        self.tracker.compact()
+        self.assertEqual(len(lazy._edgeTrackersById), 8)
+        self.assertEqual(lazy.getSnapshot(), self.tracker.getSnapshot())
+
+        # A pending Edge that is named after a dead Edge is materialized before it goes
+        lazy.deleteFace(squares[8])
+        self.tracker.deleteFace(squares[8])
+        lazy.addFace(squares[8])
+        self.tracker.addFace(squares[8])
+        lazy.compact()
+        self.tracker.compact()
+        self.assertEqual(lazy.getSnapshot(), self.tracker.getSnapshot())
+
+    def test_edgeIndexCollidingKeys(self):
+        '''If every edge shares a key, isSame must still tell them apart'''
+        self.tracker = TopoTracker(shapeKey=lambda occShape: 0)
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1.Edges[0] = mock_face0.Edges[0]
+
+        self.tracker.addFace(mock_face0)
+        self.tracker.addFace(mock_face1)
+
+        self.assertEqual(len(self.tracker._edgeIndex[0]), 7)
+        self.assertEqual(self.tracker.getEdgeName(mock_face1.Edges[0]), 'Edge000')
+        self.assertRaises(ValueError, self.tracker.getEdgeName, mock_face1.Edges[1])
+
+    def test_edgeIndexFingerprints(self):
+        '''A big bucket is narrowed down by fingerprint before isSame is called'''
+        self.tracker = TopoTracker(shapeKey=lambda occShape: 0)
+        stats = TopoStats()
+        self.tracker.setStats(stats)
+        # Two rows of unit squares that share the Edges between them
+        line = self.maker.OCCLine
+        bottom = [line((i, 0, 0), (i + 1, 0, 0)) for i in range(4)]
+        middle = [line((i, 1, 0), (i + 1, 1, 0)) for i in range(4)]
+        top = [line((i, 2, 0), (i + 1, 2, 0)) for i in range(4)]
+        for row, (lower, upper) in enumerate([(bottom, middle), (middle, top)]):
+            sides = [line((i, row, 0), (i, row + 1, 0)) for i in range(5)]
+            for i in range(4):
+                self.tracker.addFace(self.maker.OCCFace(edges=[lower[i], sides[i + 1],
+                                                               upper[i], sides[i]]))
+
+        self.assertEqual(len(self.tracker._edgeIndex[0]), 22)
+        stats.reset()
+        self.assertEqual(self.tracker.getEdgeName(middle[2]), 'Edge009')
+        self.assertEqual(stats.getCounts(), {'isSame': 1})
+        self.assertEqual(self.tracker.getEdgeName(middle[0]), 'Edge002')
+
+        # A bucket full of Edges without geometry is searched one by one
+        for face in self.tracker._faceTrackers:
+            self.tracker.deleteFace(face.getOCCFace())
+        faces = [self.maker.OCCFace() for i in range(3)]
+        faces[1].Edges[0] = faces[0].Edges[0]
+        self.tracker.addFaces(faces)
+        self.assertEqual(self.tracker.getEdgeName(faces[0].Edges[0]), 'Edge022')
+
+    def test_edgeIndexFingerprintsAfterCheckout(self):
+        '''The cached fingerprints do not outlive a checkout, since Edge ids are reused'''
+        tracker = TopoTracker(shapeKey=lambda occShape: 0, versioned=True)
+        line = self.maker.OCCLine
+        def square(x, y):
+            return self.maker.OCCFace(edges=[line((x, y, 0), (x + 1, y, 0)),
+                                             line((x + 1, y, 0), (x + 1, y + 1, 0)),
+                                             line((x, y + 1, 0), (x + 1, y + 1, 0)),
+                                             line((x, y, 0), (x, y + 1, 0))])
+        tracker.addFaces([square(0, 0), square(5, 0)])
+        tracker.addFace(square(10, 0))
+
+        tracker.checkout(0)
+        faces = [square(0, 5), square(5, 5)]
+        tracker.addFaces(faces)
+        neighbour = square(6, 5)
+        neighbour.Edges[3] = faces[1].Edges[1]
+        tracker.addFace(neighbour)
+        self.assertEqual(tracker.getEdgeName(faces[1].Edges[1]), 'Edge005')
+        self.assertEqual(len(tracker._edgeIndex[0]), 11)
+
+    def test_getFacesAndEdgesNear(self):
+        '''The spatial index follows the Faces as they are added, modified and deleted'''
+        self.tracker = TopoTracker(versioned=True)
+        squares = [self.maker.OCCPolygon([(i, 0, 0), (i + 1, 0, 0), (i + 1, 1, 0), (i, 1, 0)])
+                   for i in range(3)]
+        self.tracker.addFaces(squares)
+        added = self.tracker.getVersion()
+        probe = self.maker.OCCLine((1, 0.2, 0), (1, 0.8, 0))
+
+        self.assertEqual(self.tracker.getEdgesNear(probe), ['Edge001'])
+        self.assertEqual(self.tracker.getFacesNear(probe), ['Face000', 'Face001'])
+        self.assertEqual(self.tracker.getFacesNear(probe, tolerance=1),
+                         ['Face000', 'Face001', 'Face002'])
+        self.assertRaises(ValueError, self.tracker.getFacesNear, self.maker.OCCEdge())
+
+        moved = self.maker.OCCPolygon([(0, 5, 0), (1, 5, 0), (1, 6, 0), (0, 6, 0)])
+        self.tracker.modifyFace(squares[0], moved)
+        self.tracker.deleteFace(squares[1])
+        self.assertEqual(self.tracker.getFacesNear(probe), [])
+        self.assertEqual(self.tracker.getFacesNear(moved), ['Face000'])
+        # Boxes that touch overlap: the two sides that meet the bottom at its corners
+        self.assertEqual(self.tracker.getEdgesNear(moved.Edges[0]),
+                         ['Edge010', 'Edge011', 'Edge013'])
+        # Edges without Faces are left out, whenever the index was built
+        self.assertEqual(self.tracker.getEdgesNear(probe), [])
+        self.tracker._faceSpace = self.tracker._edgeSpace = None
+        self.assertEqual(self.tracker.getEdgesNear(probe), [])
+
+        self.tracker.compact()
+        self.assertEqual(self.tracker.getEdgesNear(probe), [])
+        self.tracker.checkout(added)
+        self.assertEqual(self.tracker.getFacesNear(probe), ['Face000', 'Face001'])
+        self.assertEqual(self.tracker.getEdgesNear(probe), ['Edge001'])
+
+    def test_trackersByName(self):
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1.Edges[0] = mock_face0.Edges[0]
+
+        self.tracker.addFace(mock_face0)
+        faceName1 = self.tracker.addFace(mock_face1)
+
+        faceTracker = self.tracker._getFaceTrackerByFaceName(faceName1)
+        edgeTracker = self.tracker._getEdgeTracker('Edge006')
+        self.assertEqual(faceTracker.getOCCFace().value, mock_face1.value)
+        self.assertEqual(edgeTracker.getOCCEdge().value, mock_face1.Edges[3].value)
+        self.assertRaises(ValueError, self.tracker._getFaceTrackerByFaceName, 'Face002')
+        self.assertRaises(ValueError, self.tracker._getEdgeTracker, 'Edge007')
+
+    def test_modifyFaceUpdatesFaceIndex(self):
+        mock_face0a = self.maker.OCCFace()
+        mock_face0b = self.maker.OCCFace()
+
+        faceName = self.tracker.addFace(mock_face0a)
+        self.tracker.modifyFace(mock_face0a, mock_face0b)
+
+        self.assertRaises(ValueError, self.tracker._getFaceTracker, mock_face0a)
+        faceTracker = self.tracker._getFaceTracker(mock_face0b)
+        self.assertEqual(faceTracker.getName(), faceName)
+
+    def test_deleteFaceRemovesFromFaceIndex(self):
+        mock_face0 = self.maker.OCCFace()
+
+        faceName = self.tracker.addFace(mock_face0)
+        self.tracker.deleteFace(mock_face0)
+
+        self.assertRaises(ValueError, self.tracker._getFaceTracker, mock_face0)
+        faceTracker = self.tracker._getFaceTrackerByFaceName(faceName)
+        self.assertEqual(faceTracker.getName(), faceName)
+
+    def test_edgesByFace(self):
+        '''Each Face knows exactly which TrackedEdges currently include it'''
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1a = self.maker.OCCFace()# Edges 0, 5, 6, 7 (see below)
+        mock_face1a.Edges[0] = mock_face0.Edges[0]
+        mock_face1b = self.maker.OCCFace()# Edges 8, 9, 10, 11
+
+        self.tracker.addFace(mock_face0)
+        faceName1 = self.tracker.addFace(mock_face1a)
+        self.tracker.modifyFace(mock_face1a, mock_face1b)
+
+        edgeValue = lambda edgeId: self.tracker._edgeTrackersById[edgeId].getOCCEdge().value
+        edgeValues0 = [edgeValue(i) for i in self.tracker._edgesByFace[(0,)]]
+        edgeValues1 = [edgeValue(i) for i in self.tracker._edgesByFace[(1,)]]
+        self.assertEqual(edgeValues0, [i.value for i in mock_face0.Edges])
+        self.assertEqual(edgeValues1, [i.value for i in mock_face1b.Edges])
+
+        self.tracker.deleteFace(mock_face1b)
+        self.assertFalse((1,) in self.tracker._edgesByFace)
+        for edgeTracker in self.tracker._edgeTrackers:
+            self.assertFalse(edgeTracker.hasFace(faceName1))
+
+    def test_getEdgeNameFromFaces_OCCFaces(self):
+        '''The two faces may also be given as the tracked OCCFaces'''
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1.Edges[0] = mock_face0.Edges[0]
+
+        faceName0 = self.tracker.addFace(mock_face0)
+        self.tracker.addFace(mock_face1)
+
+        self.assertEqual(self.tracker.getEdgeNameFromFaces(mock_face1, mock_face0), 'Edge000')
+        self.assertEqual(self.tracker.getEdgeNameFromFaces(mock_face1, faceName0), 'Edge000')
+
+    def test_edgesByFacePair(self):
+        '''The Face pair index only holds Edges that are currently shared by both Faces'''
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1a = self.maker.OCCFace()# Edges 0, 5, 6, 7 (see below)
+        mock_face1a.Edges[0] = mock_face0.Edges[0]
+        mock_face1b = self.maker.OCCFace()# Edges 8, 9, 10, 11
+
+        faceName0 = self.tracker.addFace(mock_face0)
+        faceName1 = self.tracker.addFace(mock_face1a)
+        pairEdges = self.tracker._edgesByFacePair[((0,), (1,))]
+        self.assertEqual(pairEdges, ((0,),))
+
+        self.tracker.modifyFace(mock_face1a, mock_face1b)
+        self.assertEqual(self.tracker._edgesByFacePair, {})
+        self.assertRaises(ValueError, self.tracker.getEdgeNameFromFaces, faceName0, faceName1)
+
+    def _trackerState(self, tracker):
+        '''Returns a comparable summary of the names held by tracker'''
+        faces = [(i.getName(), i.getOCCFace().value) for i in tracker._faceTrackers]
+        edges = [(i.getName(), i.getOCCEdge().value, i.getFaceNames())
+                 for i in tracker._edgeTrackers]
+        return faces, edges
+
+    def test_addFaces_sameNamesAsAddFace(self):
+        box = self.maker.BoxFeature()
+        filletFace, filletBox = self.maker.createFillet()
+        for faces in [box.Shape.Faces, filletBox.Shape.Faces + [filletFace]]:
+            incremental = TopoTracker()
+            for face in faces:
+                incremental.addFace(face)
+            bulk = TopoTracker()
+            names = bulk.addFaces(faces)
+
+            self.assertEqual(names, [i.getName() for i in incremental._faceTrackers])
+            self.assertEqual(self._trackerState(bulk), self._trackerState(incremental))
+
+    def test_addFaces_afterAddFace(self):
+        '''Edges of the batch are matched against Edges that are already tracked'''
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1.Edges[0] = mock_face0.Edges[0]
+
+        self.tracker.addFace(mock_face0)
+        self.tracker.addFaces([mock_face1])
+
+        self.assertEqual(len(self.tracker._edgeTrackers), 7)
+        self.assertEqual(self.tracker.getEdgeName(mock_face1.Edges[0]), 'Edge000')
+
+    def test_addFaces_errorsChangeNothing(self):
+        mock_face0 = self.maker.OCCFace()
+        mock_face1 = self.maker.OCCFace()
+        mock_face2 = self.maker.OCCFace()
+        mock_face1.Edges[0] = mock_face0.Edges[0]
+        mock_face2.Edges[0] = mock_face0.Edges[0]
+
+        self.assertRaises(ValueError, self.tracker.addFaces, [mock_face0, mock_face0])
+        self.assertRaises(ValueError, self.tracker.addFaces, [mock_face0, mock_face1, mock_face2])
+        self.assertEqual(self._trackerState(self.tracker), ([], []))
+        self.assertEqual(self.tracker._numbFaces, 0)
+        self.assertEqual(self.tracker._numbEdges, 0)
+
+    def test_modifyFace_onlyChangedEdges(self):
+        '''Modifying one Edge of a Face leaves the TrackedEdges of its other Edges alone'''
+        box = self.maker.BoxFeature()
+        self.tracker.addFaces(box.Shape.Faces)
+        front = box.Shape.Faces[self.maker._boxFaces['front']]
+        newFront = self.maker.OCCFace(edges=front.Edges[:])
+        newFront.Edges[0] = self.maker.OCCEdge()
+
+        before = [(i.getName(), i.getFaceNames()) for i in self.tracker._edgeTrackers]
+        self.tracker.modifyFace(front, newFront)
+        after = [(i.getName(), i.getFaceNames()) for i in self.tracker._edgeTrackers]
+
+        # Edge000 lost the front Face, Edge012 is new. Everything else is untouched.
+        self.assertEqual(after[0], ('Edge000', ['Face002']))
+        self.assertEqual(after[1:12], before[1:12])
+        self.assertEqual(after[12], ('Edge012', ['Face000']))
+        edgeIds = self.tracker._edgesByFace[(0,)]
+        self.assertEqual(edgeIds, ((1,), (2,), (3,), (12,)))
+
+    def test_namesPast999(self):
+        self.tracker._numbEdges = 999
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1.Edges[1] = mock_face0.Edges[1]
+
+        self.tracker.addFaces([mock_face0, mock_face1])
+
+        edgeName = self.tracker.getEdgeName(mock_face0.Edges[1])
+        self.assertEqual(edgeName, 'Edge1000')
+        checkEdge = self.tracker.getEdgeByName(edgeName)
+        self.assertEqual([i.value for i in checkEdge], [mock_face0.Edges[1].value])
+
+    def test_snapshotRoundTrip(self):
+        '''A restored tracker holds the same names and keeps naming the same way'''
+        box = self.maker.BoxFeature()
+        faces = box.Shape.Faces
+        self.tracker.addFaces(faces)
+        front = faces[self.maker._boxFaces['front']]
+        newFront = self.maker.OCCFace(edges=front.Edges[:])
+        newFront.Edges[0] = self.maker.OCCEdge()
+        self.tracker.modifyFace(front, newFront)
+        self.tracker.deleteFace(faces[self.maker._boxFaces['back']])
+        liveFaces = [i for i in faces if not i is faces[1]]
+        liveFaces[0] = newFront
+
+        snapshot = json.loads(json.dumps(self.tracker.getSnapshot()))
+        restored = TopoTracker.fromSnapshot(snapshot, liveFaces)
+
+        self.assertEqual(restored.getSnapshot(), self.tracker.getSnapshot())
+        edgeState = lambda tracker: [(i.getName(), i.getOCCEdge().value, i.getFaceNames())
+                                     for i in tracker._edgeTrackers]
+        self.assertEqual(edgeState(restored), edgeState(self.tracker))
+        extraFace = self.maker.OCCFace(edges=[newFront.Edges[0]])
+        for tracker in [self.tracker, restored]:
+            self.assertEqual(tracker.getEdgeName(newFront.Edges[1]), 'Edge001')
+            self.assertEqual(tracker.getEdgeNameFromFaces('Face002', 'Face004'), 'Edge008')
+            self.assertRaises(ValueError, tracker.getEdgeByName, 'Edge000')
+            tracker.addFace(extraFace)
+        self.assertEqual(restored.getSnapshot(), self.tracker.getSnapshot())
+
+    def test_snapshotCollidingKeys(self):
+        '''With colliding shape keys the Faces and Edges are still matched by isSame'''
+        shapeKey = lambda occShape: occShape.value % 5
+        tracker = TopoTracker(shapeKey=shapeKey)
+        box = self.maker.BoxFeature()
+        faces = box.Shape.Faces
+        tracker.addFaces(faces)
+
+        snapshot = json.loads(json.dumps(tracker.getSnapshot()))
+        restored = TopoTracker.fromSnapshot(snapshot, list(reversed(faces)), shapeKey)
+
+        state = lambda tracker: ([(i.getName(), i.getOCCFace().value)
+                                  for i in tracker._faceTrackers] +
+                                 [(i.getName(), i.getOCCEdge().value, i.getFaceNames())
+                                  for i in tracker._edgeTrackers])
+        self.assertEqual(state(restored), state(tracker))
+
+    def test_snapshotErrors(self):
+        mock_face0 = self.maker.OCCFace()
+        self.tracker.addFace(mock_face0)
+        snapshot = self.tracker.getSnapshot()
+
+        self.assertRaises(ValueError, TopoTracker.fromSnapshot, snapshot, [])
+        snapshot['version'] = -1
+        self.assertRaises(ValueError, TopoTracker.fromSnapshot, snapshot, [mock_face0])
+
+    def test_versions(self):
+        '''Every batch is a version, and checking one out restores exactly its names'''
+        tracker = TopoTracker(versioned=True)
+        box = self.maker.BoxFeature()
+        faces = box.Shape.Faces
+        front = faces[self.maker._boxFaces['front']]
+        newFront = self.maker.OCCFace(edges=front.Edges[:])
+        newFront.Edges[0] = self.maker.OCCEdge()
+
+        self.assertEqual(tracker.getVersion(), 0)
+        tracker.addFaces(faces)
+        boxState = self._trackerState(tracker)
+        boxSnapshot = tracker.getSnapshot()
+        tracker.modifyFace(front, newFront)
+        filletState = self._trackerState(tracker)
+        self.assertEqual(tracker.getVersions(), [0, 1, 2])
+
+        tracker.checkout(1)
+        self.assertEqual(self._trackerState(tracker), boxState)
+        self.assertEqual(tracker.getSnapshot(), boxSnapshot)
+        self.assertEqual(tracker.getEdgeName(front.Edges[0]), 'Edge000')
+        tracker.checkout(2)
+        self.assertEqual(self._trackerState(tracker), filletState)
+        self.assertRaises(ValueError, tracker.getEdgeName, front.Edges[0])
+
+        # Changing an older version branches off a new one and leaves the others alone
+        tracker.checkout(1)
+        tracker.deleteFace(front)
+        self.assertEqual(tracker.getVersion(), 3)
+        tracker.checkout(1)
+        self.assertEqual(self._trackerState(tracker), boxState)
+        tracker.checkout(2)
+        self.assertEqual(self._trackerState(tracker), filletState)
+
+        tracker.dropVersion(0)
+        self.assertEqual(tracker.getVersions(), [1, 2, 3])
+        self.assertRaises(ValueError, tracker.checkout, 0)
+        self.assertRaises(ValueError, self.tracker.checkout, 0)
+        self.assertRaises(ValueError, self.tracker.getVersion)
+
+    def test_versionsShareTrackers(self):
+        '''A new version only copies the trackers it changes'''
+        tracker = TopoTracker(versioned=True)
+        box = self.maker.BoxFeature()
+        faces = box.Shape.Faces
+        front = faces[self.maker._boxFaces['front']]
+        newFront = self.maker.OCCFace(edges=front.Edges[:])
+        newFront.Edges[0] = self.maker.OCCEdge()
+        tracker.addFaces(faces)
+        before = dict(tracker._edgeTrackersById.items())
+        tracker.modifyFace(front, newFront)
+        after = dict(tracker._edgeTrackersById.items())
+
+        changed = [i for i in before if not before[i] is after[i]]
+        self.assertEqual(changed, [(0,)])
+        self.assertEqual(before[(0,)].getFaceNames(), ['Face000', 'Face002'])
+        self.assertEqual(after[(0,)].getFaceNames(), ['Face002'])
+
+    def test_versionedSnapshot(self):
+        box = self.maker.BoxFeature()
+        self.tracker.addFaces(box.Shape.Faces)
+        snapshot = self.tracker.getSnapshot()
+        restored = TopoTracker.fromSnapshot(snapshot, box.Shape.Faces, versioned=True)
+
+        self.assertEqual(restored.getVersions(), [0])
+        self.assertEqual(restored.getSnapshot(), snapshot)
+
+    def test_compactDeletedFaces(self):
+        '''Compaction forgets deleted Faces and the Edges that can never resolve again'''
+        box = self.maker.BoxFeature()
+        faces = box.Shape.Faces
+        front = faces[self.maker._boxFaces['front']]
+        top = faces[self.maker._boxFaces['top']]
+        back = faces[self.maker._boxFaces['back']]
+        self.tracker.addFaces(faces)
+        backEdgeName = self.tracker.getEdgeName(back.Edges[1])
+        self.tracker.deleteFace(front)
+        self.tracker.deleteFace(top)
+        self.assertEqual(len(self.tracker._deadFaces), 2)
+        self.assertEqual(list(self.tracker._deadEdges), [(0,)])
+
+        self.tracker.compact()
+
+        self.assertEqual(len(self.tracker._faceTrackersById), 4)
+        self.assertFalse((0,) in self.tracker._edgeTrackersById)
+        self.assertEqual(len(self.tracker._edgeIndex), 11)
+        self.assertEqual(self.tracker._deadFaces, {})
+        self.assertEqual(self.tracker._deadEdges, {})
+        self.assertRaises(ValueError, self.tracker._getFaceTrackerByFaceName, 'Face000')
+        self.assertRaises(ValueError, self.tracker.getEdgeByName, 'Edge000')
+        self.assertEqual(self.tracker.getEdgeName(back.Edges[1]), backEdgeName)
+        self.assertEqual(self.tracker.addFace(self.maker.OCCFace()), 'Face006')
+
+    def test_compactKeepsTombstones(self):
+        '''An Edge between two live Faces stays resolvable through its last valid Faces'''
+        box = self.maker.BoxFeature()
+        faces = box.Shape.Faces
+        front = faces[self.maker._boxFaces['front']]
+        top = faces[self.maker._boxFaces['top']]
+        self.tracker.addFaces(faces)
+        newFront = self.maker.OCCFace(edges=front.Edges[1:])
+        newTop = self.maker.OCCFace(edges=[i for i in top.Edges if not i is front.Edges[0]])
+        self.tracker.modifyFace(front, newFront)
+        self.tracker.modifyFace(top, newTop)
+
+        self.tracker.compact()
+
+        tombstone = self.tracker._getEdgeTracker('Edge000')
+        self.assertTrue(tombstone.getOCCEdge() is None)
+        self.assertEqual(tombstone.getLastValidFaceNames(), ['Face000', 'Face002'])
+        self.assertEqual(self.tracker._edgeTombstones[(0,)], ((0,),))
+        self.assertRaises(ValueError, self.tracker.getEdgeByName, 'Edge000')
+        self.assertRaises(ValueError, self.tracker.getEdgeName, front.Edges[0])
+
+        # front and top meet again, e.g. after the fillet is suppressed
+        newEdge = self.maker.OCCEdge()
+        self.tracker.modifyFace(newFront, self.maker.OCCFace(edges=[newEdge] + front.Edges[1:]))
+        self.tracker.modifyFace(newTop, self.maker.OCCFace(edges=[newEdge] + newTop.Edges))
+        self.assertEqual([i.value for i in self.tracker.getEdgeByName('Edge000')],
+                         [newEdge.value])
+
+        # Once one of its Faces is gone the tombstone can never resolve again
+        self.tracker.deleteFace(self.tracker._getFaceTrackerByFaceName('Face000').getOCCFace())
+        self.tracker.compact()
+        self.assertRaises(ValueError, self.tracker._getEdgeTracker, 'Edge000')
+        self.assertFalse((0,) in self.tracker._edgeTombstones)
+        self.assertFalse((2,) in self.tracker._edgeTombstones)
+
+    def test_compactBoundsTombstones(self):
+        '''Recomputing a shape over and over keeps at most one tombstone per Face pair'''
+        tracker = TopoTracker(deadRatio=0.3)
+        faces = self.maker.BoxFeature().Shape.Faces
+        tracker.addFaces(faces)
+        sizes = []
+        for i in range(300):
+            newEdges = {}
+            newFaces = []
+            for face in faces:
+                edges = [newEdges.setdefault(id(j), self.maker.OCCEdge()) for j in face.Edges]
+                newFaces.append(self.maker.OCCFace(edges=edges))
+            with tracker.transaction() as transaction:
+                for face, newFace in zip(faces, newFaces):
+                    transaction.modifyFace(face, newFace)
+            faces = newFaces
+            if i % 100 == 99:
+                tracker.compact()
+                tombstones = sum([len(j) for j in tracker._edgeTombstones.values()])
+                sizes.append((len(tracker._edgeTrackersById), tombstones))
+
+        self.assertEqual(sizes, [(24, 24)] * 3)
+        self.assertEqual(tracker.getEdgeByName('Edge000'), [faces[0].Edges[0]])
+
+    def test_compactAutomatically(self):
+        tracker = TopoTracker(deadRatio=0.1)
+        box = self.maker.BoxFeature()
+        faces = box.Shape.Faces
+        tracker.addFaces(faces)
+        tracker.deleteFace(faces[self.maker._boxFaces['front']])
+        # One dead Face out of 18 trackers is not enough
+        self.assertEqual(len(tracker._faceTrackersById), 6)
+        tracker.deleteFace(faces[self.maker._boxFaces['top']])
+        self.assertEqual(len(tracker._faceTrackersById), 4)
+        self.assertEqual(len(tracker._deadFaces) + len(tracker._deadEdges), 0)
+
+    def test_compactKeepsVersions(self):
+        tracker = TopoTracker(versioned=True)
+        box = self.maker.BoxFeature()
+        faces = box.Shape.Faces
+        tracker.addFaces(faces)
+        tracker.deleteFace(faces[self.maker._boxFaces['front']])
+        tracker.deleteFace(faces[self.maker._boxFaces['top']])
+        tracker.compact()
+        self.assertEqual(tracker.getVersion(), 4)
+
+        tracker.checkout(3)
+        self.assertEqual(len(tracker._faceTrackersById), 6)
+        self.assertEqual(len(tracker._deadFaces), 2)
+
+    def test_releaseSupersededObjects(self):
+        '''Deleted Faces only hold their OCC objects weakly, Edges keep theirs until compacted'''
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1.Edges[0] = mock_face0.Edges[0]
+        self.tracker.addFaces([mock_face0, mock_face1])
+        self.tracker.deleteFace(mock_face0)
+
+        faceTracker = self.tracker._getFaceTrackerByFaceName('Face000')
+        self.assertTrue(faceTracker.isReleased())
+        self.assertEqual(faceTracker.getSignature().getKey(), mock_face0.hashCode())
+        self.assertFalse(self.tracker._getEdgeTracker('Edge001').isReleased())
+
+        # The OCCFace is freed, but its Edges are still matched by isSame
+        edgeValue = mock_face0.Edges[1].value
+        del mock_face0
+        gc.collect()
+        self.assertEqual(faceTracker.getOCCFace(), None)
+        self.tracker.addFace(self.maker.OCCFace(edges=[self.maker.OCCEdge(edgeValue)]))
+        self.assertEqual(self.tracker._getEdgeTracker('Edge001').getFaceNames(), ['Face002'])
+
+        # Compaction drops the Edges that can not be resolved anymore
+        self.tracker.compact()
+        self.assertRaises(ValueError, self.tracker._getEdgeTracker, 'Edge002')
+
+    def test_releaseEdgeLikeShapes(self):
+        '''Shapes with a normalAt but no (u, v) range are released without failing the batch'''
+        def normalAt(*parameters):
+            raise RuntimeError('No normal defined')
+        tracker = TopoTracker(deadRatio=0.0)
+        mock_face0 = self.maker.OCCFace()
+        mock_face0.ParameterRange = (0.0, 1.0, 0.0, 1.0)
+        mock_face0.normalAt = normalAt
+        for edge in mock_face0.Edges:
+            edge.ParameterRange = (0.0, 1.0)
+            edge.normalAt = normalAt
+        tracker.addFace(mock_face0)
+        batches = []
+        tracker.setJournal(mock.Mock(recordBatch=lambda *args: batches.append(args),
+                                     compact=lambda tracker: None))
+
+        tracker.deleteFace(mock_face0)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(tracker._edgeTrackersById, {})
+
+    def test_edgeNamesDoNotDependOnGarbageCollection(self):
+        '''An Edge that is dropped by both of its Faces and added back keeps its name'''
+        mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        mock_face1.Edges[0] = mock_face0.Edges[0]
+        self.tracker.addFaces([mock_face0, mock_face1])
+        edgeValue = mock_face0.Edges[0].value
+
+        withoutEdge = []
+        for face in [mock_face0, mock_face1]:
+            newFace = self.maker.OCCFace(edges=face.Edges[1:])
+            self.tracker.modifyFace(face, newFace)
+            withoutEdge.append(newFace)
+        del mock_face0, mock_face1, face
+        gc.collect()
+
+        for face in withoutEdge:
+            edges = [self.maker.OCCEdge(edgeValue)] + list(face.Edges)
+            self.tracker.modifyFace(face, self.maker.OCCFace(edges=edges))
+        self.assertEqual(self.tracker.getEdgeName(self.maker.OCCEdge(edgeValue)), 'Edge000')
+
+    def test_stats(self):
+        '''The kernel calls, index lookups and operations of a box are all recorded'''
+        stats = TopoStats()
+        self.tracker.setStats(stats)
+        box = self.maker.BoxFeature()
+        self.tracker.addFaces(box.Shape.Faces)
+
+        # Each Face is read once. isSame is only called on the second Face of every Edge.
+        counts = stats.getCounts()
+        self.assertEqual(counts['Edges'], 6)
+        self.assertEqual(counts['isSame'], 12)
+        self.assertEqual(stats.getLookups(), {'edgeIndex': (0, 24), 'faceIndex': (0, 6)})
+
+        self.tracker.getEdgeName(box.Shape.Faces[0].Edges[0])
+        self.assertEqual(stats.getLookups()['edgeIndex'], (1, 24))
+        self.assertEqual(sorted(stats.getTimings()),
+                         ['addFaces', 'applyChanges', 'getEdgeName'])
+
+        self.tracker.setStats(None)
+        self.tracker.getEdgeName(box.Shape.Faces[0].Edges[1])
+        self.assertEqual(stats.getLookups()['edgeIndex'], (1, 24))
+        self.assertFalse('_isTrackedEdge' in self.tracker.__dict__)
+        self.assertFalse('addFaces' in self.tracker.__dict__)
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from PyTopoNamer.TopoTracker import TopoTracker
+from PyTopoNamer.TopoTrackerView import TopoTrackerView
+from test.TestingHelpers import MockObjectMaker
+
+class TestTopoTrackerView(unittest.TestCase):
+    def setUp(self):
+        self.maker = MockObjectMaker()
+        self.box = self.maker.BoxFeature()
+        self.tracker = TopoTracker()
+        self.tracker.addFaces(self.box.Shape.Faces)
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.tracker.writeNamingTable(self.path)
+        self.view = TopoTrackerView(self.path, self.box.Shape.Faces)
+
+    def tearDown(self):
+        self.view.close()
+        os.remove(self.path)
+
+    def test_getEdgeName(self):
+        for face in self.box.Shape.Faces:
+            for edge in face.Edges:
+                self.assertEqual(self.view.getEdgeName(edge), self.tracker.getEdgeName(edge))
+        self.assertRaises(ValueError, self.view.getEdgeName, self.maker.OCCEdge())
+
+    def test_getEdgeByName(self):
+        for edgeTracker in self.tracker._edgeTrackers:
+            name = edgeTracker.getName()
+            check = [i.value for i in self.view.getEdgeByName(name)]
+            self.assertEqual(check, [i.value for i in self.tracker.getEdgeByName(name)])
+        self.assertRaises(ValueError, self.view.getEdgeByName, 'Edge012')
+        self.assertRaises(ValueError, self.view.getEdgeByName, 'Face000')
+
+    def test_lazyMaterialization(self):
+        self.assertEqual(self.view._edgeTrackersById, {})
+        self.assertEqual(self.view._faceTrackersById, {})
+        self.view.getEdgeByName('Edge005')
+        self.assertEqual(list(self.view._edgeTrackersById.keys()), [(5,)])
+        self.assertEqual(len(self.view._faceTrackersById), 2)
+
+    def test_collidingKeys(self):
+        '''Faces with the same shape key are told apart by their Edges'''
+        shapeKey = lambda occShape: occShape.value % 5
+        tracker = TopoTracker(shapeKey=shapeKey)
+        tracker.addFaces(self.box.Shape.Faces)
+        tracker.writeNamingTable(self.path)
+        view = TopoTrackerView(self.path, list(reversed(self.box.Shape.Faces)), shapeKey)
+        for edgeTracker in tracker._edgeTrackers:
+            name = edgeTracker.getName()
+            check = [i.value for i in view.getEdgeByName(name)]
+            self.assertEqual(check, [i.value for i in tracker.getEdgeByName(name)])
+        view.close()
+
+    def assertSameEdges(self, tracker, OCCFaces):
+        '''Every name resolves to the same Edges, or fails, in tracker and in its view'''
+        tracker.writeNamingTable(self.path)
+        view = TopoTrackerView(self.path, OCCFaces)
+        for edgeTracker in tracker._edgeTrackers:
+            name = edgeTracker.getName()
+            try:
+                expected = [i.value for i in tracker.getEdgeByName(name)]
+            except ValueError:
+                self.assertRaises(ValueError, view.getEdgeByName, name)
+                continue
+            self.assertEqual([i.value for i in view.getEdgeByName(name)], expected)
+        view.close()
+
+    def test_getEdgeByNameLineage(self):
+        '''The view follows the Edges an Edge was split into, like the tracker'''
+        tracker = TopoTracker()
+        mock_face0a = self.maker.OCCFace()
+        mock_face1a = self.maker.OCCFace()
+        mock_face1a.Edges[0] = mock_face0a.Edges[0]
+        tracker.addFaces([mock_face0a, mock_face1a])
+
+        pieces = [self.maker.OCCEdge(), self.maker.OCCEdge()]
+        mock_face0b = self.maker.OCCFace(edges=pieces + mock_face0a.Edges[1:])
+        mock_face1b = self.maker.OCCFace(edges=pieces + mock_face1a.Edges[1:])
+        with tracker.transaction() as transaction:
+            transaction.modifyFace(mock_face0a, mock_face0b)
+            transaction.modifyFace(mock_face1a, mock_face1b)
+        more = [self.maker.OCCEdge(), self.maker.OCCEdge()]
+        mock_face0c = self.maker.OCCFace(edges=pieces[:1] + more + mock_face0a.Edges[1:])
+        mock_face1c = self.maker.OCCFace(edges=pieces[:1] + more + mock_face1a.Edges[1:])
+        with tracker.transaction() as transaction:
+            transaction.modifyFace(mock_face0b, mock_face0c)
+            transaction.modifyFace(mock_face1b, mock_face1c)
+
+        self.assertSameEdges(tracker, [mock_face0c, mock_face1c])
+        tracker.writeNamingTable(self.path)
+        view = TopoTrackerView(self.path, [mock_face0c, mock_face1c])
+        self.assertEqual(view.getEdgeByName('Edge000'), pieces[:1] + more)
+        self.assertEqual(view.getEdgeByName('Edge000b'), more)
+        view.close()
+
+    def test_getEdgeByNameMergedFaces(self):
+        '''An Edge of a merged Face resolves through the Face it was merged into'''
+        tracker = TopoTracker()
+        faces = self.box.Shape.Faces
+        tracker.addFaces(faces)
+        merged = self.maker.OCCFace(edges=faces[1].Edges + faces[2].Edges)
+        with tracker.transaction() as transaction:
+            transaction.addFace(merged)
+            transaction.deleteFace(faces[1], mergedInto=merged)
+            transaction.deleteFace(faces[2], mergedInto=merged)
+        liveFaces = [faces[0]] + faces[3:] + [merged]
+        self.assertSameEdges(tracker, liveFaces)
+
+    def test_readOnly(self):
+        self.assertRaises(ValueError, self.view.addFace, self.maker.OCCFace())
+        self.assertRaises(ValueError, self.view.deleteFace, self.box.Shape.Faces[0])
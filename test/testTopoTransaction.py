@@ -0,0 +1,93 @@
+import unittest
+from PyTopoNamer.TopoTracker import TopoTracker
+from test.TestingHelpers import MockObjectMaker
+
+class TestTopoTransaction(unittest.TestCase):
+    def setUp(self):
+        self.maker = MockObjectMaker()
+        self.tracker = TopoTracker()
+        self.mock_face0 = self.maker.OCCFace() # Edges 0, 1, 2 ,3
+        self.mock_face1 = self.maker.OCCFace() # Edges 0, 5, 6 ,7
+        self.mock_face1.Edges[0] = self.mock_face0.Edges[0]
+        self.tracker.addFaces([self.mock_face0, self.mock_face1])
+
+    def trackerState(self):
+        faces = [(i.getName(), i.getOCCFace().value) for i in self.tracker._faceTrackers]
+        edges = [(i.getName(), i.getFaceNames()) for i in self.tracker._edgeTrackers]
+        return faces, edges
+
+    def test_commit(self):
+        mock_face2 = self.maker.OCCFace()
+        mock_face1b = self.maker.OCCFace(edges=self.mock_face1.Edges[:])
+        mock_face1b.Edges[1] = mock_face2.Edges[0]
+
+        transaction = self.tracker.transaction()
+        transaction.addFace(mock_face2)
+        transaction.modifyFace(self.mock_face1, mock_face1b)
+        self.assertEqual(len(self.tracker._faceTrackers), 2)
+        names = transaction.commit()
+
+        self.assertEqual(names, ['Face002'])
+        self.assertEqual(self.tracker.getEdgeName(mock_face2.Edges[0]), 'Edge007')
+        self.assertEqual(self.tracker.getEdgeNameFromFaces('Face001', 'Face002'), 'Edge007')
+        self.assertRaises(ValueError, self.tracker.getEdgeName, self.mock_face1.Edges[1])
+
+    def test_rejectedCommitChangesNothing(self):
+        '''A third Face on Edge 0 is rejected, even though the first change is fine'''
+        mock_face0b = self.maker.OCCFace(edges=self.mock_face0.Edges[:])
+        mock_face2 = self.maker.OCCFace()
+        mock_face2.Edges[0] = self.mock_face0.Edges[0]
+        before = self.trackerState()
+
+        transaction = self.tracker.transaction()
+        transaction.modifyFace(self.mock_face0, mock_face0b)
+        transaction.addFace(mock_face2)
+        self.assertRaises(ValueError, transaction.commit)
+
+        self.assertEqual(self.trackerState(), before)
+        self.assertEqual(self.tracker._numbFaces, 2)
+        self.assertEqual(self.tracker._numbEdges, 7)
+        transaction.rollback()
+
+    def test_edgeMovesToNewFace(self):
+        '''Deleting a Face and adding its replacement only has to be valid as a whole'''
+        mock_face2 = self.maker.OCCFace()
+        mock_face2.Edges[0] = self.mock_face0.Edges[0]
+
+        transaction = self.tracker.transaction()
+        transaction.addFace(mock_face2)
+        transaction.deleteFace(self.mock_face1)
+        transaction.commit()
+
+        self.assertEqual(self.tracker.getEdgeNameFromFaces('Face000', 'Face002'), 'Edge000')
+
+    def test_changeFaceTwiceError(self):
+        transaction = self.tracker.transaction()
+        transaction.deleteFace(self.mock_face1)
+        transaction.modifyFace(self.mock_face1, self.maker.OCCFace())
+
+        self.assertRaises(ValueError, transaction.commit)
+
+    def test_rollback(self):
+        before = self.trackerState()
+        transaction = self.tracker.transaction()
+        transaction.deleteFace(self.mock_face1)
+        transaction.rollback()
+
+        self.assertEqual(self.trackerState(), before)
+        self.assertRaises(ValueError, transaction.commit)
+        self.assertRaises(ValueError, transaction.addFace, self.maker.OCCFace())
+
+    def test_contextManager(self):
+        before = self.trackerState()
+        try:
+            with self.tracker.transaction() as transaction:
+                transaction.deleteFace(self.mock_face1)
+                raise RuntimeError('abort')
+        except RuntimeError:
+            pass
+        self.assertEqual(self.trackerState(), before)
+
+        with self.tracker.transaction() as transaction:
+            transaction.deleteFace(self.mock_face1)
+        self.assertRaises(ValueError, self.tracker.getEdgeName, self.mock_face0.Edges[0])
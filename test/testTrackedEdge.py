@@ -18,8 +18,14 @@ class TestTrackedEdge(unittest.TestCase):
         self.assertTrue(fetchedEdge.isEqual(self.mock_Edge0))
 
     def test_createNewTrackedEdge(self):
-        self.trackedEdge._name = 'Edge000'
-        self.trackedEdge._valid = False
+        self.assertEqual(self.trackedEdge.getName(), 'Edge000')
+        self.assertFalse(self.trackedEdge.isValid())
+        self.assertEqual(self.trackedEdge.getLastValidFaceNames(), [])
+
+    def test_slots(self):
+        '''TrackedEdges are compact records without a per-instance __dict__'''
+        self.assertFalse(hasattr(self.trackedEdge, '__dict__'))
+        self.assertRaises(AttributeError, setattr, self.trackedEdge, '_valid', False)
 
     def test_addFace_noSharedEdge(self):
         mock_face1 = self.maker.OCCFace()
@@ -30,11 +36,16 @@ class TestTrackedEdge(unittest.TestCase):
 
         self.assertRaises(ValueError, self.trackedEdge.addFace, trackedFace1)
 
+    def test_addFace_trusted(self):
+        '''A trusted Face is not checked for the Edge'''
+        self.trackedEdge.addFace(self.trackedFace, trusted=True)
+        self.assertEqual(self.trackedEdge.getFaceNames(), ['Face000'])
+
     def test_addFace_yesSharedEdgeFirstFace(self):
         self.trackedFace._occObj.Edges[0] = self.mock_Edge0
         self.trackedEdge.addFace(self.trackedFace)
 
-        self.assertEqual(self.trackedEdge._faceNames, ['Face000'])
+        self.assertEqual(self.trackedEdge.getFaceNames(), ['Face000'])
 
     def test_addFace_yesSharedEdgeSecondFace(self):
         self.trackedFace._occObj.Edges[0] = self.mock_Edge0
@@ -45,7 +56,7 @@ class TestTrackedEdge(unittest.TestCase):
         self.trackedEdge.addFace(self.trackedFace)
         self.trackedEdge.addFace(trackedFace1)
 
-        self.assertEqual(self.trackedEdge._faceNames, ['Face000', 'Face001'])
+        self.assertEqual(self.trackedEdge.getFaceNames(), ['Face000', 'Face001'])
 
     def test_addFace_errorIfThirdFaceAdded(self):
         self.trackedFace._occObj.Edges[0] = self.mock_Edge0
@@ -59,7 +70,7 @@ class TestTrackedEdge(unittest.TestCase):
         self.trackedEdge.addFace(self.trackedFace)
         self.trackedEdge.addFace(trackedFace1)
 
-        self.assertEqual(self.trackedEdge._faceNames, ['Face000', 'Face001'])
+        self.assertEqual(self.trackedEdge.getFaceNames(), ['Face000', 'Face001'])
         self.assertRaises(ValueError, self.trackedEdge.addFace, trackedFace2)
 
     def test_isValid_false(self):
@@ -81,4 +92,16 @@ class TestTrackedEdge(unittest.TestCase):
         self.trackedEdge.addFace(self.trackedFace)
         self.trackedEdge.delFace(self.trackedFace.getName())
 
-        self.assertTrue(len(self.trackedEdge._faceNames) == 0)
+        self.assertTrue(len(self.trackedEdge.getFaceIds()) == 0)
+
+    def test_clone(self):
+        '''A clone starts out equal but changes independently'''
+        self.trackedFace._occObj.Edges[0] = self.mock_Edge0
+        self.trackedEdge.addFace(self.trackedFace)
+        other = self.trackedEdge.clone()
+        other.delFace('Face000')
+
+        self.assertEqual(other.getName(), 'Edge000')
+        self.assertTrue(other.getOCCEdge() is self.mock_Edge0)
+        self.assertEqual(other.getFaceNames(), [])
+        self.assertEqual(self.trackedEdge.getFaceNames(), ['Face000'])
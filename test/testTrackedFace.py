@@ -10,9 +10,37 @@ class TestTrackedFace(unittest.TestCase):
 
     def test_createNewTrackedFace(self):
         self.assertEqual(self.mock_face0, self.trackedFace._occObj)
-        self.assertEqual('Face000', self.trackedFace._name)
+        self.assertEqual('Face000', self.trackedFace.getName())
+        self.assertEqual((0,), self.trackedFace.getId())
 
     def test_updateOCCFace(self):
         mock_face1 = self.maker.OCCFace()
 
         self.trackedFace.updateOCCFace(mock_face1)
+
+    def test_edgesAreCached(self):
+        '''The Edges and their keys are only read once, until the OCCFace is updated'''
+        edges = [self.maker.OCCEdge(), self.maker.OCCEdge()]
+        mock_face1 = self.maker.OCCFace(edges=edges[:])
+        trackedFace = TrackedFace(mock_face1, 'Face001')
+        keys = trackedFace.getEdgeKeys(lambda occEdge: occEdge.value)
+
+        mock_face1.Edges.append(self.maker.OCCEdge())
+        self.assertEqual(trackedFace.getEdges(), tuple(edges))
+        self.assertEqual(trackedFace.getEdgeKeys(None), keys)
+        self.assertEqual(trackedFace.clone().getEdges(), tuple(edges))
+
+        mock_face2 = self.maker.OCCFace(edges=edges[:1])
+        trackedFace.updateOCCFace(mock_face2, edges[:1], keys[:1])
+        self.assertEqual(trackedFace.getEdges(), tuple(edges[:1]))
+        self.assertEqual(trackedFace.getEdgeKeys(None), keys[:1])
+
+    def test_releaseDropsCachedEdges(self):
+        self.trackedFace.getEdges()
+        self.trackedFace.release(None)
+        self.assertEqual(self.trackedFace._edges, None)
+        self.assertEqual(self.trackedFace.getEdges(), tuple(self.mock_face0.Edges))
+        self.assertEqual(self.trackedFace._edges, None)
+
+    def test_slots(self):
+        self.assertFalse(hasattr(self.trackedFace, '__dict__'))
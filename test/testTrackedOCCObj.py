@@ -1,5 +1,7 @@
+import gc
 import unittest
 from PyTopoNamer.TrackedOCCObj import TrackedOCCObj
+from PyTopoNamer.ShapeSignature import ShapeSignature
 from test.TestingHelpers import MockObjectMaker
 
 class TestTrackedOCCObj(unittest.TestCase):
@@ -32,3 +34,38 @@ class TestTrackedOCCObj(unittest.TestCase):
         trackedObj = TrackedOCCObj(mock_obj, 'Object001')
         trackedObj2 = TrackedOCCObj(mock_obj2, 'Object002', parent=mock_obj)
         self.assertFalse(trackedObj2.isChildOf(self.trackedOCCObj))
+
+    def test_nameById(self):
+        trackedObj = TrackedOCCObj(self.mock_occObj, (12, 0))
+        self.assertEqual(trackedObj.getName(), 'Object012a')
+        self.assertEqual(trackedObj.getId(), (12, 0))
+
+    def test_wrongBaseError(self):
+        self.assertRaises(ValueError, TrackedOCCObj, self.mock_occObj, 'Face000')
+
+    def test_release(self):
+        '''A released object is only held weakly, along with its signature'''
+        signature = ShapeSignature('key')
+        self.trackedOCCObj.release(signature)
+
+        self.assertTrue(self.trackedOCCObj.isReleased())
+        self.assertTrue(self.trackedOCCObj.getSignature() is signature)
+        self.assertTrue(self.trackedOCCObj.getOCCObj() is self.mock_occObj)
+        del self.mock_occObj
+        gc.collect()
+        self.assertEqual(self.trackedOCCObj.getOCCObj(), None)
+
+        newObj = self.maker.OCCFace()
+        self.trackedOCCObj.restore(newObj)
+        self.assertFalse(self.trackedOCCObj.isReleased())
+        self.assertEqual(self.trackedOCCObj.getSignature(), None)
+        self.assertTrue(self.trackedOCCObj.getOCCObj() is newObj)
+
+    def test_releaseWithoutWeakReferences(self):
+        trackedObj = TrackedOCCObj(NoWeakReferences(), 'Object001')
+        trackedObj.release(ShapeSignature('key'))
+        self.assertTrue(trackedObj.isReleased())
+        self.assertEqual(trackedObj.getOCCObj(), None)
+
+class NoWeakReferences(object):
+    __slots__ = ()